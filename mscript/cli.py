@@ -1,11 +1,14 @@
 # mscript/cli.py
 
-import runpy
 import os
+import sys
 
 def main():
-    it_path = os.path.join(os.path.dirname(__file__), "it.py")
-    runpy.run_path(it_path, run_name="__main__")
+    # import it.py as a module (rather than running it as a script) so its
+    # bytecode is cached in __pycache__ instead of being recompiled every run
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import it
+    it.main()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -46,40 +46,247 @@ version 0.1:
 - Initial version
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+if __name__ == '__main__':
+    # `python it.py`: run everything from the `it` module instead, so there is
+    # one Node class; trees cached by mpm and compile_dir are pickled as it.Node
+    import it
+    it.main()
+
 import ast
-from lark import Lark, Tree, Token
+import collections
+import hashlib
+import importlib
+import io
+import operator
+import pickle
+import types
+from lark import Lark, Tree, Token, Transformer
+from lark.tree import Meta
 from lark.visitors import Interpreter as LarkInterpreter
 import sys
-import platform
 import os
-from lark.exceptions import UnexpectedInput
+from lark.exceptions import UnexpectedInput, UnexpectedToken
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from mscript_builtins import builtins as _b
+from mscript_builtins import builtins as _b, MemoizedFunction, PythonModuleProxy, slice_value
 sys.tracebacklimit = 0
 
 __VERSION__ = "0.7.4"
 __AUTHOR__  = "Momo-AUX1"
 __DATE__    = "2025-05-21"
 
-language_definition = open(os.path.join(os.path.dirname(__file__), "language.def")).read()
+_parser = None
+
+# ——— f-strings ———
+
+def _fstring_field(text, start, meta):
+    """Split the field opened just before `start` into (expr, spec, end)."""
+    depth, quote, colon = 0, None, None
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch in "([{":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == "}" and depth:
+            depth -= 1
+        elif ch == "}":
+            if colon is None:
+                return text[start:i], "", i + 1
+            return text[start:colon], text[colon + 1:i], i + 1
+        elif ch == ":" and not depth and colon is None:
+            colon = i
+    raise SyntaxError(f"{meta.line}:{meta.column}: unterminated '{{' in f-string")
+
+class _FStringCompiler(Transformer):
+    """Runs inside the parser: splits every f-string into its literal text
+    and parsed fields once, so evaluation never re-scans the template."""
+
+    def fstring(self, children):
+        token = children[0]
+        meta  = Meta()
+        meta.empty, meta.line, meta.column = False, token.line, token.column
+        text  = ast.literal_eval(str(token)[1:])
+        parts, literal, i = [], [], 0
+        while i < len(text):
+            ch = text[i]
+            if ch in "{}" and text[i + 1:i + 2] == ch:
+                literal.append(ch)
+                i += 2
+            elif ch == "}":
+                raise SyntaxError(f"{meta.line}:{meta.column}: single '}}' in f-string")
+            elif ch != "{":
+                literal.append(ch)
+                i += 1
+            else:
+                source, spec, i = _fstring_field(text, i + 1, meta)
+                try:
+                    stmt = get_parser().parse(source.strip())
+                except UnexpectedInput:
+                    stmt = None
+                if not (isinstance(stmt, Tree) and stmt.data == 'expr_stmt'):
+                    raise SyntaxError(f"{meta.line}:{meta.column}: f-string field '{source}' is not an expression")
+                expr = stmt.children[0]
+                for sub in expr.iter_subtrees():
+                    sub._meta = meta   # positions within the field would say line 1
+                if literal:
+                    parts.append("".join(literal))
+                    literal = []
+                parts.append(Tree('fstring_field', [expr, spec], meta))
+        if literal:
+            parts.append("".join(literal))
+        return Tree('fstring', parts)
+
+def get_parser():
+    """The Mscript parser, built on first use and shared by every interpreter.
+
+    Lark keeps the generated LALR tables in a cache file, so only the first
+    run after the grammar changes pays for building them.
+    """
+    global _parser
+    if _parser is None:
+        with open(os.path.join(os.path.dirname(__file__), "language.def")) as f:
+            grammar = f.read()
+        _parser = Lark(grammar,
+                       parser='lalr',
+                       propagate_positions=True,
+                       transformer=_FStringCompiler(),
+                       cache=True)
+    return _parser
+
+# ——— compact trees ———
+# Lark's Tree keeps a __dict__ and a Meta object (eight positions) per node,
+# and every token is a Token carrying its own positions. Loaded programs only
+# need the rule name, the children and where the node starts, so parse
+# trees are converted to Nodes: names and tokens become interned strings,
+# children become tuples, and line/column numbers are shared int objects.
+# Quickening rewrites `data` (the handler a node runs) and sometimes the
+# children in place; what was parsed is kept in `parsed` for printing.
+
+class Node:
+    """A node of a parsed program."""
+    __slots__ = ("data", "children", "line", "column", "parsed")
+    empty = False   # read through `meta`, like Lark's Meta
+
+    def __init__(self, data, children, line=None, column=None):
+        self.data     = data
+        self.children = children
+        self.line     = line
+        self.column   = column
+        self.parsed   = None
+
+    def specialize(self, data, children=None):
+        """Make this node run the `data` handler from now on (with `children`,
+        if given), keeping the rule and children it was parsed with."""
+        if self.parsed is None:
+            self.parsed = (self.data, self.children)
+        self.data = data
+        if children is not None:
+            self.children = children
+
+    def source(self):
+        """The rule name and children as parsed, before any quickening."""
+        return self.parsed or (self.data, self.children)
+
+    @property
+    def meta(self):
+        """Positions live on the node itself (`node.meta.line` still works)."""
+        return self
+
+    def copy(self, children):
+        return Node(self.data, children, self.line, self.column)
+
+    def const(self, value):
+        """An already-evaluated value standing in for this node."""
+        return Node('_const', (value,), self.line, self.column)
+
+    def iter_subtrees(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(c for c in reversed(node.children) if isinstance(c, Node))
+
+    def pretty(self, indent_str="  "):
+        out = []
+        def walk(node, depth):
+            if isinstance(node, Node):
+                data, children = node.source()
+                out.append(f"{indent_str * depth}{data}\n")
+                for child in children:
+                    walk(child, depth + 1)
+            else:
+                out.append(f"{indent_str * depth}{node}\n")
+        walk(self, 0)
+        return "".join(out)
+
+    def __repr__(self):
+        data, children = self.source()
+        return f"Node({data!r}, {list(children)!r})"
+
+def compact(tree):
+    """Convert a Lark parse tree into Nodes."""
+    numbers = {}
+    intern  = sys.intern
+    def convert(t):
+        if isinstance(t, Tree):
+            meta = t._meta   # the `meta` property would create an empty Meta
+            line = column = None
+            if meta is not None and not meta.empty:
+                line   = numbers.setdefault(meta.line, meta.line)
+                column = numbers.setdefault(meta.column, meta.column)
+            return Node(intern(str(t.data)), tuple(convert(c) for c in t.children), line, column)
+        if isinstance(t, Token):
+            return intern(str(t))
+        return t   # None placeholders and f-string text
+    return convert(tree)
+
+def parse(text):
+    """Parse Mscript source into a compact tree."""
+    return compact(get_parser().parse(text))
+
+def _raise_with_loc(filename, tree, e):
+    """Raise `e` again with the file, line and column of `tree` in front."""
+    meta = getattr(tree, "meta", None)
+    loc  = f"{filename}:{meta.line}:{meta.column}" if meta else filename
+    try:
+        located = type(e)(f"{loc}: {e}")
+    except Exception:   # an exception whose constructor takes other arguments
+        if hasattr(e, "add_note"):   # Python 3.11+
+            e.add_note(loc)
+        raise e
+    raise located from e
 
 def _wrap_error_with_loc(method):
     def wrapper(self, tree):
         try:
             return method(self, tree)
+        except RecursionLimitError:
+            raise
         except Exception as e:
-            meta = getattr(tree, "meta", None)
-            if meta:
-                loc = f"{self.filename}:{meta.line}:{meta.column}"
-            else:
-                loc = self.filename
-            raise type(e)(f"{loc}: {e}")
+            _raise_with_loc(self.filename, tree, e)
     return wrapper
 
 class ReturnException(Exception):
-    """Unwind the current function frame with a return value."""
-    def __init__(self, value):
+    """Unwind the current function frame with a return value.
+
+    For `return f(...)` in tail position `tail` is (f, args, kwargs): the
+    frame being left runs f in its place instead of nesting a new call.
+    """
+    def __init__(self, value, tail=None):
         self.value = value
+        self.tail  = tail
+
+class RecursionLimitError(RecursionError):
+    """Mscript call depth exceeded `MscriptInterpreter.max_recursion`."""
+    pass
     
 class BreakException(Exception):
     """Unwind loop with a break."""
@@ -96,48 +303,461 @@ class FunctionRef:
         self.params      = params
         self.block       = block
         self.interpreter = interpreter
-
-    def __call__(self, *arg_vals):
-        interp    = self.interpreter
-        params, block = self.params, self.block
-
-        if len(arg_vals) != len(params):
+        if type(self) is FunctionRef:
+            interpreter._find_tail_calls(block)
+
+    def _bind(self, arg_vals, kwargs):
+        """Build the call's local scope from positional and keyword arguments."""
+        params = self.params
+        if not kwargs and len(arg_vals) == len(params):
+            return dict(zip(params, arg_vals))
+        if len(arg_vals) > len(params) or not kwargs:
             raise TypeError(f"{self.name}() expects {len(params)} args, got {len(arg_vals)}")
+        env = dict(zip(params, arg_vals))
+        for pname, pval in kwargs.items():
+            if pname not in params:
+                raise TypeError(f"{self.name}() got an unexpected keyword argument '{pname}'")
+            if pname in env:
+                raise TypeError(f"{self.name}() got multiple values for argument '{pname}'")
+            env[pname] = pval
+        if len(env) != len(params):
+            missing = [p for p in params if p not in env]
+            raise TypeError(f"{self.name}() missing argument(s): {', '.join(missing)}")
+        return env
+
+    def __call__(self, *arg_vals, **kwargs):
+        return self.call(arg_vals, kwargs)
+
+    def call(self, arg_vals, kwargs):
+        """Run the function. The interpreter calls this directly rather than
+        through __call__, which keeps Mscript calls off the C stack."""
+        interp  = self.interpreter
+        old_env = interp.env
+        interp._depth += 1
+        try:
+            if interp._depth > interp.max_recursion:
+                raise RecursionLimitError(f"{interp.filename}: maximum recursion depth "
+                                          f"({interp.max_recursion}) exceeded in '{self.name}'")
+            fn = self
+            while True:
+                interp.env = fn._bind(arg_vals, kwargs)
+                try:
+                    for stmt in fn.block.children:
+                        interp.visit(stmt)
+                    return None
+                except ReturnException as ret:
+                    if ret.tail is None:
+                        return ret.value
+                    # tail call: reuse this frame for the callee
+                    stack = interp.call_stack
+                    if stack and stack[-1] == fn.name:
+                        stack[-1] = ret.tail[0].name
+                    fn, arg_vals, kwargs = ret.tail
+        finally:
+            interp.env = old_env
+            interp._depth -= 1
+
+class AsyncFunctionRef(FunctionRef):
+    """An Mscript `async def`; calling it returns an awaitable coroutine."""
+    is_async = True   # memo() and cache() refuse these
+
+    def call(self, arg_vals, kwargs):
+        return self.interpreter._run_coroutine(self.block, self._bind(arg_vals, kwargs))
+
+class MscriptModule:
+    """An imported Mscript module; its globals are reachable as attributes."""
+    def __init__(self, name, filename, interpreter):
+        self.name        = name
+        self.filename    = filename
+        self.interpreter = interpreter
 
-        old_env      = interp.env
-        interp.env   = {}
-        for pname, pval in zip(params, arg_vals):
-            interp.env[pname] = pval
-
-        result = None
-        for stmt in block.children:
-            try:
-                interp.visit(stmt)
-            except ReturnException as ret:
-                result = ret.value
+    def __getattr__(self, attr):
+        interp = self.__dict__.get("interpreter")
+        if interp is not None and attr in interp.global_env:
+            return interp.global_env[attr]
+        raise AttributeError(f"module '{self.name}' has no attribute '{attr}'")
+
+    def __repr__(self):
+        return f"<module '{self.name}' from '{self.filename}'>"
+
+# Modules are executed once per process, keyed by absolute file path.
+_modules = {}
+
+# ——— module search path ———
+
+_STD_DIR     = os.path.join(os.path.dirname(os.path.abspath(__file__)), "std")
+_search_path = None
+_dir_index   = {}   # directory -> names it contains, listed once per process
+_found       = {}   # dotted module name -> file path (or None)
+
+def search_path():
+    """Directories searched by `import name`: the working directory,
+    $MSCRIPT_PATH, ./mscript_packages and the standard library."""
+    global _search_path
+    if _search_path is None:
+        cwd   = os.getcwd()
+        extra = [os.path.abspath(p) for p in os.environ.get("MSCRIPT_PATH", "").split(os.pathsep) if p]
+        _search_path = [cwd, *extra, os.path.join(cwd, "mscript_packages"), _STD_DIR]
+    return _search_path
+
+def _listing(directory):
+    entries = _dir_index.get(directory)
+    if entries is None:
+        try:
+            entries = frozenset(os.listdir(directory))
+        except OSError:
+            entries = frozenset()
+        _dir_index[directory] = entries
+    return entries
+
+def find_module(parts):
+    """Locate module `a.b.c` on the search path without touching the disk
+    beyond one listing per directory.
+
+    Each root is tried for `a/b/c.mscript`, then for an mpm package
+    directory `a/b/c/c.mscript`. Returns None when nothing matches.
+    """
+    key = ".".join(parts)
+    if key in _found:
+        return _found[key]
+    path = None
+    for root in search_path():
+        directory = root
+        for part in parts[:-1]:
+            if part not in _listing(directory):
                 break
+            directory = os.path.join(directory, part)
+        else:
+            name    = parts[-1]
+            entries = _listing(directory)
+            if name + ".mscript" in entries:
+                path = os.path.join(directory, name + ".mscript")
+            elif name in entries and name + ".mscript" in _listing(os.path.join(directory, name)):
+                path = os.path.join(directory, name, name + ".mscript")
+            if path:
+                break
+    _found[key] = path
+    return path
+
+# ——— precompiled module cache ———
+
+# Parsed trees are pickled to __mscache__/<file>.ast next to the source,
+# stamped with the grammar digest and the source's mtime and size.
+_CACHE_DIR    = "__mscache__"
+_CACHE_FORMAT = 3   # bumped when the pickled tree representation changes
+_grammar_tag  = None
+
+def _grammar_digest():
+    global _grammar_tag
+    if _grammar_tag is None:
+        with open(os.path.join(os.path.dirname(__file__), "language.def"), "rb") as f:
+            _grammar_tag = hashlib.sha1(f.read()).hexdigest()
+    return _grammar_tag
+
+def _cache_stamp(path):
+    st = os.stat(path)
+    return (_grammar_digest(), _CACHE_FORMAT, st.st_mtime_ns, st.st_size)
+
+def _cache_file(path):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, _CACHE_DIR, name + ".ast")
+
+def parse_module(path):
+    """Parse a module file, using its precompiled tree when it is current."""
+    stamp = _cache_stamp(path)
+    try:
+        with open(_cache_file(path), "rb") as f:
+            if pickle.load(f) == stamp:
+                return pickle.load(f)
+    except Exception:
+        pass
+    with open(path, "r") as f:
+        return parse(f.read())
+
+def compile_module(path):
+    """Parse `path` and store the tree in the module cache."""
+    stamp = _cache_stamp(path)
+    with open(path, "r") as f:
+        tree = parse(f.read())
+    cache = _cache_file(path)
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    tmp = f"{cache}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(stamp, f, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(tree, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache)
+    return tree
+
+def compile_dir(directory):
+    """Precompile every .mscript file under `directory`; returns the failures."""
+    failures = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d != _CACHE_DIR]
+        for name in files:
+            if name.endswith(".mscript"):
+                path = os.path.join(root, name)
+                try:
+                    compile_module(path)
+                except UnexpectedInput as e:
+                    failures.append((path, f"syntax error at {e.line}:{e.column}"))
+                except SyntaxError as e:
+                    failures.append((path, f"syntax error at {e}"))
+                except OSError as e:
+                    failures.append((path, e))
+    return failures
+
+# Every interpreter shares one read-only view of the builtins table.
+_builtins = types.MappingProxyType(_b)
+
+_MISSING = object()
+
+class _PackageNamespace(types.SimpleNamespace):
+    """The `a` and `a.b` of `import a.b.c`; only imports add to it."""
+
+# Objects whose attributes are treated as stable by the dotted-name cache.
+# Namespaces built by scripts are not: their attributes may be rebound.
+_MODULE_TYPES = (types.ModuleType, PythonModuleProxy, MscriptModule, _PackageNamespace)
+
+class _ProgramPickler(pickle.Pickler):
+    """Pickle Mscript values for another process; functions travel as their trees."""
+    def persistent_id(self, obj):
+        if isinstance(obj, FunctionRef):
+            return ("function", type(obj) is AsyncFunctionRef, obj.name, obj.params, obj.block)
+        if isinstance(obj, MscriptModule):
+            return ("mscript_module", obj.name, obj.filename)
+        if isinstance(obj, types.ModuleType):
+            return ("module", obj.__name__)
+        return None
 
-        interp.env = old_env
-        return result
+class _ProgramUnpickler(pickle.Unpickler):
+    """Counterpart of _ProgramPickler; functions are re-bound to `interpreter`."""
+    def __init__(self, file, interpreter):
+        super().__init__(file)
+        self.interpreter = interpreter
+
+    def persistent_load(self, pid):
+        if pid[0] == "function":
+            _, is_async, name, params, block = pid
+            ref_class = AsyncFunctionRef if is_async else FunctionRef
+            return ref_class(name, params, block, self.interpreter)
+        if pid[0] == "mscript_module":
+            _, name, filename = pid
+            module = _modules.get(os.path.abspath(filename))
+            if module is None:
+                module = self.interpreter._load_module(name, filename, None)
+            return module
+        if pid[0] == "module":
+            return importlib.import_module(pid[1])
+        raise pickle.UnpicklingError(f"unknown persistent id {pid[0]!r}")
+
+def _referenced_names(node):
+    """Names a subtree reads: variables, called functions and dotted-name roots."""
+    names = set()
+    for sub in node.iter_subtrees():
+        if sub.data in ('var', 'func_call') and isinstance(sub.children[0], str):
+            names.add(str(sub.children[0]))
+        elif sub.data == 'dotted_name':
+            parts = [str(tok) for tok in sub.children]
+            names.add(parts[0])
+            names.add(".".join(parts))
+    return names
+
+def load_program(payload):
+    """Rebuild a function exported by `MscriptInterpreter.export_function`."""
+    filename, data = payload
+    interp = MscriptInterpreter(filename=filename)
+    values, imports, entry = _ProgramUnpickler(io.BytesIO(data), interp).load()
+    interp.global_env.update(values)
+    interp.imports.extend(imports)
+    return entry
+
+# ——— snapshots ———
+# A snapshot is the state of an initialized program: the globals of the
+# main interpreter and of every loaded module, with functions as their
+# trees (quickened nodes included) and modules by file name. Resuming
+# registers the modules as already loaded, so imports of them are free.
+# Values that cannot be pickled (FFI handles, open files, ...) are re-created
+# by running the top-level statement that last assigned them again.
+
+_SNAPSHOT_FORMAT = 1
+
+class _SnapshotPickler(_ProgramPickler):
+    """Functions also record which interpreter (by file) they belong to."""
+    def persistent_id(self, obj):
+        if isinstance(obj, FunctionRef):
+            return ("snapshot_function", os.path.abspath(obj.interpreter.filename),
+                    type(obj) is AsyncFunctionRef, obj.name, obj.params, obj.block)
+        if isinstance(obj, PythonModuleProxy):
+            return ("python",)   # its attributes are imported again on first use
+        return super().persistent_id(obj)
+
+class _SnapshotUnpickler(_ProgramUnpickler):
+    def __init__(self, file, interpreter, interpreters):
+        super().__init__(file, interpreter)
+        self.interpreters = interpreters
+
+    def persistent_load(self, pid):
+        if pid[0] == "snapshot_function":
+            _, owner, is_async, name, params, block = pid
+            ref_class = AsyncFunctionRef if is_async else FunctionRef
+            return ref_class(name, params, block, self.interpreters.get(owner, self.interpreter))
+        if pid[0] == "python":
+            return PythonModuleProxy()
+        return super().persistent_load(pid)
+
+def _snapshot_stamp():
+    return (_SNAPSHOT_FORMAT, _grammar_digest(), _CACHE_FORMAT, sys.version_info[:2])
+
+def _rebuilders(tree, names):
+    """The top-level statements of `tree` that last bind each of `names`."""
+    found = {}
+    for index, stmt in enumerate(tree.children if tree is not None else ()):
+        if not isinstance(stmt, Node):
+            continue
+        if stmt.data == 'assign' and stmt.children[0] in names:
+            found[stmt.children[0]] = (index, stmt)
+        elif stmt.data == 'import_stmt' and stmt.children[0] == "python" and "python" in names:
+            found["python"] = (index, stmt)
+    return [stmt for _, stmt in sorted(found.values(), key=lambda f: f[0])]
+
+def save_snapshot(interp, path, tree=None):
+    """Write the state of `interp` (which has run `tree`) and of every loaded
+    module to `path`. Returns the names that were left out: unpicklable
+    values that no top-level assignment can re-create."""
+    states, lost = [], []
+    sources = [(key, module.name, module.interpreter, None) for key, module in _modules.items()]
+    sources.append((None, None, interp, tree))   # last: it may use the modules
+    for key, name, sub, sub_tree in sources:
+        values, skipped = {}, set()
+        for var, value in sub.global_env.items():
+            try:
+                _SnapshotPickler(io.BytesIO()).dump(value)
+            except Exception:
+                skipped.add(var)
+                continue
+            values[var] = value
+        if skipped and key is not None:
+            try:
+                sub_tree = parse_module(sub.filename)
+            except Exception:
+                pass
+        rebuild = _rebuilders(sub_tree, skipped)
+        rebuilt = {stmt.children[0] for stmt in rebuild}
+        lost.extend(f"{sub.filename}: {var}" for var in sorted(skipped - rebuilt))
+        states.append((key, name, sub.filename, values, sub.imports, rebuild))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(_snapshot_stamp(), f, pickle.HIGHEST_PROTOCOL)
+        # which interpreters to create before any function is unpickled
+        pickle.dump([(key, name, filename) for key, name, filename, *_ in states], f,
+                    pickle.HIGHEST_PROTOCOL)
+        _SnapshotPickler(f, pickle.HIGHEST_PROTOCOL).dump(
+            [(values, imports, rebuild) for _, _, _, values, imports, rebuild in states])
+    os.replace(tmp, path)
+    return lost
+
+def load_snapshot(interp, path):
+    """Restore a snapshot written by `save_snapshot` into `interp`."""
+    with open(path, "rb") as f:
+        if pickle.load(f) != _snapshot_stamp():
+            raise ValueError(f"{path}: snapshot was made by another version of Mscript or Python")
+        headers = pickle.load(f)
+        targets, interpreters = [], {}
+        for key, name, filename in headers:
+            if key is None:
+                sub = interp
+            else:
+                module = _modules.get(key)
+                if module is None:
+                    module = _modules[key] = MscriptModule(name, filename, MscriptInterpreter(filename=filename))
+                sub = module.interpreter
+            interpreters[key if key is not None else os.path.abspath(interp.filename)] = sub
+            targets.append(sub)
+        states = _SnapshotUnpickler(f, interp, interpreters).load()
+    for sub, (values, imports, _) in zip(targets, states):
+        sub.global_env.update(values)
+        sub.imports.extend(m for m in imports if m not in sub.imports)
+    for sub, (_, _, rebuild) in zip(targets, states):
+        for stmt in rebuild:
+            sub.visit(stmt)
 
 class MscriptInterpreter(LarkInterpreter):
     """Interpreter for the Mscript language."""
+
+    # Deepest Mscript call nesting; tail calls do not count. See set_max_recursion().
+    max_recursion = 10000
+    # Rewrite operator and literal nodes into specialized ones as they run.
+    adaptive = True
+
     def __init__(self, filename="<string>"):
         super().__init__()
         self.global_env = {}
         self.env        = self.global_env
-        self.functions  = {}
         self.filename   = filename
         self.call_stack = []
-        self.builtins = _b.copy()
+        self.builtins   = _builtins
+        self.imports    = []
+        self._import_cache = {}
+        self._await_cache  = {}
+        self._dotted_sites = {}
+        self._depth        = 0
+        self._tail_blocks  = {}
+        self._tail_returns = set()
+        self.sampler       = None
+
+    def visit(self, tree):
+        # Lark's visit() also probes every handler for a `visit_wrapper`;
+        # none of ours have one, so dispatch straight to the handler.
+        return getattr(self, tree.data)(tree)
+
+    def export_function(self, fn):
+        """Serialize `fn` with the functions and globals it references.
+
+        The result is picklable and is turned back into a callable by
+        `load_program` in another process. Imported modules travel by file
+        name and are re-imported there. Globals that cannot be pickled (open
+        handles, C pointers, ...) are left out.
+        """
+        values = {}
+        pending, seen = [fn.block], set()
+        while pending:
+            for name in _referenced_names(pending.pop()) - seen:
+                seen.add(name)
+                if name in self.global_env:
+                    value = self.global_env[name]
+                    if isinstance(value, MemoizedFunction):
+                        value = value.fn
+                    if isinstance(value, FunctionRef):
+                        pending.append(value.block)
+                    value = self.global_env[name]
+                    try:
+                        _ProgramPickler(io.BytesIO()).dump(value)
+                    except Exception:
+                        continue
+                    values[name] = value
 
+        buf = io.BytesIO()
+        _ProgramPickler(buf).dump((values, self.imports, fn))
+        return (load_program, (self.filename, buf.getvalue()))
 
-    def __getattr__(self, attr):
-        fullname = f"{self.name}.{attr}"
-        if fullname in self.interpreter.functions:
-            params, block = self.interpreter.functions[fullname]
-            return FunctionRef(fullname, params, block, self.interpreter)
-        raise AttributeError(f"'{self.name}' object has no attribute '{attr}'")
+    # ——— sampling profiler ———
+
+    def start_sampling(self, rate=100):
+        """Sample the calling thread's Mscript stack `rate` times a second
+        (see mscript_sampler). Samples accumulate across stops and starts."""
+        if self.sampler is None:
+            import mscript_sampler
+            self.sampler = mscript_sampler.Sampler(self, rate)
+        self.sampler.interval = 1.0 / rate
+        return self.sampler.start()
+
+    def stop_sampling(self):
+        """Pause sampling; returns the Sampler holding the samples so far."""
+        return self.sampler.stop() if self.sampler is not None else None
+
+    def sampling(self):
+        return self.sampler is not None and self.sampler.running
 
     def _dispatch_userfunc(self, tree, func):
         """Wrap every node-visit to attach file/line/col on errors."""
@@ -153,12 +773,16 @@ class MscriptInterpreter(LarkInterpreter):
 
     def start(self, tree):
         """The main entry point for the interpreter."""
+        # Functions are hoisted; decorators are applied when the program
+        # reaches them, so they may use anything defined above them.
         for stmt in tree.children:
-            if isinstance(stmt, Tree) and stmt.data == 'func_def':
+            if isinstance(stmt, Node) and stmt.data in ('func_def', 'async_func_def'):
                 self.visit(stmt)
+            elif isinstance(stmt, Node) and stmt.data == 'decorated':
+                self.visit(stmt.children[-1])
 
         for stmt in tree.children:
-            if not (isinstance(stmt, Tree) and stmt.data == 'func_def'):
+            if not (isinstance(stmt, Node) and stmt.data in ('func_def', 'async_func_def')):
                 try:
                     self.visit(stmt)
                 except ReturnException:
@@ -171,6 +795,69 @@ class MscriptInterpreter(LarkInterpreter):
         self.env[str(name_tok)] = val
         return val
 
+    # ——— augmented assignment ———
+    # The target is evaluated once and updated with Python's in-place
+    # operators, so `xs += [x]` extends the list instead of copying it.
+
+    _AUG_OPS = {
+        "+=":  operator.iadd,
+        "-=":  operator.isub,
+        "*=":  operator.imul,
+        "/=":  operator.itruediv,
+        "%=":  operator.imod,
+        "**=": operator.ipow,
+    }
+
+    @_wrap_error_with_loc
+    def aug_assign(self, tree):
+        """x += expr"""
+        name_tok, op, expr = tree.children
+        name = str(name_tok)
+        env  = self.env
+        if name in env:
+            current = env[name]
+        else:
+            current = self._lookup(name)
+            if current is _MISSING:
+                raise NameError(f"Variable '{name}' is not defined.")
+        val = env[name] = self._AUG_OPS[op](current, self.visit(expr))
+        return val
+
+    @_wrap_error_with_loc
+    def aug_index_assign(self, tree):
+        """xs[i] += expr"""
+        container = self.visit(tree.children[0])
+        idx       = self.visit(tree.children[1])
+        op        = self._AUG_OPS[tree.children[2]]
+        val = container[idx] = op(container[idx], self.visit(tree.children[3]))
+        return val
+
+    @_wrap_error_with_loc
+    def aug_attr_assign(self, tree):
+        """obj.attr += expr"""
+        target = tree.children[0]
+        if isinstance(target, Node) and target.data == 'dotted_name':
+            root, *path, attr = [str(t) for t in target.children]
+            obj = self._lookup(root)
+            if obj is _MISSING:
+                raise NameError(f"Name '{root}' is not defined")
+            for part in path:
+                obj = obj[part] if isinstance(obj, dict) and part in obj else getattr(obj, part)
+            op, expr = tree.children[1:]
+        else:
+            obj = self.visit(target)
+            attr, op, expr = str(tree.children[1]), *tree.children[2:]
+
+        if isinstance(obj, dict) and attr in obj:
+            val = obj[attr] = self._AUG_OPS[op](obj[attr], self.visit(expr))
+        elif isinstance(obj, MscriptModule):
+            env = obj.interpreter.global_env
+            val = env[attr] = self._AUG_OPS[op](getattr(obj, attr), self.visit(expr))
+        else:
+            val = self._AUG_OPS[op](getattr(obj, attr), self.visit(expr))
+            setattr(obj, attr, val)
+        return val
+
     def index_assign(self, tree):
         """Assign a value to an index in a list or dict."""
         container = self.visit(tree.children[0])
@@ -188,8 +875,8 @@ class MscriptInterpreter(LarkInterpreter):
     def input_expr(self, tree):
         """Get user input."""
         tok = tree.children[0]
-        if not isinstance(tok, Token):
-            raise TypeError(f"Expected Token, got {type(tok).__name__}")
+        if not isinstance(tok, str):
+            raise TypeError(f"Expected a string token, got {type(tok).__name__}")
         prompt = ast.literal_eval(str(tok))
         return input(prompt)
 
@@ -200,11 +887,33 @@ class MscriptInterpreter(LarkInterpreter):
 
     def return_stmt(self, tree):
         """Return a value from a function."""
-        if len(tree.children) > 0:
-            val = self.visit(tree.children[0])
-        else:
-            val = None  
-        raise ReturnException(val)
+        expr = tree.children[0] if tree.children else None
+        if expr is None:
+            raise ReturnException(None)
+        if id(tree) in self._tail_returns:
+            callee, arg_vals, kwargs = self._call_target(expr)
+            if type(callee) is FunctionRef and callee.interpreter is self:
+                raise ReturnException(None, (callee, arg_vals, kwargs))
+            raise ReturnException(self._invoke(callee, arg_vals, kwargs))
+        raise ReturnException(self.visit(expr))
+
+    def _find_tail_calls(self, block):
+        """Record the `return f(...)` statements of a function body that can
+        be run as tail calls: everything outside `try` and nested defs."""
+        if id(block) in self._tail_blocks:
+            return
+        self._tail_blocks[id(block)] = block
+        def scan(node):
+            for child in node.children:
+                if not isinstance(child, Node) or child.data in ('try_stmt', 'func_def', 'async_func_def'):
+                    continue
+                if child.data == 'return_stmt':
+                    expr = child.children[0] if child.children else None
+                    if isinstance(expr, Node) and expr.data == 'func_call':
+                        self._tail_returns.add(id(child))
+                else:
+                    scan(child)
+        scan(block)
 
     def if_stmt(self, tree):
         """Evaluate an if statement."""
@@ -221,7 +930,7 @@ class MscriptInterpreter(LarkInterpreter):
 
         while idx < n:
             node = tree.children[idx]
-            if isinstance(node, Tree) and node.data == 'block':
+            if isinstance(node, Node) and node.data == 'block':
                 for stmt in node.children:
                     self.visit(stmt)
                 return
@@ -279,12 +988,12 @@ class MscriptInterpreter(LarkInterpreter):
         catch_clause  = tree.children[1]
 
         cc_children = catch_clause.children
-        if len(cc_children) == 1 and isinstance(cc_children[0], Tree):
+        if len(cc_children) == 1 and isinstance(cc_children[0], Node):
             var_name   = None
             catch_block = cc_children[0]
         elif (len(cc_children) == 2
-              and isinstance(cc_children[0], Token)
-              and isinstance(cc_children[1], Tree)):
+              and isinstance(cc_children[0], str)
+              and isinstance(cc_children[1], Node)):
             var_name    = str(cc_children[0])
             catch_block = cc_children[1]
         else:
@@ -293,6 +1002,8 @@ class MscriptInterpreter(LarkInterpreter):
         try:
             for stmt in try_block.children:
                 self.visit(stmt)
+        except (ReturnException, BreakException, ContinueException):
+            raise
         except Exception as exc:
             if var_name:
                 had_old = var_name in self.env
@@ -308,17 +1019,17 @@ class MscriptInterpreter(LarkInterpreter):
                 else:
                     del self.env[var_name]
 
-    def func_def(self, tree):
+    def func_def(self, tree, ref_class=FunctionRef, body='block'):
         """Define a function."""
         name_tok = tree.children[0]
         name     = str(name_tok)
         params = []
         block  = None
         for child in tree.children[1:]:
-            if isinstance(child, Tree):
+            if isinstance(child, Node):
                 if child.data == 'params':
                     params = [str(p) for p in child.children]
-                elif child.data == 'block':
+                elif child.data == body:
                     block = child
 
         if block is None:
@@ -327,183 +1038,224 @@ class MscriptInterpreter(LarkInterpreter):
         if self.call_stack:
             parent = self.call_stack[-1]
             fullname = f"{parent}.{name}"
-            self.functions[fullname] = (params, block)
             parent_ref = self.global_env[parent]
-            setattr(parent_ref, name, FunctionRef(fullname, params, block, self))
+            setattr(parent_ref, name, ref_class(fullname, params, block, self))
         else:
             fullname = name
-            self.functions[fullname] = (params, block)
-            self.global_env[fullname] = FunctionRef(fullname, params, block, self)
+            self.global_env[fullname] = ref_class(fullname, params, block, self)
+
+    def async_func_def(self, tree):
+        """Define an `async def` coroutine function."""
+        self.func_def(tree, ref_class=AsyncFunctionRef, body='async_block')
+
+    def decorated(self, tree):
+        """Define a function, then replace it with the result of its
+        decorators, applied bottom-up: `@memo def f...` binds f = memo(f)."""
+        *decorators, definition = tree.children
+        self.visit(definition)
+        name = str(definition.children[0])
+        if self.call_stack:
+            holder = self.global_env[self.call_stack[-1]]
+            fn = getattr(holder, name)
+        else:
+            fn = self.global_env[name]
+
+        for dec in reversed(decorators):
+            target = dec.children[0]
+            wrap   = self.dotted_name_expr(target) if isinstance(target, Node) else self._lookup(str(target))
+            if wrap is _MISSING:
+                raise NameError(f"{self.filename}:{dec.meta.line}:{dec.meta.column}: Decorator '{target}' is not defined.")
+            if dec.data == 'decorator_call':
+                arg_vals, kwargs = self._eval_args(dec.children[1])
+                wrap = wrap(*arg_vals, **kwargs)
+            fn = wrap(fn)
+
+        if self.call_stack:
+            setattr(holder, name, fn)
+        else:
+            self.global_env[name] = fn
 
     def func_call(self, tree):
         """Evaluate a function call."""
-        node = tree.children[0]
-        if isinstance(node, Tree) and node.data in ("dotted_name", "dotted_name_expr"):
-            parts = [str(tok) for tok in node.children]
-        
-            if len(parts) == 2:  
-                obj_name, method_name = parts
-                if obj_name in self.env:
-                    obj = self.env[obj_name]
-                    if hasattr(obj, method_name):
-                        method = getattr(obj, method_name)
-                        if callable(method):
-                            arg_trees = (
-                                tree.children[1].children
-                                if len(tree.children) > 1
-                                and isinstance(tree.children[1], Tree)
-                                and tree.children[1].data == 'args'
-                                else []
-                            )
-                            arg_vals = [self.visit(a) for a in arg_trees]
-                            return method(*arg_vals)
-                elif obj_name in self.global_env:
-                    obj = self.global_env[obj_name]
-                    if hasattr(obj, method_name):
-                        method = getattr(obj, method_name)
-                        if callable(method):
-                            arg_trees = (
-                                tree.children[1].children
-                                if len(tree.children) > 1
-                                and isinstance(tree.children[1], Tree)
-                                and tree.children[1].data == 'args'
-                                else []
-                            )
-                            arg_vals = [self.visit(a) for a in arg_trees]
-                            return method(*arg_vals)
-        
-            name = ".".join(parts)
-            callee = self.env.get(name, self.global_env.get(name, None))
-        else:
-            if isinstance(node, Tree) and node.data not in ("dotted_name", "dotted_name_expr"):
-                callee = self.visit(node)
-                name = None
-            else:
-                name = str(node)
-                callee = self.env.get(name, self.global_env.get(name, None))
-
-        if callable(callee):
-            arg_trees = (
-                tree.children[1].children
-                if len(tree.children) > 1
-                and isinstance(tree.children[1], Tree)
-                and tree.children[1].data == 'args'
-                else []
-            )
-            arg_vals = [self.visit(a) for a in arg_trees]
-
-            if isinstance(callee, FunctionRef):
-                self.call_stack.append(callee.name)
-                try:
-                    return callee(*arg_vals)
-                finally:
-                    self.call_stack.pop()
-
-            return callee(*arg_vals)
-
-        if name and name.startswith("python."):
-            parts = name.split(".")
-            obj = self.global_env.get(parts[0])
-            for attr in parts[1:]:
-                obj = getattr(obj, attr)
-            arg_trees = (
-                tree.children[1].children
-                if len(tree.children) > 1
-                and isinstance(tree.children[1], Tree)
-                and tree.children[1].data == 'args'
-                else []
-            )
-            arg_vals = [self.visit(a) for a in arg_trees]
-            return obj(*arg_vals)
+        callee, arg_vals, kwargs = self._call_target(tree)
+        return self._invoke(callee, arg_vals, kwargs)
 
-        if name in self.builtins:
-            arg_trees = (
-                tree.children[1].children
-                if len(tree.children) > 1
-                and isinstance(tree.children[1], Tree)
-                and tree.children[1].data == 'args'
-                else []
-            )
-            arg_vals = [self.visit(a) for a in arg_trees]
-            return self.builtins[name](*arg_vals)
-
-        if len(tree.children) > 1 and isinstance(tree.children[1], Tree) and tree.children[1].data == 'args':
-            arg_trees = tree.children[1].children
+    def _invoke(self, callee, arg_vals, kwargs):
+        if isinstance(callee, (FunctionRef, MemoizedFunction)):
+            self.call_stack.append(callee.name)
+            try:
+                return callee.call(arg_vals, kwargs)
+            finally:
+                self.call_stack.pop()
+        return callee(*arg_vals, **kwargs)
+
+    def _call_target(self, tree):
+        """Evaluate the callee and arguments of a call node."""
+        node = tree.children[0]
+        if isinstance(node, Node) and node.data in ("dotted_name", "dotted_name_expr"):
+            callee = self.dotted_name_expr(node)
+        elif isinstance(node, Node):
+            callee = self.visit(node)
         else:
-            arg_trees = []
+            callee = self._lookup(str(node))
 
-        if name not in self.functions:
+        if not callable(callee):
             meta = getattr(tree, "meta", None)
             loc = f"{self.filename}:{meta.line}:{meta.column}" if meta else self.filename
-            raise NameError(f"{loc}: Function '{name}' is not defined.")
+            if callee is _MISSING:
+                raise NameError(f"{loc}: Function '{node}' is not defined.")
+            raise TypeError(f"{loc}: '{type(callee).__name__}' object is not callable")
+
+        args = tree.children[1] if len(tree.children) > 1 else None
+        arg_vals, kwargs = self._eval_args(args)
+        return callee, arg_vals, kwargs
+
+    def _eval_args(self, args):
+        """Evaluate an `args` node into positional values and keywords."""
+        arg_vals, kwargs = [], {}
+        if isinstance(args, Node) and args.data == 'args':
+            for a in args.children:
+                if a.data == 'kwarg':
+                    kwargs[str(a.children[0])] = self.visit(a.children[1])
+                else:
+                    arg_vals.append(self.visit(a))
+        return arg_vals, kwargs
 
-        params, block = self.functions[name]
-        if len(params) != len(arg_trees):
-            meta = getattr(tree, "meta", None)
-            loc = f"{self.filename}:{meta.line}:{meta.column}" if meta else self.filename
-            raise TypeError(f"{loc}: {name}() expects {len(params)} args, got {len(arg_trees)}")
+    def _lookup(self, name):
+        """Resolve a bare name: locals, globals, imported modules, then builtins."""
+        if name in self.env:
+            return self.env[name]
+        if name in self.global_env:
+            return self.global_env[name]
+        return self._lookup_imported(name)
 
-        arg_vals = [self.visit(a) for a in arg_trees]
-        old_env = self.env
-        self.env = { pname: pval for pname, pval in zip(params, arg_vals) }
+    def _lookup_imported(self, name):
+        """Find `name` in the globals of imported modules (first import wins),
+        falling back to the builtins.
 
-        result = None
-        for stmt in block.children:
-            try:
-                self.visit(stmt)
-            except ReturnException as ret:
-                result = ret.value
-                break
+        Modules used to be merged into the importer's globals, so their names
+        shadowed builtins; they still do. A bare name is looked up through the
+        import chain and the namespace it came from, builtins included, is
+        remembered until the next import.
+        """
+        env = self._import_cache.get(name)
+        if env is not None and name in env:
+            return env[name]
+        for module in self.imports:
+            env = module.interpreter._owning_env(name, set())
+            if env is not None:
+                self._import_cache[name] = env
+                return env[name]
+        if name in self.builtins:
+            self._import_cache[name] = self.builtins
+            return self.builtins[name]
+        return _MISSING
 
-        self.env = old_env
-        return result
+    def _owning_env(self, name, seen):
+        if name in self.global_env:
+            return self.global_env
+        seen.add(id(self))
+        for module in self.imports:
+            if id(module.interpreter) not in seen:
+                env = module.interpreter._owning_env(name, seen)
+                if env is not None:
+                    return env
+        return None
 
+    # ——— arithmetic and comparisons ———
+    # These handlers run a node's first evaluation. In adaptive mode the node
+    # then rewrites itself to a handler specialized for the operand types it
+    # saw (see "quickening" below the class).
 
     @_wrap_error_with_loc
-    def add(self, tree): return self.visit(tree.children[0]) + self.visit(tree.children[1])
+    def add(self, tree): return self._observe(tree, "add")
 
     @_wrap_error_with_loc
-    def sub(self, tree): return self.visit(tree.children[0]) - self.visit(tree.children[1])
-    
+    def sub(self, tree): return self._observe(tree, "sub")
+
     @_wrap_error_with_loc
-    def mul(self, tree): return self.visit(tree.children[0]) * self.visit(tree.children[1])
-    
+    def mul(self, tree): return self._observe(tree, "mul")
+
     @_wrap_error_with_loc
-    def div(self, tree): return self.visit(tree.children[0]) / self.visit(tree.children[1])
-    
+    def div(self, tree): return self._observe(tree, "div")
+
     @_wrap_error_with_loc
-    def gt(self, tree): return self.visit(tree.children[0]) > self.visit(tree.children[1])
-    
+    def gt(self, tree): return self._observe(tree, "gt")
+
     @_wrap_error_with_loc
-    def lt(self, tree): return self.visit(tree.children[0]) < self.visit(tree.children[1])
-    
+    def lt(self, tree): return self._observe(tree, "lt")
+
     @_wrap_error_with_loc
-    def eq(self, tree): return self.visit(tree.children[0]) == self.visit(tree.children[1])
-    
+    def eq(self, tree): return self._observe(tree, "eq")
+
     @_wrap_error_with_loc
-    def ne(self, tree): return self.visit(tree.children[0]) != self.visit(tree.children[1])
-    
+    def ne(self, tree): return self._observe(tree, "ne")
+
     @_wrap_error_with_loc
-    def mod(self, tree): return self.visit(tree.children[0]) % self.visit(tree.children[1])
-    
+    def mod(self, tree): return self._observe(tree, "mod")
+
     @_wrap_error_with_loc
     def pow(self, tree): return self.visit(tree.children[0]) ** self.visit(tree.children[1])
 
     @_wrap_error_with_loc
-    def le(self, tree): return self.visit(tree.children[0]) <= self.visit(tree.children[1])
+    def bit_or(self, tree): return self.visit(tree.children[0]) | self.visit(tree.children[1])
 
     @_wrap_error_with_loc
-    def ge(self, tree): return self.visit(tree.children[0]) >= self.visit(tree.children[1])
+    def bit_and(self, tree): return self.visit(tree.children[0]) & self.visit(tree.children[1])
+
+    @_wrap_error_with_loc
+    def le(self, tree): return self._observe(tree, "le")
+
+    @_wrap_error_with_loc
+    def ge(self, tree): return self._observe(tree, "ge")
+
+    def _observe(self, tree, name):
+        a = self.visit(tree.children[0])
+        b = self.visit(tree.children[1])
+        if self.adaptive and tree.data == name:   # not already rewritten by a nested call
+            kind = _QUICK_KINDS.get(type(a)) if type(b) is type(a) else None
+            tree.specialize(f"{name}_{kind or 'any'}")
+            quicken_stats[tree.data] += 1
+        return _QUICK_OPS[name](a, b)
+
+    def _deopt(self, tree, op, a, b):
+        """A specialized node saw other operands: make it generic for good."""
+        tree.specialize(tree.data.rpartition("_")[0] + "_any")
+        quicken_stats["deopt"] += 1
+        try:
+            return op(a, b)
+        except Exception as e:
+            _raise_with_loc(self.filename, tree, e)
 
     @_wrap_error_with_loc
     def number(self, tree):
         """Parse ints or floats automatically."""
         tok  = tree.children[0]
         text = str(tok)
-        return float(text) if "." in text else int(text)
+        value = float(text) if "." in text else int(text)
+        if self.adaptive:
+            tree.specialize('_const', (value,))
+            quicken_stats["const"] += 1
+        return value
     
     @_wrap_error_with_loc
-    def string( self, tree): return ast.literal_eval(tree.children[0])
+    def string(self, tree):
+        value = ast.literal_eval(tree.children[0])
+        if self.adaptive:
+            tree.specialize('_const', (value,))
+            quicken_stats["const"] += 1
+        return value
+
+    def fstring(self, tree):
+        return "".join([c if isinstance(c, str) else self.visit(c) for c in tree.children])
+
+    @_wrap_error_with_loc
+    def fstring_field(self, tree):
+        expr, spec = tree.children
+        value = self.visit(expr)
+        if spec:
+            return format(value, spec)
+        return value if type(value) is str else str(value)
 
     @_wrap_error_with_loc
     def bytes_literal(self, tree):  return ast.literal_eval(str(tree.children[0]))
@@ -515,8 +1267,10 @@ class MscriptInterpreter(LarkInterpreter):
             return self.env[name]
         if name in self.global_env:
             return self.global_env[name]
-        line, col = tok.line, tok.column
-        raise NameError(f"{self.filename}:{line}:{col}: Variable '{name}' is not defined.")
+        val = self._lookup(name)
+        if val is not _MISSING:
+            return val
+        raise NameError(f"{self.filename}:{tree.line}:{tree.column}: Variable '{name}' is not defined.")
 
     def list(self, tree):
         return [self.visit(c) for c in tree.children]
@@ -530,6 +1284,57 @@ class MscriptInterpreter(LarkInterpreter):
     def dict(self, tree):
         return dict(self.visit(c) for c in tree.children)
 
+    @_wrap_error_with_loc
+    def set(self, tree):
+        return {self.visit(c) for c in tree.children}
+
+    # ——— comprehensions ———
+    # The loop variable is bound in the current scope only while the loop
+    # runs; any previous value is restored afterwards.
+
+    def list_comp(self, tree):
+        """[expr for x in xs if cond]"""
+        expr, name_tok, iterable, cond = tree.children
+        env, name, visit = self.env, str(name_tok), self.visit
+        saved = env.get(name, _MISSING)
+        out   = []
+        append = out.append
+        try:
+            if cond is None:
+                for v in visit(iterable):
+                    env[name] = v
+                    append(visit(expr))
+            else:
+                for v in visit(iterable):
+                    env[name] = v
+                    if visit(cond):
+                        append(visit(expr))
+        finally:
+            self._unbind(env, name, saved)
+        return out
+
+    def dict_comp(self, tree):
+        """{key: value for x in xs if cond}"""
+        key, value, name_tok, iterable, cond = tree.children
+        env, name, visit = self.env, str(name_tok), self.visit
+        saved = env.get(name, _MISSING)
+        out   = {}
+        try:
+            for v in visit(iterable):
+                env[name] = v
+                if cond is None or visit(cond):
+                    out[visit(key)] = visit(value)
+        finally:
+            self._unbind(env, name, saved)
+        return out
+
+    @staticmethod
+    def _unbind(env, name, saved):
+        if saved is _MISSING:
+            env.pop(name, None)
+        else:
+            env[name] = saved
+
     def get_item(self, tree):
         """Get an item from a list or dict."""
         container = self.visit(tree.children[0])
@@ -541,6 +1346,12 @@ class MscriptInterpreter(LarkInterpreter):
             loc = f"{self.filename}:{meta.line}:{meta.column}" if meta else self.filename
             raise KeyError(f"{loc}: key '{e.args[0]}' not found")
     
+    @_wrap_error_with_loc
+    def get_slice(self, tree):
+        """a[start:stop:step]; bytes-like values give zero-copy memoryviews."""
+        container = self.visit(tree.children[0])
+        return slice_value(container, slice(*[None if c is None else self.visit(c) for c in tree.children[1:]]))
+
     def get_attr(self, tree):
         """Get an attribute from an object."""
         try:
@@ -580,14 +1391,211 @@ class MscriptInterpreter(LarkInterpreter):
     
     def in_op(self, tree):
         left, right = tree.children
+        if self.adaptive and right.data == 'list' and right.children \
+                and all(c.data in _LITERALS for c in right.children):
+            # a constant lookup table: hash it once instead of scanning it every time
+            values = tuple(self.visit(c) for c in right.children)
+            try:
+                members = frozenset(values)
+            except TypeError:   # an unhashable value spliced in by the async executor
+                members = None
+            if members is not None:
+                tree.specialize('in_const', (left, members, values))
+                quicken_stats["in_const"] += 1
+                return self.in_const(tree)
         return self.visit(left) in self.visit(right)
-    
+
+    def in_const(self, tree):
+        """`x in [literals]` after in_op has rewritten it."""
+        left, members, values = tree.children
+        value = self.visit(left)
+        try:
+            return value in members
+        except TypeError:   # unhashable, so equal to none of them; scan as a list would
+            return value in values
+
+    def await_expr(self, tree):
+        meta = getattr(tree, "meta", None)
+        loc  = f"{self.filename}:{meta.line}:{meta.column}" if meta else self.filename
+        raise SyntaxError(f"{loc}: 'await' outside async function")
+
+    def _const(self, tree):
+        """An already-evaluated value spliced into a tree by the async executor."""
+        return tree.children[0]
+
+    # ——— async/await ——————————————————————————————————————————————
+    # A coroutine body is walked statement by statement. Statements without an
+    # `await` go through the normal visitor; the others have their awaited
+    # sub-expressions evaluated (left to right) and spliced in as `_const`
+    # nodes first. `self.env` is shared, so it is re-bound after every resume.
+
+    def _await_sites(self, block):
+        """Ids of the nodes of `block` that contain an `await` (nested defs excluded)."""
+        cached = self._await_cache.get(id(block))
+        if cached is not None:
+            return cached[1]
+
+        sites = set()
+        def scan(node):
+            found = node.data == 'await_expr'
+            for child in node.children:
+                if (isinstance(child, Node)
+                        and child.data not in ('func_def', 'async_func_def')
+                        and scan(child)):
+                    found = True
+            if found:
+                sites.add(id(node))
+            return found
+
+        scan(block)
+        self._await_cache[id(block)] = (block, sites)
+        return sites
+
+    async def _run_coroutine(self, block, env):
+        """Run an `async def` body inside the event loop."""
+        outer    = self.env
+        self.env = env
+        sites    = self._await_sites(block)
+        try:
+            await self._exec_async(block.children, sites, env)
+        except ReturnException as ret:
+            return ret.value
+        finally:
+            self.env = outer
+        return None
+
+    async def _await(self, awaitable, env):
+        try:
+            return await awaitable
+        finally:
+            self.env = env
+
+    async def _resolve_awaits(self, node, sites, env):
+        """Return `node` with every awaited sub-expression replaced by its result."""
+        if not isinstance(node, Node) or id(node) not in sites:
+            return node
+
+        if node.data == 'await_expr':
+            operand = await self._resolve_awaits(node.children[0], sites, env)
+            value   = await self._await(self.visit(operand), env)
+            return node.const(value)
+
+        if node.data in ('and_op', 'or_op'):
+            left = await self._eval_async(node.children[0], sites, env)
+            if (node.data == 'and_op' and not left) or (node.data == 'or_op' and left):
+                return node.const(left)
+            return await self._resolve_awaits(node.children[1], sites, env)
+
+        if node.data in ('list_comp', 'dict_comp'):
+            # only the iterable is evaluated once; the body runs per item
+            if any(id(c) in sites for i, c in enumerate(node.children) if i != len(node.children) - 2):
+                raise SyntaxError("'await' is only allowed in the iterable of a comprehension")
+            iterable = node.children[-2]
+            value    = await self._eval_async(iterable, sites, env)
+            return node.copy((*node.children[:-2], iterable.const(value), node.children[-1]))
+
+        children = []
+        for child in node.children:
+            if not isinstance(child, Node) or child.data == 'dotted_name':
+                children.append(child)
+            elif child.data == 'args':
+                # a plain loop: `await` inside a generator expression would
+                # make it an async generator
+                args = []
+                for a in child.children:
+                    if a.data == 'kwarg':
+                        value = await self._eval_async(a.children[1], sites, env)
+                        args.append(a.copy((a.children[0], a.children[1].const(value))))
+                    else:
+                        args.append(a.const(await self._eval_async(a, sites, env)))
+                children.append(child.copy(tuple(args)))
+            else:
+                value = await self._eval_async(child, sites, env)
+                children.append(child.const(value))
+        return node.copy(tuple(children))
+
+    async def _eval_async(self, node, sites, env):
+        return self.visit(await self._resolve_awaits(node, sites, env))
+
+    async def _exec_async(self, stmts, sites, env):
+        for stmt in stmts:
+            if id(stmt) not in sites:
+                self.visit(stmt)
+            elif stmt.data == 'if_stmt':
+                await self._if_async(stmt, sites, env)
+            elif stmt.data == 'while_stmt':
+                await self._while_async(stmt, sites, env)
+            elif stmt.data == 'for_stmt':
+                await self._for_async(stmt, sites, env)
+            elif stmt.data == 'try_stmt':
+                await self._try_async(stmt, sites, env)
+            else:
+                await self._eval_async(stmt, sites, env)
+
+    async def _if_async(self, tree, sites, env):
+        children = tree.children
+        idx = 0
+        while idx < len(children):
+            node = children[idx]
+            if isinstance(node, Node) and node.data == 'block':
+                await self._exec_async(node.children, sites, env)
+                return
+            if await self._eval_async(node, sites, env):
+                await self._exec_async(children[idx + 1].children, sites, env)
+                return
+            idx += 2
+
+    async def _while_async(self, tree, sites, env):
+        cond_tree, block = tree.children
+        while await self._eval_async(cond_tree, sites, env):
+            try:
+                await self._exec_async(block.children, sites, env)
+            except ContinueException:
+                continue
+            except BreakException:
+                break
+
+    async def _for_async(self, tree, sites, env):
+        var_tok, iterable, block = tree.children
+        for v in await self._eval_async(iterable, sites, env):
+            self.env[str(var_tok)] = v
+            try:
+                await self._exec_async(block.children, sites, env)
+            except ContinueException:
+                continue
+            except BreakException:
+                break
+
+    async def _try_async(self, tree, sites, env):
+        try_block, catch_clause = tree.children
+        cc_children = catch_clause.children
+        var_name    = str(cc_children[0]) if len(cc_children) == 2 else None
+        catch_block = cc_children[-1]
+
+        try:
+            await self._exec_async(try_block.children, sites, env)
+        except (ReturnException, BreakException, ContinueException):
+            raise
+        except Exception as exc:
+            if var_name:
+                had_old = var_name in self.env
+                old_val = self.env.get(var_name)
+                self.env[var_name] = exc
+
+            await self._exec_async(catch_block.children, sites, env)
+
+            if var_name:
+                if had_old:
+                    self.env[var_name] = old_val
+                else:
+                    del self.env[var_name]
+
     
     def import_stmt(self, tree):
         """Import a module or a function from a module."""
         node = tree.children[0]
 
-        if isinstance(node, Token) and node.type == 'ESCAPED_STRING':
+        if isinstance(node, str) and node[:1] == '"':
             raw_path = ast.literal_eval(str(node))
             module_name = os.path.splitext(os.path.basename(raw_path))[0]
 
@@ -600,89 +1608,107 @@ class MscriptInterpreter(LarkInterpreter):
                 module_file = raw_path if raw_path.endswith('.mscript') else raw_path + '.mscript'
 
         else:
-            if isinstance(node, Tree) and node.data == 'dotted_name':
-                parts       = [str(tok) for tok in node.children]
-                module_name = ".".join(parts)
-                module_file = os.path.join(*parts) + '.mscript'
+            if isinstance(node, Node) and node.data == 'dotted_name':
+                parts = [str(tok) for tok in node.children]
             else:
-                module_name = str(node)
-                module_file = f"{module_name}.mscript"
-
-        if module_name == "python" and not (isinstance(node, Token) and node.type == 'ESCAPED_STRING'):
-            import importlib, builtins
-            class PythonModuleProxy:
-                def __getattr__(self, attr):
-                    if hasattr(builtins, attr):
-                        return getattr(builtins, attr)
-                    return importlib.import_module(attr)
-            self.global_env["python"] = PythonModuleProxy()
-            return
+                parts = [str(node)]
+            module_name = ".".join(parts)
+
+            if module_name == "python":
+                self.global_env["python"] = PythonModuleProxy()
+                return
+            module_file = find_module(parts) or os.path.join(*parts) + '.mscript'
+
+        module = _modules.get(os.path.abspath(module_file))
+        if module is None:
+            module = self._load_module(module_name, module_file, tree)
+
+        self._bind_module(module_name, module)
+        if module not in self.imports:
+            self.imports.append(module)
+        self._import_cache.clear()
 
-        from lark import Lark, UnexpectedInput
-        parser = Lark(language_definition,
-                      parser='lalr',
-                      propagate_positions=True)
+    def _load_module(self, module_name, module_file, tree):
+        """Parse and run a module once per process; later imports reuse it."""
         try:
-            text = open(module_file, 'r').read()
+            tree2 = parse_module(module_file)
         except FileNotFoundError:
             meta = getattr(tree, "meta", None)
             loc  = f"{self.filename}:{meta.line}:{meta.column}" if meta else self.filename
             raise SyntaxError(f"{loc}: Module '{module_file}' not found (could not open '{module_file}')")
-
-        try:
-            tree2 = parser.parse(text)
         except UnexpectedInput as e:
             raise SyntaxError(f"{module_file}:{e.line}:{e.column}: Syntax error in imported module")
+        except SyntaxError as e:
+            raise SyntaxError(f"{module_file}:{e}")
 
-        sub = MscriptInterpreter(filename=module_file)
+        key    = os.path.abspath(module_file)
+        sub    = MscriptInterpreter(filename=module_file)
+        module = MscriptModule(module_name, module_file, sub)
+        _modules[key] = module
         try:
             sub.visit(tree2)
         except Exception as e:
+            del _modules[key]
             meta = getattr(tree, "meta", None)
             loc  = f"{self.filename}:{meta.line}:{meta.column}" if meta else self.filename
             raise type(e)(f"{loc}: error importing '{module_name}' ({module_file}): {e}")
+        return module
+
+    def _bind_module(self, module_name, module):
+        """Bind `a.b.c` as nested namespaces so dotted access reaches the module."""
+        parts = module_name.split(".")
+        env   = self.global_env
+        for part in parts[:-1]:
+            ns = env.get(part)
+            if not isinstance(ns, types.SimpleNamespace):
+                ns = env[part] = _PackageNamespace()
+            env = ns.__dict__
+        env[parts[-1]] = module
 
-        self.global_env[module_name] = sub.global_env
-    
-        for fname, (params, block) in sub.functions.items():
-            self.functions[f"{module_name}.{fname}"] = (params, block)
-    
-        for key, value in sub.global_env.items():
-            if key not in self.global_env:  
-                self.global_env[key] = value
-            
-        for fname, func_data in sub.functions.items():
-            if fname not in self.functions:
-                self.functions[fname] = func_data
-    
     def dotted_name_expr(self, tree):
         """Resolve a dotted name expression."""
-        if (len(tree.children) == 1
-            and isinstance(tree.children[0], Tree)
-            and tree.children[0].data == 'dotted_name'):
-            tree = tree.children[0]
-
-        if (len(tree.children) == 1
-            and isinstance(tree.children[0], Tree)
-            and tree.children[0].data == 'dotted_name'):
-            tree = tree.children[0]
+        site = self._dotted_sites.get(id(tree))
+        if site is None:
+            node = tree
+            if (len(tree.children) == 1
+                and isinstance(tree.children[0], Node)
+                and tree.children[0].data == 'dotted_name'):
+                tree = tree.children[0]
+
+            if (len(tree.children) == 1
+                and isinstance(tree.children[0], Node)
+                and tree.children[0].data == 'dotted_name'):
+                tree = tree.children[0]
         try:
-            parts = [str(tok) for tok in tree.children]
-
-            if parts[0] in self.env:
-                obj = self.env[parts[0]]
-            elif parts[0] in self.global_env:
-                obj = self.global_env[parts[0]]
+            if site is not None:
+                node, parts, root, prefix, depth = site
             else:
-                meta = getattr(tree, "meta", None)
-                loc = f"{self.filename}:{meta.line}:{meta.column}" if meta else self.filename
-                raise NameError(f"{loc}: Name '{parts[0]}' is not defined")
+                parts, root = [str(tok) for tok in tree.children], None
 
-            for attr in parts[1:]:
+            if root is not None and self._lookup(parts[0]) is root:
+                obj, first = prefix, depth + 1
+            else:
+                obj, first = self._lookup(parts[0]), 1
+                if obj is _MISSING:
+                    meta = getattr(tree, "meta", None)
+                    loc = f"{self.filename}:{meta.line}:{meta.column}" if meta else self.filename
+                    raise NameError(f"{loc}: Name '{parts[0]}' is not defined")
+                # Remember the longest all-module prefix of the path
+                # (python.sdl2, pkg.mod, ...) for this site; the rest of the
+                # path is always looked up live.
+                root, prefix, depth = (obj if isinstance(obj, _MODULE_TYPES) else None), obj, 0
+
+            for i in range(first, len(parts)):
+                attr = parts[i]
                 if isinstance(obj, dict) and attr in obj:
                     obj = obj[attr]
                 else:
                     obj = getattr(obj, attr)
+                if first == 1 and root is not None and depth == i - 1 and isinstance(obj, _MODULE_TYPES):
+                    prefix, depth = obj, i
+
+            if first == 1:
+                self._dotted_sites[id(node)] = (node, parts, root, prefix, depth)
             return obj
         except Exception as e:
             meta = getattr(tree, "meta", None)
@@ -696,59 +1722,414 @@ class MscriptInterpreter(LarkInterpreter):
 
 
 
+# ——— quickening ———
+# A `+`, `-`, `*`, `/`, `%` or comparison node that first sees two ints (or
+# two floats) becomes e.g. `add_int`: both operands are checked with a
+# `type(x) is int` guard and the operator is applied without the error
+# wrapper. A guard failure deoptimizes the node to `add_any`, the plain
+# generic handler, as does a first sighting of any other operand types.
+# Number and string literals become `_const` nodes holding their value, and
+# `x in [...]` over a list of literals becomes `in_const`, a frozenset lookup.
+
+_QUICK_OPS = {
+    "add": operator.add, "sub": operator.sub, "mul": operator.mul,
+    "div": operator.truediv, "mod": operator.mod,
+    "lt": operator.lt, "gt": operator.gt, "le": operator.le,
+    "ge": operator.ge, "eq": operator.eq, "ne": operator.ne,
+}
+_QUICK_KINDS = {int: "int", float: "float"}
+# nodes whose value never changes, so `x in [...]` of them can be hashed once
+_LITERALS = frozenset(('number', 'string', '_const', 'true', 'false', 'none'))
+
+# site kind ("add_int", "lt_any", "const", "deopt") -> count, for all interpreters
+quicken_stats = collections.Counter()
+
+def _specialized(op, kind):
+    # errors get their location as in _wrap_error_with_loc, inlined: a try
+    # block costs nothing until something is raised, an extra call would
+    def handler(self, tree):
+        left, right = tree.children
+        try:
+            a = getattr(self, left.data)(left)     # self.visit(), inlined
+            b = getattr(self, right.data)(right)
+            if type(a) is kind and type(b) is kind:
+                return op(a, b)
+        except RecursionLimitError:
+            raise
+        except Exception as e:
+            _raise_with_loc(self.filename, tree, e)
+        return self._deopt(tree, op, a, b)
+    return handler
+
+def _generic(op):
+    @_wrap_error_with_loc
+    def handler(self, tree):
+        return op(self.visit(tree.children[0]), self.visit(tree.children[1]))
+    return handler
+
+for _name, _op in _QUICK_OPS.items():
+    setattr(MscriptInterpreter, f"{_name}_any", _generic(_op))
+    for _type, _kind in _QUICK_KINDS.items():
+        setattr(MscriptInterpreter, f"{_name}_{_kind}", _specialized(_op, _type))
+
+def format_quicken_stats():
+    """One line summarizing what quickening did, for --quicken-stats."""
+    stats = quicken_stats
+    fast  = sorted(((k, n) for k, n in stats.items() if k.endswith(("_int", "_float"))),
+                   key=lambda kv: -kv[1])
+    generic = sum(n for k, n in stats.items() if k.endswith("_any"))
+    detail  = ", ".join(f"{k} {n}" for k, n in fast)
+    return (f"quickening: {sum(n for _, n in fast)} sites specialized"
+            f"{f' ({detail})' if detail else ''}, {generic} generic, "
+            f"{stats['deopt']} deoptimized, {stats['const']} literals folded, "
+            f"{stats['in_const']} constant lists hashed")
+
+# ——— recursion ———
+
+# Python frames a single Mscript call may need (nested blocks, operators...).
+_FRAMES_PER_CALL = 30
+
+def set_max_recursion(limit):
+    """Let Mscript calls nest `limit` deep (tail calls do not count).
+
+    Python's recursion limit is raised to fit. Tail calls are trampolined;
+    any other Mscript-to-Mscript call is a plain Python-to-Python call,
+    which CPython 3.11+ runs without growing the C stack, so deep
+    recursion costs memory, not stack. Recursion that passes through C on
+    every level (a function calling itself through `map`, `sorted(key=)`
+    or a Python callback) is bounded by CPython's fixed C recursion limit
+    instead, a few hundred levels, and stops there with a RecursionError.
+    """
+    MscriptInterpreter.max_recursion = limit
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), limit * _FRAMES_PER_CALL + 1000))
+
+# ——— REPL ———
+
+def _incomplete(error):
+    """True when a parse failed only because the input ended too early."""
+    return isinstance(error, UnexpectedToken) and error.token.type == '$END'
+
+def _format_seconds(secs):
+    for unit, scale in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if secs * scale >= 1:
+            return f"{secs * scale:.3g} {unit}"
+    return f"{secs * 1e9:.3g} ns"
+
+def _time_repeated(run):
+    """Best time per run of `run()`, looping until each of 3 rounds takes ~0.2s."""
+    loops = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - t
+        if elapsed >= 0.2 or loops >= 10 ** 7:
+            break
+        loops *= 10
+    best = elapsed
+    for _ in range(2):
+        t = time.perf_counter()
+        for _ in range(loops):
+            run()
+        best = min(best, time.perf_counter() - t)
+    return best / loops, loops
+
+def repl(interp=None):
+    """Interactive session. The parser and imported modules stay loaded
+    for the whole session; a block can span lines until it parses.
+
+    `%time stmt` reports how long one evaluation took, `%timeit stmt`
+    repeats it and reports the best time per run.
+    """
+    parser = get_parser()
+    parser.parse("x = 1")   # warm the lexer before the first prompt
+    interp = interp or MscriptInterpreter(filename="<repl>")
+    try:
+        import readline
+        history = os.path.expanduser("~/.mscript_history")
+        try:
+            readline.read_history_file(history)
+        except OSError:
+            pass
+        import atexit
+        atexit.register(readline.write_history_file, history)
+    except ImportError:
+        pass
+
+    print(f"Mscript REPL {__VERSION__} by {__AUTHOR__} (type Ctrl-D to exit)")
+    lines = []
+    while True:
+        try:
+            line = input("... " if lines else ">>> ")
+        except EOFError:
+            print()
+            break
+        except KeyboardInterrupt:
+            print()
+            lines = []
+            continue
+        if not lines and not line.strip():
+            continue
+        lines.append(line)
+
+        source = "\n".join(lines).strip()
+        magic  = None
+        if source.startswith(("%timeit ", "%time ")):
+            magic, source = source.split(None, 1)
+        try:
+            tree = compact(parser.parse(source))
+        except UnexpectedInput as e:
+            if _incomplete(e) and line.strip():
+                continue   # keep reading; an empty line gives up
+            print(f"<repl>:{e.line}:{e.column}: Syntax error: {e}")
+            lines = []
+            continue
+        except SyntaxError as e:
+            print(f"<repl>:{e}")
+            lines = []
+            continue
+        lines = []
+
+        try:
+            if magic == "%timeit":
+                per_run, loops = _time_repeated(lambda: interp.visit(tree))
+                print(f"{_format_seconds(per_run)} per run (best of 3, {loops} runs each)")
+                continue
+            t = time.perf_counter()
+            result = interp.visit(tree)
+            elapsed = time.perf_counter() - t
+            if result is not None and tree.data != 'print_stmt':
+                print(result)
+            if magic == "%time":
+                print(f"time: {_format_seconds(elapsed)}")
+        except KeyboardInterrupt:
+            print("KeyboardInterrupt")
+        except Exception as e:
+            print(e)
+
+_IMPORT_DONE = time.perf_counter()
+
 def main():
         argv = sys.argv
+        startup_time = "--startup-time" in argv
+        if startup_time:
+            argv.remove("--startup-time")
+            timings = [("import", _IMPORT_DONE - _IMPORT_STARTED)]
+        show_quicken = "--quicken-stats" in argv
+        if show_quicken:
+            argv.remove("--quicken-stats")
+        if "--no-quicken" in argv:
+            argv.remove("--no-quicken")
+            MscriptInterpreter.adaptive = False
+        memprofile = "--memprofile" in argv
+        if memprofile:
+            argv.remove("--memprofile")
+
+        max_recursion = MscriptInterpreter.max_recursion
+        if "--max-recursion" in argv:
+            i = argv.index("--max-recursion")
+            try:
+                max_recursion = int(argv[i + 1])
+            except (IndexError, ValueError):
+                print("--max-recursion expects a number")
+                sys.exit(2)
+            del argv[i:i + 2]
+        set_max_recursion(max_recursion)
+
+        sample_path, sample_rate = None, 100
+        for flag in ("--sample", "--sample-rate"):
+            if flag in argv:
+                i = argv.index(flag)
+                try:
+                    value = argv[i + 1] if flag == "--sample" else int(argv[i + 1])
+                except (IndexError, ValueError):
+                    print(f"{flag} expects {'a file name' if flag == '--sample' else 'a number'}")
+                    sys.exit(2)
+                if flag == "--sample":
+                    sample_path = value
+                else:
+                    sample_rate = value
+                del argv[i:i + 2]
+        snapshot_out = snapshot_in = None
+        for flag in ("--snapshot", "--from-snapshot"):
+            if flag in argv:
+                i = argv.index(flag)
+                if i + 1 >= len(argv):
+                    print(f"{flag} expects a snapshot file")
+                    sys.exit(2)
+                if flag == "--snapshot":
+                    snapshot_out = argv[i + 1]
+                else:
+                    snapshot_in = argv[i + 1]
+                del argv[i:i + 2]
+        sample_paused = "--sample-paused" in argv
+        if sample_paused:
+            argv.remove("--sample-paused")
+
         if len(argv) == 1:
-            parser = Lark(language_definition,
-                      parser='lalr',
-                      propagate_positions=True)
-            interp = MscriptInterpreter(filename="<repl>")
-            print(f"Mscript REPL {__VERSION__} by {__AUTHOR__} (type Ctrl-D to exit)")
+            repl()
+            sys.exit(0)
+
+        if argv[1] == "--emit-py":
+            import mscript_compiler
+            if len(argv) not in (3, 4):
+                print("usage: mscript --emit-py file.mscript [out.py]")
+                sys.exit(2)
             try:
-                while True:
-                    try:
-                        line = input(">>> ")
-                    except EOFError:
-                        print()  
-                        break
-                    if not line.strip():
-                        continue
-                    try:
-                        tree = parser.parse(line)
-                        result = interp.visit(tree)
-                        if result is not None:
-                            print(result)
-                    except Exception as e:
-                        print(e)
-            except KeyboardInterrupt:
-                print()  
+                written = mscript_compiler.emit(argv[2], argv[3] if len(argv) == 4 else None, max_recursion)
+            except (SyntaxError, OSError) as e:
+                print(e)
+                sys.exit(1)
+            for path in written:
+                print(f"wrote {path}")
+            sys.exit(0)
+
+        if argv[1] == "serve":
+            import mscript_serve
+            options = {"--host": "127.0.0.1", "--port": "8000", "--workers": None}
+            args, compiled = argv[2:], True
+            if "--interpreted" in args:
+                args.remove("--interpreted")
+                compiled = False
+            for flag in options:
+                if flag in args:
+                    i = args.index(flag)
+                    if i + 1 >= len(args):
+                        print(f"{flag} expects a value")
+                        sys.exit(2)
+                    options[flag] = args[i + 1]
+                    del args[i:i + 2]
+            if len(args) != 1:
+                print("usage: mscript serve app.mscript [--host H] [--port P] [--workers N] [--interpreted]")
+                sys.exit(2)
+            try:
+                mscript_serve.serve(args[0], options["--host"], int(options["--port"]),
+                                    int(options["--workers"]) if options["--workers"] else None,
+                                    compiled, max_recursion)
+            except (SyntaxError, OSError, ValueError) as e:
+                print(e)
+                sys.exit(1)
+            sys.exit(0)
+
+        if argv[1] in ("--batch", "--worker"):
+            import mscript_batch
+            mode, args = argv[1], argv[2:]
+            options = {"--jobs": "1", "--entry": "main"}
+            compiled = "--compiled" in args
+            if compiled:
+                args.remove("--compiled")
+            for flag in options:
+                if flag in args:
+                    i = args.index(flag)
+                    if i + 1 >= len(args):
+                        print(f"{flag} expects a value")
+                        sys.exit(2)
+                    options[flag] = args[i + 1]
+                    del args[i:i + 2]
+            if not args or (mode == "--worker" and len(args) != 1):
+                print(f"usage: mscript {mode} script.mscript{' inputs...' if mode == '--batch' else ''} "
+                      "[--jobs N] [--entry NAME] [--compiled]")
+                sys.exit(2)
+            try:
+                jobs = int(options["--jobs"])
+                if mode == "--batch":
+                    ok = mscript_batch.batch(args[0], args[1:], options["--entry"], jobs, compiled, max_recursion)
+                else:
+                    ok = True
+                    mscript_batch.worker(args[0], options["--entry"], jobs, compiled, max_recursion)
+            except Exception as e:   # a bad option, or an error while loading the script
+                print(e)
+                sys.exit(1)
+            sys.exit(0 if ok else 1)
+
+        if argv[1] == "--compiled":
+            import mscript_compiler
+            del argv[1]   # the program sees the same argv as when interpreted
+            try:
+                mscript_compiler.run(argv[1], max_recursion)
+            except SyntaxError as e:
+                print(e)
+                sys.exit(1)
+            except Exception as e:
+                print(mscript_compiler.format_error(e))
+                sys.exit(1)
             sys.exit(0)
 
         if len(argv) > 5:
             raise Exception(f"Too many arguments expected {len(argv)-2} got {len(argv) - 1}")
     
         if argv[1] == "--version":
+            import platform
             print(f"Mscript Interpreter version {__VERSION__} by {__AUTHOR__} ({__DATE__}) ({platform.system()})")
             sys.exit(0)
 
         if not argv[1].endswith(".mscript"):
             raise Exception(f"Mscript files must end in .mscript suffix and be the first argument. Got: {argv[1]}")
     
-        parser = Lark(language_definition,
-                  parser='lalr',
-                  propagate_positions=True)
+        t = time.perf_counter()
+        parser = get_parser()
+        if startup_time:
+            timings.append(("parser", time.perf_counter() - t))
         try:
+            t = time.perf_counter()
             text = open(argv[1]).read()
-            tree = parser.parse(text)
+            tree = compact(parser.parse(text))
+            if startup_time:
+                timings.append(("parse", time.perf_counter() - t))
         except UnexpectedInput as e:
             print(f"{argv[1]}:{e.line}:{e.column}: Syntax error: {e}")
             sys.exit(1)
+        except SyntaxError as e:
+            print(f"{argv[1]}:{e}")
+            sys.exit(1)
 
         interp = MscriptInterpreter(filename=argv[1])
+        if snapshot_in:
+            t = time.perf_counter()
+            try:
+                load_snapshot(interp, snapshot_in)
+            except Exception as e:
+                print(f"{snapshot_in}: cannot resume from snapshot: {e}")
+                sys.exit(1)
+            if startup_time:
+                timings.append(("snapshot", time.perf_counter() - t))
+        if memprofile:
+            import mscript_memprofile
+            mscript_memprofile.start(MscriptInterpreter)
+        if sample_path:
+            import mscript_sampler
+            if hasattr(mscript_sampler.signal, "SIGUSR2"):
+                mscript_sampler.toggle_on_signal(interp, sample_path)
+            if not sample_paused:
+                interp.start_sampling(sample_rate)
+        t = time.perf_counter()
         try:
             interp.visit(tree)
         except Exception as e:
             print(e)
+        if snapshot_out:
+            try:
+                lost = save_snapshot(interp, snapshot_out, tree)
+            except OSError as e:
+                print(e)
+                sys.exit(1)
+            for name in lost:
+                print(f"snapshot: left out {name} (cannot be pickled or re-created)", file=sys.stderr)
+            print(f"wrote {snapshot_out}", file=sys.stderr)
+        if interp.sampler is not None:
+            sampler = interp.stop_sampling()
+            sampler.write(sample_path)
+            print(f"sampling: {sampler.samples} samples written to {sample_path}", file=sys.stderr)
+        if memprofile:
+            mscript_memprofile.report(interp.global_env)
+        if startup_time:
+            timings.append(("run", time.perf_counter() - t))
+            report = ", ".join(f"{phase} {secs * 1000:.1f} ms" for phase, secs in timings)
+            total  = time.perf_counter() - _IMPORT_STARTED
+            print(f"startup: {report}, total {total * 1000:.1f} ms ({len(sys.modules)} modules loaded)",
+                  file=sys.stderr)
+        if show_quicken:
+            print(format_quicken_stats(), file=sys.stderr)
         if "--debug" in argv:
             print(tree.pretty(f"{argv[len(argv)-1] if argv[len(argv)-2] == '--debug' else ""}"))
     
@@ -756,10 +2137,5 @@ def main():
 
 
 
-
-if __name__ == '__main__':
-    main()
-
-
 def __main__():
     return main()
\ No newline at end of file
@@ -1,21 +1,55 @@
 # mpmp.py - Mscript Package Manager
 
-import wget
 import zipfile
+import hashlib
 import json
+import shutil
 import sys
 import os
 import requests
+import threading
 import time
 import platform
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from colorama import Fore, Style, init
 
 init(autoreset=True)
 
-BASE_URL = "https://mscript-lang.pythonanywhere.com"
+# MPM_BASE_URL points mpm at another registry (a mirror, or a local server in tests)
+BASE_URL = os.environ.get("MPM_BASE_URL", "https://mscript-lang.pythonanywhere.com").rstrip("/")
 __VERSION__ = "0.2.0"
 DATA_FILE = "mscript_packages.json"
+LOCK_FILE = "mscript_packages.lock"
 PKG_DIR = "mscript_packages"
+MAX_WORKERS = int(os.environ.get("MPM_WORKERS", "8"))
+
+def default_cache_dir():
+    if os.environ.get("MPM_CACHE_DIR"):
+        return os.environ["MPM_CACHE_DIR"]
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "mscript", "mpm")
+
+# Archives are cached by SHA-256 (archives/<sha>.zip) together with their
+# extracted contents (trees/<sha>/), which are hard-linked into PKG_DIR.
+CACHE_DIR = default_cache_dir()
+
+_session = None
+
+def get_session():
+    """One pooled HTTP session shared by every metadata fetch and download."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=MAX_WORKERS,
+                                                pool_maxsize=MAX_WORKERS)
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+    return _session
 
 def load_data():
     return json.loads(open(DATA_FILE).read()) if os.path.exists(DATA_FILE) else {"packages": []}
@@ -24,6 +58,16 @@ def save_data(data):
     with open(DATA_FILE, "w") as f:
         json.dump(data, f, indent=4)
 
+def load_lock():
+    if os.path.exists(LOCK_FILE):
+        with open(LOCK_FILE) as f:
+            return json.load(f)
+    return {"lock_version": 1, "packages": {}}
+
+def save_lock(lock):
+    with open(LOCK_FILE, "w") as f:
+        json.dump(lock, f, indent=4, sort_keys=True)
+
 def installed_packages(data):
     return {pkg["package_name"]: pkg for pkg in data["packages"]}
 
@@ -32,7 +76,7 @@ def print_box(text, icon="[→]", color=Fore.CYAN):
 
 def fetch_package_info(package):
     try:
-        r = requests.get(f"{BASE_URL}/api/packages/{package}")
+        r = get_session().get(f"{BASE_URL}/api/packages/{package}", timeout=30)
         if r.status_code != 200:
             return None
         data = r.json()
@@ -40,33 +84,243 @@ def fetch_package_info(package):
     except requests.exceptions.RequestException:
         return None
 
-def install_package(package, data, installed):
+def resolve_dependencies(package, installed):
+    """Fetch metadata for `package` and every dependency not installed yet.
+
+    Each level of the dependency graph is fetched concurrently. Returns the
+    packages to install as (name, info) pairs, dependencies first, and the
+    names that could not be found.
+    """
+    found, missing = {}, []
+    seen     = {package}
+    frontier = [package]
+    with ThreadPoolExecutor(MAX_WORKERS) as pool:
+        while frontier:
+            next_frontier = []
+            for name, info in zip(frontier, pool.map(fetch_package_info, frontier)):
+                if not info:
+                    missing.append(name)
+                    continue
+                found[name] = info
+                for dep in info.get("dependencies", []):
+                    if dep not in installed and dep not in seen:
+                        seen.add(dep)
+                        next_frontier.append(dep)
+            frontier = next_frontier
+
+    order, visiting = [], set()
+    def visit(name):
+        if name not in found or name in visiting:
+            return
+        visiting.add(name)
+        for dep in found[name].get("dependencies", []):
+            visit(dep)
+        order.append(name)
+    visit(package)
+    return [(name, found[name]) for name in order], missing
+
+class IntegrityError(Exception):
+    """An archive whose contents do not hash to the sha256 the lockfile pins."""
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cached_archive(sha256):
+    return os.path.join(CACHE_DIR, "archives", f"{sha256}.zip")
+
+def cached_tree(sha256):
+    return os.path.join(CACHE_DIR, "trees", sha256)
+
+def extract_to_cache(sha256):
+    """Extract a cached archive into trees/<sha256> (once; safe to race)."""
+    tree = cached_tree(sha256)
+    if not os.path.isdir(tree):
+        staging = f"{tree}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with zipfile.ZipFile(cached_archive(sha256), 'r') as zip_ref:
+            zip_ref.extractall(staging)
+        try:
+            os.rename(staging, tree)
+        except OSError:  # extracted concurrently by someone else
+            shutil.rmtree(staging, ignore_errors=True)
+    return tree
+
+def download_archive(package):
+    """Download a package archive into the cache; returns (size, sha256)."""
+    archives = os.path.join(CACHE_DIR, "archives")
+    os.makedirs(archives, exist_ok=True)
+    part = os.path.join(archives, f".{package}.{os.getpid()}.{threading.get_ident()}.part")
+    digest, size = hashlib.sha256(), 0
+    with get_session().get(f"{BASE_URL}/api/packages/download/{package}", stream=True, timeout=60) as r:
+        r.raise_for_status()
+        with open(part, "wb") as f:
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    sha256 = digest.hexdigest()
+    os.replace(part, cached_archive(sha256))
+    return size, sha256
+
+def link_tree(tree, dest):
+    """Hard-link every file of a cached tree into `dest` (copies across devices)."""
+    for root, _, files in os.walk(tree):
+        target = os.path.join(dest, os.path.relpath(root, tree))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            src, dst = os.path.join(root, name), os.path.join(target, name)
+            if os.path.lexists(dst):
+                os.remove(dst)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+def download_package(package, pkg_data, pinned=None):
+    """Install one package from the cache, downloading it first if needed.
+
+    `pinned` is the package's lockfile entry; when it matches the wanted
+    version and the archive is cached, nothing is downloaded. Returns
+    (bytes downloaded, sha256).
+    """
+    size = 0
+    pin  = pinned["sha256"] if pinned and pinned["version"] == pkg_data["version"] else None
+    archive = cached_archive(pin) if pin else None
+    if archive and os.path.exists(archive) and file_sha256(archive) == pin:
+        sha256 = pin
+    else:
+        if archive and os.path.exists(archive):   # damaged; fetch it again
+            os.remove(archive)
+        size, sha256 = download_archive(package)
+        if pin and sha256 != pin:
+            raise IntegrityError(f"downloaded v{pkg_data['version']} has sha256 {sha256[:12]}, "
+                                 f"but {LOCK_FILE} pins {pin[:12]}")
+    link_tree(extract_to_cache(sha256), os.path.join(PKG_DIR, package))
+    return size, sha256
+
+def install_package(package, data, installed, lock):
     if package in installed:
         print_box(f"{package} already installed.", "[✓]", Fore.YELLOW)
         return
 
-    pkg_data = fetch_package_info(package)
-    if not pkg_data:
-        print_box(f"Package '{package}' not found.", "[X]", Fore.RED)
+    started = time.perf_counter()
+    to_install, missing = resolve_dependencies(package, installed)
+    resolved = time.perf_counter()
+
+    for name in missing:
+        print_box(f"Package '{name}' not found.", "[X]", Fore.RED)
+    if package in missing:
+        return
+
+    for name, pkg_data in to_install:
+        print_box(f"Installing {name} v{pkg_data['version']}...", "[+]", Fore.GREEN)
+
+    pins = lock["packages"]
+    done, total_bytes = {}, 0
+    with ThreadPoolExecutor(MAX_WORKERS) as pool:
+        futures = {pool.submit(download_package, name, pkg_data, pins.get(name)): name
+                   for name, pkg_data in to_install}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                size, done[name] = future.result()
+                total_bytes += size
+            except (requests.exceptions.RequestException, zipfile.BadZipFile, OSError, IntegrityError) as e:
+                print_box(f"Failed to install {name}: {e}", "[X]", Fore.RED)
+    downloaded = time.perf_counter()
+
+    # A package is only installed if everything it depends on is.
+    failed = set(missing)
+    for name, pkg_data in to_install:
+        broken = [dep for dep in pkg_data.get("dependencies", []) if dep in failed]
+        if name in done and broken:
+            print_box(f"Not installing {name}: {', '.join(broken)} failed.", "[X]", Fore.RED)
+            shutil.rmtree(os.path.join(PKG_DIR, name), ignore_errors=True)
+            del done[name]
+        if name not in done:
+            failed.add(name)
+            continue
+        pkg_data["sha256"]   = done[name]
+        pkg_data["add_date"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        data["packages"].append(pkg_data)
+        installed[name] = pkg_data
+        pins[name] = {
+            "version":      pkg_data["version"],
+            "sha256":       done[name],
+            "dependencies": pkg_data.get("dependencies", []),
+        }
+        print_box(f"Installed {name} successfully.", "[✓]", Fore.GREEN)
+
+    print_box(f"{len(done)} package(s): resolved in {resolved - started:.2f}s, "
+              f"downloaded {total_bytes / 1024:.1f} KiB in {downloaded - resolved:.2f}s, "
+              f"total {downloaded - started:.2f}s", "[⏱]", Fore.CYAN)
+    precompile(done)
+
+def precompile(names):
+    """Parse installed packages into the interpreter's module cache."""
+    try:
+        import it
+    except ImportError as e:
+        print_box(f"Skipping precompilation: {e}", "[!]", Fore.YELLOW)
         return
+    for name in names:
+        for path, error in it.compile_dir(os.path.join(PKG_DIR, name)):
+            print_box(f"Could not precompile {path}: {error}", "[!]", Fore.YELLOW)
 
-    for dep in pkg_data.get("dependencies", []):
-        install_package(dep, data, installed)
+def install_frozen(package, data, installed, lock):
+    """Install exactly what the lockfile pins, from the cache only.
 
-    print_box(f"Installing {package} v{pkg_data['version']}...", "[+]", Fore.GREEN)
-    pkg_path = os.path.join(PKG_DIR, package)
-    os.makedirs(pkg_path, exist_ok=True)
+    Makes no network requests: every pinned archive must already be in the
+    cache and hash to its pin. With no `package`, every locked package is
+    installed.
+    """
+    pins = lock["packages"]
+    if package:
+        names, pending = [], [package]
+        while pending:
+            name = pending.pop()
+            if name not in names:
+                names.append(name)
+                pending.extend(pins.get(name, {}).get("dependencies", []))
+    else:
+        names = list(pins)
 
-    zip_path = os.path.join(pkg_path, f"{pkg_data['version']}.zip")
-    wget.download(f"{BASE_URL}/api/packages/download/{package}", out=zip_path)
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(pkg_path)
-    os.remove(zip_path)
+    problems = [f"'{name}' is not in {LOCK_FILE}" for name in names if name not in pins]
+    for name in names:
+        if name not in pins:
+            continue
+        sha256  = pins[name]["sha256"]
+        archive = cached_archive(sha256)
+        if not os.path.exists(archive):
+            problems.append(f"'{name}' ({sha256[:12]}) is not in the cache")
+        elif file_sha256(archive) != sha256:
+            problems.append(f"the cached archive of '{name}' does not match its pin ({sha256[:12]})")
+    if problems:
+        for problem in problems:
+            print_box(f"Cannot install offline: {problem}.", "[X]", Fore.RED)
+        return False
 
-    pkg_data["add_date"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-    data["packages"].append(pkg_data)
-    installed[package] = pkg_data
-    print_box(f"Installed {package} successfully.", "[✓]", Fore.GREEN)
+    started = time.perf_counter()
+    for name in names:
+        pin = pins[name]
+        link_tree(extract_to_cache(pin["sha256"]), os.path.join(PKG_DIR, name))
+        entry = {
+            "package_name": name,
+            "version":      pin["version"],
+            "dependencies": pin["dependencies"],
+            "sha256":       pin["sha256"],
+            "add_date":     time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
+        }
+        data["packages"] = [p for p in data["packages"] if p["package_name"] != name]
+        data["packages"].append(entry)
+        installed[name] = entry
+    precompile(names)
+    print_box(f"{len(names)} package(s) installed from the lockfile in "
+              f"{time.perf_counter() - started:.2f}s (offline).", "[✓]", Fore.GREEN)
+    return True
 
 def uninstall_package(package, data):
     pkgs = installed_packages(data)
@@ -101,9 +355,9 @@ def list_packages(data, package=None):
     if package:
         for pkg in pkgs:
             if pkg["package_name"] == package:
-                print_box(f"{package} v{pkg['version']} - {pkg['description']}", "[✓]", Fore.CYAN)
-                print(f"{Fore.WHITE}Author: {pkg['author']}, License: {pkg['license']}")
-                print(f"URL: {pkg['url']}")
+                print_box(f"{package} v{pkg['version']} - {pkg.get('description', '')}", "[✓]", Fore.CYAN)
+                print(f"{Fore.WHITE}Author: {pkg.get('author', '?')}, License: {pkg.get('license', '?')}")
+                print(f"URL: {pkg.get('url', '?')}")
                 print(f"Installed: {pkg['add_date']}")
                 return
         print_box(f"Package '{package}' not found.", "[X]", Fore.RED)
@@ -113,23 +367,33 @@ def list_packages(data, package=None):
             print(f"- {pkg['package_name']} v{pkg['version']}")
 
 def main():
-    if len(sys.argv) < 2 or len(sys.argv) > 3:
-        print("Usage: mpp <install|uninstall|list|--version> [package]")
+    args   = [a for a in sys.argv[1:] if a != "--frozen"]
+    frozen = len(args) != len(sys.argv) - 1
+    if len(args) < 1 or len(args) > 2:
+        print("Usage: mpp <install|uninstall|list|--version> [package] [--frozen]")
         return
 
-    action = sys.argv[1]
-    package = sys.argv[2] if len(sys.argv) == 3 else None
+    action = args[0]
+    package = args[1] if len(args) == 2 else None
 
     os.makedirs(PKG_DIR, exist_ok=True)
     data = load_data()
     installed = installed_packages(data)
 
-    if action == "install":
+    if action == "install" and frozen:
+        lock = load_lock()
+        if not install_frozen(package, data, installed, lock):
+            sys.exit(1)
+        save_data(data)
+
+    elif action == "install":
         if not package:
             print_box("No package name provided.", "[X]", Fore.RED)
             return
-        install_package(package, data, installed)
+        lock = load_lock()
+        install_package(package, data, installed, lock)
         save_data(data)
+        save_lock(lock)
 
     elif action == "uninstall":
         if not package:
@@ -137,6 +401,9 @@ def main():
             return
         uninstall_package(package, data)
         save_data(data)
+        lock = load_lock()
+        if package not in installed_packages(data) and lock["packages"].pop(package, None):
+            save_lock(lock)
 
     elif action == "list":
         list_packages(data, package)
@@ -0,0 +1,268 @@
+# mscript_array.py - typed numeric arrays for Mscript (std/array)
+
+"""
+A TypedArray holds numbers of one element type in a flat C buffer: a NumPy
+ndarray when NumPy is importable, otherwise an `array.array` (or a
+memoryview over someone else's memory). `+ - * /` between arrays, or an
+array and a number, and the reductions run in C instead of one interpreted
+node per element.
+
+Set MSCRIPT_ARRAY_BACKEND=array to ignore NumPy.
+"""
+
+import array as _array
+import importlib
+import itertools
+import math
+import operator
+import os
+
+# element type -> (array.array typecode, NumPy dtype, ctypes type)
+TYPES = {
+    "i8":  ("b", "int8",    "c_int8"),
+    "u8":  ("B", "uint8",   "c_uint8"),
+    "i16": ("h", "int16",   "c_int16"),
+    "u16": ("H", "uint16",  "c_uint16"),
+    "i32": ("i", "int32",   "c_int32"),
+    "u32": ("I", "uint32",  "c_uint32"),
+    "i64": ("q", "int64",   "c_int64"),
+    "u64": ("Q", "uint64",  "c_uint64"),
+    "f32": ("f", "float32", "c_float"),
+    "f64": ("d", "float64", "c_double"),
+}
+_BY_DTYPE = {dtype: name for name, (_, dtype, _) in TYPES.items()}
+
+_UNSET = object()
+_np    = _UNSET
+
+def _numpy():
+    """The numpy module, or None when it is missing or disabled."""
+    global _np
+    if _np is _UNSET:
+        _np = None
+        if os.environ.get("MSCRIPT_ARRAY_BACKEND", "") != "array":
+            try:
+                _np = importlib.import_module("numpy")
+            except ImportError:
+                pass
+    return _np
+
+def _check_type(type_):
+    if type_ not in TYPES:
+        raise TypeError(f"unknown array type '{type_}' (expected one of {', '.join(TYPES)})")
+    return type_
+
+def _result_type(types, divide, float_scalar):
+    """Element type of an element-wise result on the array.array backend."""
+    if any(t[0] == "f" for t in types):
+        return "f32" if all(t == "f32" for t in types) else "f64"
+    if divide or float_scalar:
+        return "f64"
+    return types[0] if all(t == types[0] for t in types) else "i64"
+
+def _wrapped(type_, values):
+    """An array.array of `values`. Integers that do not fit the element type
+    wrap around, as in C and with NumPy (u8 200 + 100 is 44), instead of
+    raising OverflowError; floats too large for f32 already become inf."""
+    code   = TYPES[type_][0]
+    values = list(values)
+    try:
+        return _array.array(code, values)
+    except OverflowError:
+        if type_[0] == "f":
+            raise
+    bits = _array.array(code).itemsize * 8
+    mask = (1 << bits) - 1
+    if type_[0] == "u":
+        return _array.array(code, [v & mask for v in values])
+    half = 1 << (bits - 1)
+    return _array.array(code, [((v + half) & mask) - half for v in values])
+
+class TypedArray:
+    """A fixed-type numeric array; see the module docstring."""
+    __slots__ = ("data", "type")
+
+    def __init__(self, data, type_):
+        self.data = data
+        self.type = type_
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        data = self.data
+        return iter(data.tolist() if hasattr(data, "dtype") else data)
+
+    def __getitem__(self, index):
+        data = self.data
+        if isinstance(index, slice):
+            # zero-copy, like slices of bytes
+            return TypedArray(data[index] if hasattr(data, "dtype") else memoryview(data)[index], self.type)
+        value = data[index]
+        return value.item() if hasattr(value, "item") else value
+
+    def __setitem__(self, index, value):
+        self.data[index] = value
+
+    def __buffer__(self, flags):
+        return memoryview(self.data)
+
+    def tolist(self):
+        return self.data.tolist()
+
+    def __repr__(self):
+        return f"array({self.type}, {self.tolist()})"
+
+    # ——— element-wise arithmetic ———
+
+    def _binary(self, other, op, reflected=False):
+        if isinstance(other, TypedArray):
+            right, types = other.data, [self.type, other.type]
+        elif isinstance(other, (int, float)) and not isinstance(other, bool):
+            right, types = other, [self.type]
+        elif isinstance(other, (list, tuple)):
+            right, types = other, [self.type]
+        else:
+            return NotImplemented
+        if not isinstance(right, (int, float)) and len(right) != len(self.data):
+            raise ValueError(f"arrays have different lengths ({len(self.data)} and {len(right)})")
+
+        left = self.data
+        if hasattr(left, "dtype"):
+            if isinstance(right, (list, tuple)):
+                # a list of ints keeps an int array's type, as with array.array
+                right = _np.asarray(right)
+                if right.dtype.kind == left.dtype.kind:
+                    right = right.astype(left.dtype)
+            result = op(right, left) if reflected else op(left, right)
+            return TypedArray(result, _BY_DTYPE.get(result.dtype.name, "f64"))
+
+        float_scalar = isinstance(right, float) or (
+            isinstance(right, (list, tuple)) and any(isinstance(v, float) for v in right))
+        type_ = _result_type(types, op is operator.truediv, float_scalar)
+        if isinstance(right, (int, float)):
+            right = itertools.repeat(right)
+        values = map(op, right, left) if reflected else map(op, left, right)
+        return TypedArray(_wrapped(type_, values), type_)
+
+    def _inplace(self, other, op):
+        result = self._binary(other, op)
+        if result is NotImplemented or result.type != self.type:
+            return result
+        if hasattr(self.data, "dtype"):
+            self.data[...] = result.data
+        else:
+            self.data[:] = result.data
+        return self
+
+    def __add__(self, other):      return self._binary(other, operator.add)
+    def __radd__(self, other):     return self._binary(other, operator.add, True)
+    def __sub__(self, other):      return self._binary(other, operator.sub)
+    def __rsub__(self, other):     return self._binary(other, operator.sub, True)
+    def __mul__(self, other):      return self._binary(other, operator.mul)
+    def __rmul__(self, other):     return self._binary(other, operator.mul, True)
+    def __truediv__(self, other):  return self._binary(other, operator.truediv)
+    def __rtruediv__(self, other): return self._binary(other, operator.truediv, True)
+    def __iadd__(self, other):     return self._inplace(other, operator.add)
+    def __isub__(self, other):     return self._inplace(other, operator.sub)
+    def __imul__(self, other):     return self._inplace(other, operator.mul)
+    def __itruediv__(self, other): return self._inplace(other, operator.truediv)
+
+# ——— constructors ———
+
+def new(type_, values):
+    """An array of `type_` holding `values` (a list, an iterable or another array)."""
+    code, dtype, _ = TYPES[_check_type(type_)]
+    if isinstance(values, TypedArray):
+        values = values.data
+    np = _numpy()
+    if np is not None:
+        return TypedArray(np.array(values, dtype=dtype), type_)
+    if not isinstance(values, (list, tuple, _array.array)):
+        values = list(values)
+    return TypedArray(_array.array(code, values), type_)
+
+def zeros(type_, n):
+    code, dtype, _ = TYPES[_check_type(type_)]
+    np = _numpy()
+    if np is not None:
+        return TypedArray(np.zeros(n, dtype=dtype), type_)
+    return TypedArray(_array.array(code, bytes(n * _array.array(code).itemsize)), type_)
+
+def arange(type_, start, stop, step=1):
+    code, dtype, _ = TYPES[_check_type(type_)]
+    np = _numpy()
+    if np is not None:
+        return TypedArray(np.arange(start, stop, step, dtype=dtype), type_)
+    if all(isinstance(v, int) for v in (start, stop, step)):
+        return TypedArray(_array.array(code, range(start, stop, step)), type_)
+    n = max(0, math.ceil((stop - start) / step))
+    return TypedArray(_array.array(code, (start + i * step for i in range(n))), type_)
+
+def view(buffer, type_):
+    """A zero-copy array over bytes, a bytearray, a memoryview or an FFI
+    buffer; writes go to the buffer (bytes are read-only)."""
+    code, dtype, _ = TYPES[_check_type(type_)]
+    if isinstance(buffer, TypedArray):
+        buffer = buffer.data
+    np = _numpy()
+    if np is not None:
+        return TypedArray(np.frombuffer(buffer, dtype=dtype), type_)
+    mv = memoryview(buffer).cast("B")
+    if len(mv) % _array.array(code).itemsize:
+        raise ValueError(f"buffer of {len(mv)} bytes is not a whole number of {type_} elements")
+    return TypedArray(mv.cast(code), type_)
+
+# ——— conversions ———
+
+def to_bytes(a):
+    return bytes(memoryview(a.data))
+
+def to_ffi(a):
+    """A ctypes array sharing the array's memory, for passing to C."""
+    import ctypes
+    ctype = getattr(ctypes, TYPES[a.type][2])
+    data  = a.data
+    return (ctype * len(data)).from_buffer(data if hasattr(data, "dtype") else memoryview(data).cast("B"))
+
+def to_list(a):
+    return a.tolist()
+
+def backend():
+    return "numpy" if _numpy() is not None else "array"
+
+# ——— reductions ———
+
+def _values(a):
+    return a.data if isinstance(a, TypedArray) else a
+
+def total(a):
+    data = _values(a)
+    if hasattr(data, "dtype"):
+        return data.sum().item()
+    if isinstance(a, TypedArray) and a.type[0] == "f":
+        return math.fsum(data)
+    return sum(data)
+
+def minimum(a):
+    data = _values(a)
+    if hasattr(data, "dtype"):
+        return data.min().item()
+    return min(data)
+
+def maximum(a):
+    data = _values(a)
+    if hasattr(data, "dtype"):
+        return data.max().item()
+    return max(data)
+
+def dot(a, b):
+    x, y = _values(a), _values(b)
+    if len(x) != len(y):
+        raise ValueError(f"arrays have different lengths ({len(x)} and {len(y)})")
+    if hasattr(x, "dtype") or hasattr(y, "dtype"):
+        return _numpy().dot(x, y).item()
+    sumprod = getattr(math, "sumprod", None)   # Python 3.12+
+    if sumprod is not None:
+        return sumprod(x, y)
+    return sum(map(operator.mul, x, y))
@@ -1,15 +1,38 @@
 # mscript_builtins.py
-import ast
+import builtins as _py_builtins
+import collections
+import importlib
 import os
 import math
-import json
 import sys
-import datetime
-import re
 import time as _time_mod
-import ctypes
-import platform as _py_platform
-import random as _py_random # probably better if i prefixed everything under _py_ for readability 
+
+class _LazyModule:
+    """A module that is only imported when one of its attributes is first used.
+
+    Most scripts never touch FFI, JSON, regex or asyncio, so the modules
+    backing those builtins are kept out of interpreter startup.
+    """
+    def __init__(self, name):
+        self._name   = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+json             = _LazyModule("json")
+datetime         = _LazyModule("datetime")
+re               = _LazyModule("re")
+ctypes           = _LazyModule("ctypes")
+_py_platform     = _LazyModule("platform")
+asyncio          = _LazyModule("asyncio")
+_py_random       = _LazyModule("random") # probably better if i prefixed everything under _py_ for readability 
+mscript_parallel = _LazyModule("mscript_parallel")
+mscript_array    = _LazyModule("mscript_array")
+mscript_memprofile = _LazyModule("mscript_memprofile")
+mscript_serve    = _LazyModule("mscript_serve")
 
 def builtin_input(prompt):
     return input(str(prompt))
@@ -55,17 +78,17 @@ def builtin_read(filename, mode='r'):
     return open(filename, 'r').read()
 
 def builtin_write(filename, data):
-    mode = 'wb' if isinstance(data, (bytes, bytearray)) else 'w'
+    mode = 'wb' if isinstance(data, (bytes, bytearray, memoryview)) else 'w'
     return open(filename, mode).write(data)
 
 def builtin_decode(b, encoding=None):
     if encoding is None:
-        if not isinstance(b, (bytes, bytearray)):
+        if not isinstance(b, (bytes, bytearray, memoryview)):
             raise TypeError('decode() first arg must be bytes')
-        return b.decode()
-    if not isinstance(b, (bytes, bytearray)) or not isinstance(encoding, str):
+        return str(b, 'utf-8')
+    if not isinstance(b, (bytes, bytearray, memoryview)) or not isinstance(encoding, str):
         raise TypeError('decode() args must be (bytes, str)')
-    return b.decode(encoding)
+    return str(b, encoding)
 
 def builtin_system(cmd):
     os.system(str(cmd))
@@ -73,6 +96,9 @@ def builtin_system(cmd):
 def builtin_len(x):
     return len(x)
 
+def builtin_set(items=()):
+    return set(items)
+
 def builtin_keys(d):
     if not isinstance(d, dict):
         raise TypeError("keys() expects a dict")
@@ -83,6 +109,159 @@ def builtin_values(d):
         raise TypeError("values() expects a dict")
     return list(d.values())
 
+# ——— higher-order —————————————————————————————————————
+# Mscript functions are plain Python callables, so these run the loop in
+# native code and only call back into the interpreter for `fn`.
+def builtin_map(fn, *iterables):
+    return list(map(fn, *iterables))
+
+def builtin_filter(fn, items):
+    return list(filter(fn, items))
+
+def builtin_sorted(items, key=None, reverse=False):
+    return sorted(items, key=key, reverse=reverse)
+
+def builtin_sum(items, start=0):
+    return sum(items, start)
+
+def builtin_min(*items, key=None):
+    return min(*items, key=key)
+
+def builtin_max(*items, key=None):
+    return max(*items, key=key)
+
+def builtin_enumerate(items, start=0):
+    return list(enumerate(items, start))
+
+def builtin_zip(*iterables):
+    return list(zip(*iterables))
+
+# ——— memoization ——————————————————————————————————————
+_KWARGS_MARK = object()
+
+_CO_ASYNC = 0x80 | 0x200   # CO_COROUTINE | CO_ASYNC_GENERATOR
+
+def _is_async(fn):
+    """An Mscript `async def` (AsyncFunctionRef) or a Python coroutine function."""
+    if getattr(fn, "is_async", False) is True:
+        return True
+    code = getattr(fn, "__code__", None)
+    return code is not None and bool(code.co_flags & _CO_ASYNC)
+
+class MemoizedFunction:
+    """A function behind an LRU cache keyed by its (hashable) arguments.
+
+    Calls with an unhashable argument run uncached. `stats()` reports hits
+    and misses, `clear()` empties the cache.
+    """
+    def __init__(self, fn, maxsize=None):
+        if not callable(fn):
+            raise TypeError(f"memo() and cache() wrap a function, got {type(fn).__name__}")
+        self.fn      = fn
+        self.name    = getattr(fn, "name", getattr(fn, "__name__", "function"))
+        if _is_async(fn):
+            # the cached value would be a coroutine, which can only be awaited once
+            raise TypeError(f"cannot memoize async function '{self.name}'")
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+        self._cache  = collections.OrderedDict()
+        # Mscript functions are entered through .call() to stay off the C stack
+        self._call   = getattr(fn, "call", None)
+
+    def __call__(self, *arg_vals, **kwargs):
+        return self.call(arg_vals, kwargs)
+
+    def call(self, arg_vals, kwargs):
+        key = (*arg_vals, _KWARGS_MARK, *sorted(kwargs.items())) if kwargs else tuple(arg_vals)
+        cache = self._cache
+        try:
+            value = cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return self._call(arg_vals, kwargs) if self._call else self.fn(*arg_vals, **kwargs)
+        else:
+            self.hits += 1
+            if self.maxsize is not None:
+                cache.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = self._call(arg_vals, kwargs) if self._call else self.fn(*arg_vals, **kwargs)
+        cache[key] = value
+        if self.maxsize is not None and len(cache) > self.maxsize:
+            cache.popitem(last=False)
+        return value
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._cache), "maxsize": self.maxsize}
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+    def __repr__(self):
+        return f"<memoized {self.name}>"
+
+def builtin_memo(fn):
+    return MemoizedFunction(fn)
+
+def builtin_cache(maxsize=128):
+    """`@cache`, `@cache(64)` or `@cache(maxsize=64)`."""
+    if callable(maxsize):   # used bare, as `@cache`
+        return MemoizedFunction(maxsize, 128)
+    if maxsize is not None and (type(maxsize) is not int or maxsize < 0):
+        raise TypeError(f"cache() maxsize must be a non-negative int or None, got {maxsize!r}")
+    return lambda f: MemoizedFunction(f, maxsize)
+
+# ——— strings ——————————————————————————————————————————
+class StringBuilder:
+    """Collects pieces and joins them once in build(), instead of copying
+    the whole string on every `s = s + piece`."""
+    __slots__ = ("parts",)
+
+    def __init__(self):
+        self.parts = []
+
+    def append(self, value):
+        self.parts.append(value if type(value) is str else str(value))
+        return self
+
+    def build(self, sep=""):
+        return sep.join(self.parts)
+
+    def clear(self):
+        self.parts.clear()
+        return self
+
+    def __len__(self):
+        return sum(map(len, self.parts))
+
+    def __str__(self):
+        return "".join(self.parts)
+
+def builtin_str_builder():
+    return StringBuilder()
+
+def builtin_str_join(sep, items):
+    return sep.join([x if type(x) is str else str(x) for x in items])
+
+def builtin_str_split(s, sep=None, maxsplit=-1):
+    return s.split(sep, maxsplit)
+
+def builtin_str_format(fmt, values):
+    if isinstance(values, dict):
+        return fmt.format_map(values)
+    return fmt.format(*values)
+
+def builtin_str_replace(s, old, new, count=-1):
+    return s.replace(old, new, count)
+
+def builtin_str_substring(s, start, end=None):
+    return s[start:end]
+
 # ——— math —————————————————————————————————————————————
 def builtin_sin(x):             return math.sin(x)
 def builtin_cos(x):             return math.cos(x)
@@ -177,20 +356,26 @@ def builtin_del_attr(obj, attr):
 
 # ——— foreign-function interface (FFI) —————————————————————————————————
 
-_ffi_ctype_map = {
-    "void":   ctypes.c_void_p,
-    "int":    ctypes.c_int,
-    "uint":   ctypes.c_uint,
-    "short":  ctypes.c_short,
-    "ushort": ctypes.c_ushort,
-    "long":   ctypes.c_long,
-    "ulong":  ctypes.c_ulong,
-    "float":  ctypes.c_float,
-    "double": ctypes.c_double,
-    "char*":  ctypes.c_char_p,
-    "void*":  ctypes.c_void_p,
-    "size_t": ctypes.c_size_t
-}
+_ffi_ctype_map = {}
+
+def _ffi_ctype(name):
+    # built on first use so ctypes is only imported by scripts that need it
+    if not _ffi_ctype_map:
+        _ffi_ctype_map.update({
+            "void":   ctypes.c_void_p,
+            "int":    ctypes.c_int,
+            "uint":   ctypes.c_uint,
+            "short":  ctypes.c_short,
+            "ushort": ctypes.c_ushort,
+            "long":   ctypes.c_long,
+            "ulong":  ctypes.c_ulong,
+            "float":  ctypes.c_float,
+            "double": ctypes.c_double,
+            "char*":  ctypes.c_char_p,
+            "void*":  ctypes.c_void_p,
+            "size_t": ctypes.c_size_t
+        })
+    return _ffi_ctype_map[name]
 
 def builtin_ffi_open(path):
     return ctypes.CDLL(str(path))
@@ -200,14 +385,14 @@ def builtin_ffi_sym(lib, name):
 
 def builtin_ffi_set_ret(func, ret_type):
     try:
-        func.restype = _ffi_ctype_map[str(ret_type)]
+        func.restype = _ffi_ctype(str(ret_type))
     except KeyError:
         raise TypeError(f"Unknown return type '{ret_type}'")
     return None
 
 def builtin_ffi_set_args(func, arg_types):
     try:
-        func.argtypes = [_ffi_ctype_map[str(t)] for t in arg_types]
+        func.argtypes = [_ffi_ctype(str(t)) for t in arg_types]
     except KeyError as e:
         raise TypeError(f"Unknown argument type '{e.args[0]}'")
     return None
@@ -323,6 +508,136 @@ def builtin_random_seed(s):
     _py_random.seed(s)
     return None
 
+# ——— asyncio ———————————————————————————————————————————————
+def builtin_async_run(coro):
+    return asyncio.run(coro)
+
+def builtin_async_gather(aws):
+    return asyncio.gather(*aws)
+
+def builtin_async_sleep(seconds):
+    return asyncio.sleep(seconds)
+
+def builtin_async_wait_for(aw, timeout):
+    return asyncio.wait_for(aw, timeout)
+
+def builtin_async_semaphore(n):
+    return asyncio.Semaphore(n)
+
+async def _async_limited(sem, aw):
+    async with sem:
+        return await aw
+
+def builtin_async_limit(sem, aw):
+    return _async_limited(sem, aw)
+
+def builtin_async_to_thread(fn, args=None):
+    return asyncio.to_thread(fn, *(args or []))
+
+# ——— parallel ——————————————————————————————————————————————
+def builtin_parallel_map(fn, items, workers=None, chunksize=None):
+    return mscript_parallel.parallel_map(fn, items, workers, chunksize)
+
+def builtin_parallel_cpu_count():
+    return os.cpu_count()
+
+def builtin_parallel_shutdown():
+    mscript_parallel.shutdown()
+    return None
+
+# ——— arrays ————————————————————————————————————————————————
+def builtin_array_new(type_, values):
+    return mscript_array.new(str(type_), values)
+
+def builtin_array_zeros(type_, n):
+    return mscript_array.zeros(str(type_), n)
+
+def builtin_array_arange(type_, start, stop, step=1):
+    return mscript_array.arange(str(type_), start, stop, step)
+
+def builtin_array_view(buffer, type_):
+    return mscript_array.view(buffer, str(type_))
+
+def builtin_array_to_bytes(a):
+    return mscript_array.to_bytes(a)
+
+def builtin_array_to_ffi(a):
+    return mscript_array.to_ffi(a)
+
+def builtin_array_to_list(a):
+    return mscript_array.to_list(a)
+
+def builtin_array_sum(a):
+    return mscript_array.total(a)
+
+def builtin_array_min(a):
+    return mscript_array.minimum(a)
+
+def builtin_array_max(a):
+    return mscript_array.maximum(a)
+
+def builtin_array_dot(a, b):
+    return mscript_array.dot(a, b)
+
+def builtin_array_backend():
+    return mscript_array.backend()
+
+# ——— memory profiling ——————————————————————————————————————
+def builtin_memprof_enabled():
+    return mscript_memprofile.enabled()
+
+def builtin_memprof_snapshot():
+    return mscript_memprofile.snapshot()
+
+def builtin_memprof_diff(before, after, limit=10):
+    return mscript_memprofile.diff(before, after, limit)
+
+def builtin_memprof_format_bytes(n):
+    return mscript_memprofile.format_bytes(n)
+
+# ——— serving ———————————————————————————————————————————————
+def builtin_serve_response(status, body, headers=None):
+    return mscript_serve.Response(status, body, headers)
+
+# ——— values shared by the interpreter and compiled code —————————————
+class PythonModuleProxy:
+    """The `python` module: Python builtins and importable modules by attribute."""
+    def __getattr__(self, attr):
+        if attr.startswith("__"):   # pickle and copy probe for these
+            raise AttributeError(attr)
+        if hasattr(_py_builtins, attr):
+            value = getattr(_py_builtins, attr)
+        else:
+            value = importlib.import_module(attr)
+        # memoize on the instance: later lookups never reach __getattr__
+        setattr(self, attr, value)
+        return value
+
+    def __reduce__(self):
+        # the memoized modules cannot be pickled; a fresh proxy finds them again
+        return (PythonModuleProxy, ())
+
+def buffer_view(array):
+    """A memoryview over a ctypes array indexed like its elements: ints for
+    char buffers, numbers for numeric arrays."""
+    view = memoryview(array)
+    code = view.format.lstrip("<>=!@")
+    if len(code) != 1 or view.format == code:
+        return view
+    view = view.cast("B")
+    return view if code in "cbB" else view.cast(code)
+
+def slice_value(container, s):
+    """container[s]; bytes-like values give zero-copy memoryviews."""
+    if isinstance(container, (bytes, bytearray)):
+        return memoryview(container)[s]
+    if isinstance(container, memoryview):
+        return container[s]
+    ctypes = sys.modules.get("ctypes")   # FFI buffers exist only once ctypes is loaded
+    if ctypes is not None and isinstance(container, ctypes.Array):
+        return buffer_view(container)[s]
+    return container[s]
+
 builtins = {
     # core
     'input':       builtin_input,
@@ -337,11 +652,34 @@ builtins = {
     'decode':      builtin_decode,
     'system':      builtin_system,
     'len':         builtin_len,
+    'set':         builtin_set,
     'set_attr':    builtin_set_attr,
     'has_attr':    builtin_has_attr,
     'del_attr':    builtin_del_attr,
     'range':       builtin_range,
 
+    # higher-order
+    'map':         builtin_map,
+    'filter':      builtin_filter,
+    'sorted':      builtin_sorted,
+    'sum':         builtin_sum,
+    'min':         builtin_min,
+    'max':         builtin_max,
+    'enumerate':   builtin_enumerate,
+    'zip':         builtin_zip,
+
+    # memoization
+    'memo':        builtin_memo,
+    'cache':       builtin_cache,
+
+    # strings (internal)
+    '_str_builder':   builtin_str_builder,
+    '_str_join':      builtin_str_join,
+    '_str_split':     builtin_str_split,
+    '_str_format':    builtin_str_format,
+    '_str_replace':   builtin_str_replace,
+    '_str_substring': builtin_str_substring,
+
     # math (internal)
     '_sin':         builtin_sin,
     '_cos':         builtin_cos,
@@ -421,4 +759,41 @@ builtins = {
     "_random_choice":   builtin_random_choice,
     "_random_shuffle":  builtin_random_shuffle,
     "_random_seed":     builtin_random_seed,
+
+    # asyncio (internal)
+    "_async_run":       builtin_async_run,
+    "_async_gather":    builtin_async_gather,
+    "_async_sleep":     builtin_async_sleep,
+    "_async_wait_for":  builtin_async_wait_for,
+    "_async_semaphore": builtin_async_semaphore,
+    "_async_limit":     builtin_async_limit,
+    "_async_to_thread": builtin_async_to_thread,
+
+    # parallel (internal)
+    "_parallel_map":       builtin_parallel_map,
+    "_parallel_cpu_count": builtin_parallel_cpu_count,
+    "_parallel_shutdown":  builtin_parallel_shutdown,
+
+    # arrays (internal)
+    "_array_new":      builtin_array_new,
+    "_array_zeros":    builtin_array_zeros,
+    "_array_arange":   builtin_array_arange,
+    "_array_view":     builtin_array_view,
+    "_array_to_bytes": builtin_array_to_bytes,
+    "_array_to_ffi":   builtin_array_to_ffi,
+    "_array_to_list":  builtin_array_to_list,
+    "_array_sum":      builtin_array_sum,
+    "_array_min":      builtin_array_min,
+    "_array_max":      builtin_array_max,
+    "_array_dot":      builtin_array_dot,
+    "_array_backend":  builtin_array_backend,
+
+    # memory profiling (internal)
+    "_memprof_enabled":      builtin_memprof_enabled,
+    "_memprof_snapshot":     builtin_memprof_snapshot,
+    "_memprof_diff":         builtin_memprof_diff,
+    "_memprof_format_bytes": builtin_memprof_format_bytes,
+
+    # serving (internal)
+    "_serve_response": builtin_serve_response,
 }
@@ -0,0 +1,771 @@
+# mscript_compiler.py - translate Mscript programs to Python (`mscript --emit-py`)
+
+"""
+Ahead-of-time backend: the parse tree of a .mscript file is translated into
+an equivalent Python module, so loops and calls run as CPython bytecode
+instead of through the tree-walking interpreter.
+
+- functions become `def`s (top-level ones are hoisted, as in the interpreter)
+- `try`/`catch` becomes `try`/`except Exception`
+- `import "std/x"` / `import x` load the translated module (`ms_std_x.py`
+  next to the program, or translated in-process when it is missing) and
+  make its names visible, like the interpreter's import chain
+- every generated module carries a source map (`__mscript_lines__`), so
+  errors are reported against the .mscript file and line
+
+The second half of this file is the runtime the generated modules import
+(`import mscript_compiler as _ms`); it needs neither Lark nor the interpreter.
+
+Known differences from the interpreter: `return f(...)` is a plain call, so
+recursion depth is bounded by Python's recursion limit (raised to
+`--max-recursion`); names from an imported module are copied into the
+importer when the import runs instead of being looked up live; and nested
+functions can read the enclosing function's variables.
+
+Python's own builtins stay out of reach as in the interpreter: a bare name
+that only Python defines (`open`, `isinstance`, ...) and the program does
+not bind is translated to `_ms.undefined(name)`, which raises NameError.
+The generated module's frames keep Python's builtins, which the code the
+translator writes itself uses (`print`, `Exception`, imports).
+"""
+
+import ast
+import builtins as _py_builtins
+import hashlib
+import importlib
+import keyword
+import operator
+import os
+import re
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mscript_builtins import builtins as _b, MemoizedFunction, PythonModuleProxy, slice_value
+
+_STD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "std")
+
+# ——— translation ———
+
+_BINARY = {
+    'add': '+',  'sub': '-',  'mul': '*',  'div': '/',  'mod': '%',  'pow': '**',
+    'gt':  '>',  'lt':  '<',  'ge':  '>=', 'le':  '<=', 'eq':  '==', 'ne':  '!=',
+    'bit_or': '|', 'bit_and': '&', 'and_op': 'and', 'or_op': 'or',
+}
+# literals whose values are constants, so `x in [...]` of them can be a set
+_LITERALS = ('number', 'string', 'true', 'false', 'none')
+
+# names only Python's builtins define: unreachable from Mscript code
+_PY_ONLY = frozenset(dir(_py_builtins)) - set(_b)
+
+_FUNCTIONS = ('func_def', 'async_func_def')
+
+def _py(name):
+    """The Python spelling of an Mscript name (`class` -> `class_`)."""
+    name = str(name)
+    return name + "_" if keyword.iskeyword(name) else name
+
+def _line(node):
+    return getattr(node, "line", None) or 0
+
+def _import_target(tree):
+    """(name, path) for an import statement; path is None for `import python`."""
+    from it import find_module
+    node = tree.children[0]
+    if isinstance(node, str) and node[:1] == '"':
+        raw_path = ast.literal_eval(str(node))
+        name = os.path.splitext(os.path.basename(raw_path))[0]
+        if raw_path.startswith('std/'):
+            path = os.path.join(_STD_DIR, raw_path.split('/', 1)[1] + '.mscript')
+        else:
+            path = raw_path if raw_path.endswith('.mscript') else raw_path + '.mscript'
+    else:
+        parts = [str(tok) for tok in node.children] if hasattr(node, "children") else [str(node)]
+        name  = ".".join(parts)
+        if name == "python":
+            return name, None
+        path = find_module(parts) or os.path.join(*parts) + '.mscript'
+    return name, os.path.abspath(path)
+
+def _bindings(stmts):
+    """Names bound by a list of statements, nested blocks included and
+    function bodies excluded: (variables and functions, import roots)."""
+    names, imported = set(), set()
+    def walk(stmts):
+        for st in stmts:
+            kind = st.data
+            if kind in ('assign', 'aug_assign', 'for_stmt', *_FUNCTIONS):
+                names.add(str(st.children[0]))
+            elif kind == 'decorated':
+                names.add(str(st.children[-1].children[0]))
+            elif kind == 'import_stmt':
+                imported.add(_import_target(st)[0].split(".")[0])
+            elif kind == 'try_stmt':
+                clause = st.children[1]
+                if len(clause.children) == 2:
+                    names.add(str(clause.children[0]))
+                walk(clause.children[-1].children)
+            if kind in ('if_stmt', 'while_stmt', 'for_stmt', 'try_stmt'):
+                for child in st.children:
+                    if getattr(child, "data", None) == 'block':
+                        walk(child.children)
+    walk(stmts)
+    return names, imported
+
+def _top_level_return(node):
+    """True if `node` holds a `return` outside any function it defines."""
+    if node.data == 'return_stmt':
+        return True
+    if node.data in _FUNCTIONS or node.data == 'decorated':
+        return False
+    return any(_top_level_return(c) for c in node.children if hasattr(c, "data"))
+
+def _reads(node):
+    """Names an expression or statement may read."""
+    names = set()
+    for sub in node.iter_subtrees():
+        if sub.data in ('var', 'func_call', 'aug_assign', 'decorator', 'decorator_call'):
+            if not hasattr(sub.children[0], "children"):
+                names.add(str(sub.children[0]))
+        elif sub.data == 'dotted_name':
+            names.add(str(sub.children[0]))
+    return names
+
+def module_pyname(path):
+    """Python module name of the translation of an .mscript file."""
+    path = os.path.abspath(path)
+    rel  = os.path.relpath(path, _STD_DIR)
+    if not rel.startswith(".."):
+        stem = "std_" + os.path.splitext(rel)[0]
+    else:
+        digest = hashlib.sha1(path.encode()).hexdigest()[:8]
+        stem   = f"{os.path.splitext(os.path.basename(path))[0]}_{digest}"
+    return "ms_" + re.sub(r"\W", "_", stem)
+
+class Translation:
+    """The Python translation of one .mscript file."""
+    def __init__(self, filename, pyname, names):
+        self.filename = filename
+        self.pyname   = pyname
+        self.names    = names   # globals the module defines
+        self.imports  = []      # absolute paths of the modules it imports
+        self.body     = []      # (python line, mscript line)
+        self.consts   = []      # module-level constants the body refers to
+
+    def constant(self, code):
+        """Name of a module global set to `code` once, before the body runs."""
+        name = f"_ms_c{len(self.consts)}"
+        self.consts.append(f"{name} = {code}")
+        return name
+
+    def render(self, main=False, max_recursion=None):
+        """(source, source map); `main` adds the entry-point setup."""
+        header = [
+            f"# Generated from {os.path.basename(self.filename)} by `mscript --emit-py`; do not edit.",
+            "try:",
+            "    import mscript_compiler as _ms",
+            "except ImportError:",
+            "    from mscript import mscript_compiler as _ms",
+            "_ms_g = globals()",
+        ]
+        if main:
+            header.append(f"_ms.main({max_recursion or 10000})")
+        header += self.consts
+        # one entry per generated line: the .mscript line it came from, or 0
+        lines = (0,) * (len(header) + 1) + tuple(ms for _, ms in self.body)
+        header.append(f"_ms.init(_ms_g, {self.filename!r}, {lines!r}, {sorted(self.names)!r})")
+        return "\n".join(header + [text for text, _ in self.body]) + "\n", lines
+
+    def source(self, main=False, max_recursion=None):
+        return self.render(main, max_recursion)[0]
+
+    def code(self, main=False, max_recursion=None):
+        """Compile the translation; Python syntax errors point at the .mscript line."""
+        source, lines = self.render(main, max_recursion)
+        try:
+            return compile(source, f"<{self.filename}>", "exec")
+        except SyntaxError as e:
+            raise SyntaxError(f"{self.filename}:{_mscript_line(lines, e.lineno or 0)}: {e.msg}")
+
+class _Translator:
+    """Walks a parse tree and produces the lines of a Translation."""
+
+    def __init__(self, translation, stmts):
+        self.t        = translation
+        self.filename = translation.filename
+        self.stmts    = stmts
+        self.scope    = None   # Python name of the enclosing function
+        self.modules  = set()  # names bound only by imports: safe for direct `.attr`
+        self.known    = set(_b) | translation.names
+        self.locals   = frozenset()   # names bound in the enclosing functions
+
+    def error(self, node, message):
+        return SyntaxError(f"{self.filename}:{_line(node)}: {message}")
+
+    def emit(self, ind, text, node=None):
+        self.t.body.append(("    " * ind + text, _line(node)))
+
+    def run(self):
+        names, imported = _bindings(self.stmts)
+        for sub in (st for top in self.stmts for st in top.iter_subtrees()):
+            if sub.data == 'import_stmt':
+                name, path = _import_target(sub)
+                imported.add(name.split(".")[0])
+                if path is not None:
+                    self.t.imports.append(path)
+                    self.known |= translate(path, f"{self.filename}:{_line(sub)}").names
+        self.modules = imported - names
+
+        # Functions are hoisted; decorators run where the definition stands.
+        for st in self.stmts:
+            if st.data in _FUNCTIONS:
+                self.define(st, 0)
+            elif st.data == 'decorated':
+                self.define(st.children[-1], 0)
+        for st in self.stmts:
+            if st.data == 'decorated':
+                self.decorate(st, 0)
+            elif st.data in _FUNCTIONS:
+                continue
+            elif _top_level_return(st):
+                # `return` outside a function ends the statement it is in
+                self.emit(0, "try:", st)
+                self.stmt(st, 1)
+                self.emit(0, "except _ms.TopLevelReturn:", st)
+                self.emit(1, "pass", st)
+            else:
+                self.stmt(st, 0)
+
+    # ——— statements ———
+
+    def stmt(self, st, ind):
+        getattr(self, st.data)(st, ind)
+
+    def block(self, block, ind):
+        for st in block.children:
+            self.stmt(st, ind)
+
+    def assign(self, tree, ind):
+        name, value = tree.children
+        self.emit(ind, f"{_py(name)} = {self.expr(value)}", tree)
+
+    def aug_assign(self, tree, ind):
+        name, op, value = tree.children
+        self.emit(ind, f"{_py(name)} {op} {self.expr(value)}", tree)
+
+    def aug_index_assign(self, tree, ind):
+        target, index, op, value = tree.children
+        self.emit(ind, f"{self.expr(target)}[{self.expr(index)}] {op} {self.expr(value)}", tree)
+
+    def aug_attr_assign(self, tree, ind):
+        target = tree.children[0]
+        if target.data == 'dotted_name':
+            *path, attr = [str(tok) for tok in target.children]
+            obj = self.dotted(path)
+            op, value = tree.children[1:]
+        else:
+            obj = self.expr(target)
+            attr, op, value = str(tree.children[1]), *tree.children[2:]
+        self.emit(ind, f"_ms.aug_attr({obj}, {attr!r}, {str(op)!r}, {self.expr(value)})", tree)
+
+    def index_assign(self, tree, ind):
+        target, index, value = tree.children
+        self.emit(ind, f"{self.expr(target)}[{self.expr(index)}] = {self.expr(value)}", tree)
+
+    def print_stmt(self, tree, ind):
+        self.emit(ind, f"print({', '.join(self.expr(c) for c in tree.children)})", tree)
+
+    def expr_stmt(self, tree, ind):
+        self.emit(ind, self.expr(tree.children[0]), tree)
+
+    def return_stmt(self, tree, ind):
+        value = tree.children[0] if tree.children else None
+        if self.scope is None:
+            self.emit(ind, f"raise _ms.TopLevelReturn({'None' if value is None else self.expr(value)})", tree)
+            return
+        self.emit(ind, "return" if value is None else f"return {self.expr(value)}", tree)
+
+    def break_stmt(self, tree, ind):
+        self.emit(ind, "break", tree)
+
+    def continue_stmt(self, tree, ind):
+        self.emit(ind, "continue", tree)
+
+    def if_stmt(self, tree, ind):
+        children = tree.children
+        keyword_ = "if"
+        i = 0
+        while i < len(children):
+            node = children[i]
+            if node.data == 'block' and i == len(children) - 1 and i % 2 == 0:
+                self.emit(ind, "else:", node)
+                self.block(node, ind + 1)
+                break
+            self.emit(ind, f"{keyword_} {self.expr(node)}:", node)
+            self.block(children[i + 1], ind + 1)
+            keyword_ = "elif"
+            i += 2
+
+    def while_stmt(self, tree, ind):
+        cond, body = tree.children
+        self.emit(ind, f"while {self.expr(cond)}:", tree)
+        self.block(body, ind + 1)
+
+    def for_stmt(self, tree, ind):
+        name, iterable, body = tree.children
+        self.emit(ind, f"for {_py(name)} in {self.expr(iterable)}:", tree)
+        self.block(body, ind + 1)
+
+    def try_stmt(self, tree, ind):
+        body, clause = tree.children
+        self.emit(ind, "try:", tree)
+        self.block(body, ind + 1)
+        if len(clause.children) == 2:
+            self.emit(ind, f"except Exception as {_py(clause.children[0])}:", clause)
+        else:
+            self.emit(ind, "except Exception:", clause)
+        self.block(clause.children[-1], ind + 1)
+
+    def import_stmt(self, tree, ind):
+        name, path = _import_target(tree)
+        if path is None:
+            self.emit(ind, "_ms.import_python(_ms_g)", tree)
+        else:
+            self.emit(ind, f"_ms.import_module(_ms_g, {name!r}, {module_pyname(path)!r}, {path!r})", tree)
+
+    # ——— functions ———
+
+    def func_def(self, tree, ind):
+        self.define(tree, ind)
+        self.attach(str(tree.children[0]), ind, tree)
+
+    async_func_def = func_def
+
+    def decorated(self, tree, ind):
+        self.define(tree.children[-1], ind)
+        self.decorate(tree, ind)
+        self.attach(str(tree.children[-1].children[0]), ind, tree)
+
+    def attach(self, name, ind, node):
+        """A nested def is reachable as an attribute of its parent (`outer.inner`)."""
+        if self.scope is not None:
+            self.emit(ind, f"{self.scope}.{_py(name)} = {_py(name)}", node)
+
+    def define(self, tree, ind):
+        name   = _py(tree.children[0])
+        params = []
+        body   = None
+        for child in tree.children[1:]:
+            if getattr(child, "data", None) == 'params':
+                params = [str(p) for p in child.children]
+            elif getattr(child, "data", None) in ('block', 'async_block'):
+                body = child
+        prefix = "async def" if tree.data == 'async_func_def' else "def"
+        self.emit(ind, f"{prefix} {name}({', '.join(_py(p) for p in params)}):", tree)
+
+        # Mscript locals start out unbound, and reading one before it is
+        # assigned finds the global of that name: preload those globals.
+        local, _ = _bindings(body.children)
+        local   -= set(params)
+        assigned, read = set(), set()
+        for st in body.children:
+            if st.data == 'assign':
+                read |= _reads(st.children[1])
+                target = str(st.children[0])
+                if target not in read:
+                    assigned.add(target)
+            else:
+                read |= _reads(st)
+        for var in sorted((local & self.known) - assigned):
+            self.emit(ind + 1, f"{_py(var)} = _ms_g.get({var!r})", tree)
+
+        outer, self.scope = self.scope, name
+        outer_locals, self.locals = self.locals, self.locals | local | set(params)
+        try:
+            self.block(body, ind + 1)
+        finally:
+            self.scope, self.locals = outer, outer_locals
+
+    def decorate(self, tree, ind):
+        *decorators, definition = tree.children
+        name = _py(definition.children[0])
+        code = name
+        for dec in reversed(decorators):
+            target = dec.children[0]
+            wrap   = self.dotted([str(t) for t in target.children]) if hasattr(target, "children") else self.name(target)
+            if dec.data == 'decorator_call':
+                wrap = f"{wrap}({self.args(dec.children[1])})"
+            code = f"{wrap}({code})"
+        self.emit(ind, f"{name} = _ms.decorated({code})", tree)
+
+    # ——— expressions ———
+
+    def expr(self, node):
+        op = _BINARY.get(node.data)
+        if op is not None:
+            left, right = node.children
+            return f"({self.expr(left)} {op} {self.expr(right)})"
+        return getattr(self, "x_" + node.data)(node)
+
+    def args(self, args):
+        if args is None:
+            return ""
+        out = []
+        for a in args.children:
+            if a.data == 'kwarg':
+                name, value = str(a.children[0]), self.expr(a.children[1])
+                out.append(f"**{{{name!r}: {value}}}" if keyword.iskeyword(name) else f"{name}={value}")
+            else:
+                out.append(self.expr(a))
+        return ", ".join(out)
+
+    def name(self, name):
+        """A bare name being read."""
+        name = str(name)
+        if name in _PY_ONLY and name not in self.known and name not in self.locals:
+            return f"_ms.undefined({name!r})"
+        return _py(name)
+
+    def dotted(self, parts):
+        """a.b.c: dicts are indexed by key, like in the interpreter; the
+        first step from an imported module is a plain attribute access."""
+        code, rest = self.name(parts[0]), parts[1:]
+        if rest and parts[0] in self.modules and not keyword.iskeyword(rest[0]):
+            code, rest = f"{code}.{rest[0]}", rest[1:]
+        for part in rest:
+            code = f"_ms.attr({code}, {part!r})"
+        return code
+
+    def x_number(self, tree):
+        text = str(tree.children[0])
+        try:
+            value = float(text) if "." in text else int(text)
+        except ValueError as e:
+            raise self.error(tree, e)
+        text = repr(value)
+        return f"({text})" if text.startswith("-") else text
+
+    def x_string(self, tree):
+        return repr(ast.literal_eval(tree.children[0]))
+
+    def x_bytes_literal(self, tree):
+        return repr(ast.literal_eval(str(tree.children[0])))
+
+    def x_fstring(self, tree):
+        parts = []
+        for part in tree.children:
+            if isinstance(part, str):
+                parts.append(repr(part))
+            else:
+                value, spec = part.children
+                parts.append(f"_ms.format({self.expr(value)}, {spec!r})" if spec
+                             else f"_ms.format({self.expr(value)})")
+        if len(parts) == 1:
+            return parts[0]
+        return f"''.join(({', '.join(parts)},))" if parts else "''"
+
+    def x_var(self, tree):
+        return self.name(tree.children[0])
+
+    def x_true(self, tree):
+        return "True"
+
+    def x_false(self, tree):
+        return "False"
+
+    def x_none(self, tree):
+        return "None"
+
+    def x_not_op(self, tree):
+        return f"(not {self.expr(tree.children[0])})"
+
+    def x_await_expr(self, tree):
+        return f"(await {self.expr(tree.children[0])})"
+
+    def x_input_expr(self, tree):
+        return f"input({ast.literal_eval(str(tree.children[0]))!r})"
+
+    def x_list(self, tree):
+        return f"[{', '.join(self.expr(c) for c in tree.children)}]"
+
+    def x_dict(self, tree):
+        return "{" + ", ".join(f"{self.expr(k)}: {self.expr(v)}" for k, v in (p.children for p in tree.children)) + "}"
+
+    def x_set(self, tree):
+        return "{" + ", ".join(self.expr(c) for c in tree.children) + "}"
+
+    def x_in_op(self, tree):
+        left, right = tree.children
+        if right.data == 'list' and right.children and all(c.data in _LITERALS for c in right.children):
+            values  = f"({', '.join(self.expr(c) for c in right.children)},)"
+            members = self.t.constant(f"frozenset({values})")
+            return f"_ms.in_const({self.expr(left)}, {members}, {values})"
+        return f"({self.expr(left)} in {self.expr(right)})"
+
+    def x_list_comp(self, tree):
+        expr, name, iterable, cond = tree.children
+        source = self.expr(iterable)
+        outer, self.locals = self.locals, self.locals | {str(name)}
+        try:
+            tail = f" if {self.expr(cond)}" if cond is not None else ""
+            return f"[{self.expr(expr)} for {_py(name)} in {source}{tail}]"
+        finally:
+            self.locals = outer
+
+    def x_dict_comp(self, tree):
+        key, value, name, iterable, cond = tree.children
+        source = self.expr(iterable)
+        outer, self.locals = self.locals, self.locals | {str(name)}
+        try:
+            tail = f" if {self.expr(cond)}" if cond is not None else ""
+            return f"{{{self.expr(key)}: {self.expr(value)} for {_py(name)} in {source}{tail}}}"
+        finally:
+            self.locals = outer
+
+    def x_get_item(self, tree):
+        return f"{self.expr(tree.children[0])}[{self.expr(tree.children[1])}]"
+
+    def x_get_slice(self, tree):
+        bounds = ", ".join("None" if c is None else self.expr(c) for c in tree.children[1:])
+        return f"_ms.sliced({self.expr(tree.children[0])}, {bounds})"
+
+    def x_get_attr(self, tree):
+        obj, name = tree.children
+        if obj.data == 'var':
+            return self.dotted([str(obj.children[0]), str(name)])
+        return f"_ms.attr({self.expr(obj)}, {str(name)!r})"
+
+    def x_dotted_name_expr(self, tree):
+        while len(tree.children) == 1 and hasattr(tree.children[0], "children"):
+            tree = tree.children[0]
+        return self.dotted([str(tok) for tok in tree.children])
+
+    def x_func_call(self, tree):
+        callee = tree.children[0]
+        args   = tree.children[1] if len(tree.children) > 1 else None
+        if not hasattr(callee, "children"):
+            code = self.name(callee)
+        elif callee.data == 'dotted_name':
+            code = self.dotted([str(tok) for tok in callee.children])
+        else:
+            code = self.expr(callee)
+        return f"{code}({self.args(args)})"
+
+# Translations made by this process, by absolute path.
+_translations = {}
+
+def translate(path, importer=None):
+    """Translate an .mscript file (once per process) into a Translation;
+    `importer` is the location reported if the file does not exist."""
+    import it
+    from lark.exceptions import UnexpectedInput
+    key = os.path.abspath(path)
+    done = _translations.get(key)
+    if done is not None:
+        return done
+    try:
+        tree = it.parse_module(path)
+    except FileNotFoundError:
+        where = f"{importer}: " if importer else ""
+        raise SyntaxError(f"{where}Module '{path}' not found")
+    except UnexpectedInput as e:
+        raise SyntaxError(f"{path}:{e.line}:{e.column}: Syntax error: {e}")
+    except SyntaxError as e:
+        raise SyntaxError(f"{path}:{e}")
+
+    stmts = tree.children if tree.data == 'start' else [tree]
+    names, imported = _bindings(stmts)
+    translation = _translations[key] = Translation(path, module_pyname(key), names | imported)
+    try:
+        _Translator(translation, stmts).run()
+    except BaseException:
+        del _translations[key]
+        raise
+    return translation
+
+def emit(path, out=None, max_recursion=None):
+    """Write the translation of `path` to `out` (default: next to it, as
+    .py) and every module it imports next to that. Returns the files written."""
+    main = translate(path)
+    out  = out or os.path.splitext(path)[0] + ".py"
+    directory = os.path.dirname(os.path.abspath(out))
+    written, pending, seen = [], [(main, out)], set()
+    while pending:
+        translation, target = pending.pop()
+        if translation.filename in seen:
+            continue
+        seen.add(translation.filename)
+        source = translation.source(translation is main, max_recursion)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(source)
+        written.append(target)
+        for dep in translation.imports:
+            sub = translate(dep)
+            pending.append((sub, os.path.join(directory, sub.pyname + ".py")))
+    return written
+
+def run(path, max_recursion=None):
+    """Translate `path` and run it in this process as `__main__`; imported
+    modules are translated from source as well. Returns the module."""
+    global _from_source
+    _from_source = True
+    code   = translate(path).code(main=True, max_recursion=max_recursion)
+    module = types.ModuleType("__main__")
+    module.__file__ = path
+    previous = sys.modules.get("__main__")
+    sys.modules["__main__"] = module   # so functions pickle by reference (std/parallel)
+    hook = sys.excepthook
+    try:
+        exec(code, module.__dict__)
+    finally:
+        sys.excepthook = hook
+        if previous is not None:
+            sys.modules["__main__"] = previous
+    return module
+
+# ——— runtime for generated modules ———
+
+python       = PythonModuleProxy()
+format       = _py_builtins.format
+_from_source = False   # True under run(): never pick up stale emitted modules
+
+_AUG_OPS = {
+    "+=":  operator.iadd,
+    "-=":  operator.isub,
+    "*=":  operator.imul,
+    "/=":  operator.itruediv,
+    "%=":  operator.imod,
+    "**=": operator.ipow,
+}
+
+class TopLevelReturn(BaseException):
+    """`return` outside a function: ends the top-level statement it is in,
+    as in the interpreter. Not an Exception, so `catch` lets it through."""
+    def __init__(self, value=None):
+        self.value = value
+
+def init(g, filename, lines, names):
+    """Set up a generated module's globals: the Mscript builtins and its
+    source map."""
+    g.update(_b)
+    g["__mscript_file__"]  = filename
+    g["__mscript_lines__"] = lines
+    g["__mscript_names__"] = list(names)
+
+def main(max_recursion):
+    """Entry-point setup: room for `max_recursion` nested calls, and errors
+    reported against the .mscript source."""
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), max_recursion * 4 + 1000))
+    sys.excepthook = excepthook
+
+def undefined(name):
+    """A Python builtin the program reads but Mscript does not have."""
+    raise NameError(f"name {name!r} is not defined")
+
+def in_const(value, members, values):
+    """`x in [literals]`: a hash lookup in `members`; an unhashable `x`
+    equals none of them, but is compared like a list scan would."""
+    try:
+        return value in members
+    except TypeError:
+        return value in values
+
+def decorated(fn):
+    """Memoized functions are called through a plain function: calling an
+    instance goes through C, which caps how deep recursion can go."""
+    if not isinstance(fn, MemoizedFunction):
+        return fn
+    call = fn.call
+    def memoized(*args, **kwargs):
+        return call(args, kwargs)
+    memoized.__name__ = memoized.__qualname__ = fn.name
+    memoized.__wrapped__ = fn
+    memoized.stats, memoized.clear = fn.stats, fn.clear
+    return memoized
+
+def attr(obj, name):
+    if isinstance(obj, dict) and name in obj:
+        return obj[name]
+    return getattr(obj, name)
+
+def aug_attr(obj, name, op, value):
+    op = _AUG_OPS[op]
+    if isinstance(obj, dict) and name in obj:
+        value = obj[name] = op(obj[name], value)
+    else:
+        value = op(getattr(obj, name), value)
+        setattr(obj, name, value)
+    return value
+
+def sliced(container, start, stop, step):
+    return slice_value(container, slice(start, stop, step))
+
+def import_python(g):
+    g["python"] = python
+
+def import_module(g, name, pyname, path):
+    """`import name`: load the module once, bind it (nested namespaces for
+    dotted names) and make its names visible to the importer."""
+    module = sys.modules.get(pyname) or _load(pyname, path)
+    parts  = name.split(".")
+    env    = g
+    for part in parts[:-1]:
+        ns = env.get(part)
+        if not isinstance(ns, types.SimpleNamespace):
+            ns = env[part] = types.SimpleNamespace()
+        env = ns.__dict__
+    env[parts[-1]] = module
+
+    # Own globals win over imported names, imported names over builtins;
+    # first import wins.
+    names  = g["__mscript_names__"]
+    values = module.__dict__
+    for n in values.get("__mscript_names__", ()):
+        if n in values and (n not in g or (n in _b and g[n] is _b[n])):
+            g[n] = values[n]
+            names.append(n)
+
+def _load(pyname, path):
+    if not _from_source:
+        try:
+            return importlib.import_module(pyname)
+        except ModuleNotFoundError as e:
+            if e.name != pyname:
+                raise
+    code   = translate(path).code()
+    module = types.ModuleType(pyname)
+    module.__file__ = path
+    sys.modules[pyname] = module
+    try:
+        exec(code, module.__dict__)
+    except BaseException:
+        del sys.modules[pyname]
+        raise
+    return module
+
+def _mscript_line(lines, lineno):
+    index = min(lineno, len(lines)) - 1
+    while index >= 0 and not lines[index]:
+        index -= 1
+    return lines[index] if index >= 0 else 0
+
+def error_location(tb):
+    """`file:line` of the innermost Mscript frame of a traceback."""
+    location = None
+    while tb is not None:
+        g = tb.tb_frame.f_globals
+        lines = g.get("__mscript_lines__")
+        if lines:
+            location = f"{g['__mscript_file__']}:{_mscript_line(lines, tb.tb_lineno)}"
+        tb = tb.tb_next
+    return location
+
+def format_error(e):
+    location = error_location(e.__traceback__)
+    message  = f"{type(e).__name__}: {e}"
+    return f"{location}: {message}" if location else message
+
+def excepthook(etype, value, tb):
+    if issubclass(etype, KeyboardInterrupt):
+        return sys.__excepthook__(etype, value, tb)
+    print(format_error(value), file=sys.stderr)
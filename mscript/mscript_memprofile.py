@@ -0,0 +1,219 @@
+# mscript_memprofile.py - memory profiling by Mscript source line (--memprofile)
+
+"""
+tracemalloc only sees Python frames, which for an interpreted program are
+all inside it.py. While profiling, every node is run through a one-line
+trampoline function compiled with the node's Mscript file name and line
+number, so the tracebacks tracemalloc records contain the Mscript lines
+being executed; the innermost one is charged with the allocation. The line
+running when the peak was reached is remembered too.
+
+Lines are credited to the Mscript function executing them, found from the
+innermost FunctionRef.call frame, which also sees functions of imported
+modules and tail calls. Quickening is switched off while profiling: the
+specialized handlers evaluate their operands without going through visit.
+
+Scripts can take snapshots and diff them through std/memprof.
+"""
+
+import sys
+import tracemalloc
+
+# Python frames kept per allocation: enough to reach the innermost Mscript
+# line through the interpreter's own frames. Each extra frame slows every
+# allocation down.
+_NFRAMES = 16
+# Innermost Mscript calls remembered with the peak.
+_PEAK_CALLS = 4
+
+_interpreter = None   # the profiled class, once start() has patched it
+_call_code   = None   # code of FunctionRef.call, which marks Mscript calls
+
+_trampolines = {}   # (filename, line) -> trampoline
+_functions   = {}   # (filename, line) -> Mscript function name
+
+_peak    = 0
+_peak_at = None   # (filename, line, innermost Mscript calls)
+_current = None   # (filename, line) of the innermost trampoline
+
+def _trampoline(key):
+    filename, line = key
+    source = "\n" * (line - 1) + "def _line(handler, tree): return handler(tree)\n"
+    namespace = {}
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace["_line"]
+
+def _profiled_visit(self, tree):
+    global _current
+    line = tree.line
+    key  = (self.filename, line)
+    if line is None or key == _current:
+        # the trampoline of the enclosing node already names this line
+        return getattr(self, tree.data)(tree)
+    run = _trampolines.get(key)
+    if run is None:
+        calls = _calls(sys._getframe(), 1, self)
+        _functions[key] = calls[0] if calls else "<module>"
+        run = _trampolines[key] = _trampoline(key)
+    outer, _current = _current, key
+    try:
+        return run(getattr(self, tree.data), tree)
+    finally:
+        _current = outer
+        _check_peak(key)
+
+def _calls(frame, limit, interpreter=None):
+    """Names of the innermost `limit` Mscript calls active in `frame`,
+    innermost first. With `interpreter`, a call made by another
+    interpreter ends the search: the code is then that module's top level."""
+    names = []
+    while frame is not None and len(names) < limit:
+        if frame.f_code is _call_code:
+            local = frame.f_locals
+            fn = local.get("fn") or local["self"]   # `fn` moves on at tail calls
+            if interpreter is not None and fn.interpreter is not interpreter:
+                break
+            names.append(fn.name)
+        frame = frame.f_back
+    return names
+
+def _check_peak(key):
+    global _peak, _peak_at
+    peak = tracemalloc.get_traced_memory()[1]
+    if peak > _peak:
+        calls = _calls(sys._getframe(), _PEAK_CALLS)
+        calls.reverse()
+        _peak, _peak_at = peak, (key[0], key[1], tuple(calls))
+
+def start(interpreter_class):
+    """Start tracing and attribute allocations made by `interpreter_class`."""
+    global _interpreter, _call_code
+    if _interpreter is not None:
+        return
+    tracemalloc.start(_NFRAMES)
+    # every node now adds a trampoline frame
+    sys.setrecursionlimit(sys.getrecursionlimit() * 2)
+    _interpreter = interpreter_class
+    _call_code   = sys.modules[interpreter_class.__module__].FunctionRef.call.__code__
+    interpreter_class.visit    = _profiled_visit
+    interpreter_class.adaptive = False
+
+def enabled():
+    return _interpreter is not None
+
+def _require():
+    if _interpreter is None:
+        raise RuntimeError("memory profiling is off; run the script with --memprofile")
+
+# ——— snapshots ———
+
+def _by_line(snapshot):
+    """(filename, line) -> bytes allocated there and still alive."""
+    lines = {}
+    for trace in snapshot.traces:
+        for frame in reversed(trace.traceback):   # innermost first
+            key = (frame.filename, frame.lineno)
+            if key in _trampolines:
+                lines[key] = lines.get(key, 0) + trace.size
+                break
+    return lines
+
+class Snapshot:
+    """Memory still allocated by each Mscript line at one point of the program."""
+    __slots__ = ("lines", "current", "peak")
+
+    def __init__(self):
+        self.current, self.peak = tracemalloc.get_traced_memory()
+        self.lines = _by_line(tracemalloc.take_snapshot())
+
+    def __repr__(self):
+        return f"<memory snapshot: {format_bytes(self.current)} allocated, {len(self.lines)} lines>"
+
+def snapshot():
+    _require()
+    return Snapshot()
+
+def diff(before, after, limit=10):
+    """Lines whose allocations changed the most between two snapshots."""
+    changes = []
+    for key in after.lines.keys() | before.lines.keys():
+        delta = after.lines.get(key, 0) - before.lines.get(key, 0)
+        if delta:
+            changes.append({"line": f"{key[0]}:{key[1]}", "function": _functions[key], "bytes": delta})
+    changes.sort(key=lambda c: -abs(c["bytes"]))
+    return changes[:limit]
+
+# ——— reporting ———
+
+def format_bytes(n):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+def deep_size(value, seen=None):
+    """Bytes held by a value and the containers and strings inside it."""
+    if seen is None:
+        seen = set()
+    pending, total = [value], 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            continue
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+    return total
+
+def _describe(value):
+    kind = type(value).__name__
+    try:
+        return f"{kind}, {len(value)} items"
+    except TypeError:
+        return kind
+
+def largest_globals(env, limit=5):
+    """(name, bytes, description) of the biggest values in a global scope."""
+    sizes = []
+    for name, value in env.items():
+        if callable(value) or type(value).__name__ == "MscriptModule":
+            continue
+        sizes.append((name, deep_size(value), _describe(value)))
+    sizes.sort(key=lambda s: -s[1])
+    return sizes[:limit]
+
+def report(global_env, limit=10, out=sys.stderr):
+    """Print the peak, the top lines by memory still allocated and the
+    largest globals of the main program."""
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()   # the report itself need not be traced
+    lines = _by_line(snapshot)
+    where = ""
+    if _peak_at is not None:
+        filename, line, calls = _peak_at
+        where = f" at {filename}:{line}"
+        if calls:
+            where += f" in {' > '.join(calls)}"
+    print(f"memory profile: peak {format_bytes(peak)}{where}, {format_bytes(current)} still allocated",
+          file=out)
+
+    top = sorted(lines.items(), key=lambda kv: -kv[1])[:limit]
+    if top:
+        print("top lines by memory still allocated:", file=out)
+        for (filename, line), size in top:
+            print(f"  {format_bytes(size):>10}  {filename}:{line}  {_functions[(filename, line)]}", file=out)
+
+    biggest = largest_globals(global_env)
+    if biggest:
+        print("largest globals:", file=out)
+        for name, size, description in biggest:
+            print(f"  {format_bytes(size):>10}  {name} ({description})", file=out)
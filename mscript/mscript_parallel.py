@@ -0,0 +1,71 @@
+# mscript_parallel.py - process-pool map for Mscript functions (std/parallel)
+
+import hashlib
+import multiprocessing
+import os
+import pickle
+
+# Pools are kept alive between calls so workers (and the programs they have
+# already loaded) are reused.
+_pools = {}
+
+# Worker side: programs already rebuilt in this process, by payload digest.
+_programs = {}
+_MAX_PROGRAMS = 8
+
+def _get_pool(workers):
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = multiprocessing.get_context().Pool(workers)
+        _pools[workers] = pool
+    return pool
+
+def _identity(fn):
+    return fn
+
+def _run_chunk(task):
+    key, payload, chunk = task
+    fn = _programs.get(key)
+    if fn is None:
+        loader, program = pickle.loads(payload)
+        fn = loader(program)
+        if len(_programs) >= _MAX_PROGRAMS:
+            _programs.clear()
+        _programs[key] = fn
+    return [fn(item) for item in chunk]
+
+def parallel_map(fn, items, workers=None, chunksize=None):
+    """Apply the Mscript function `fn` to every item in worker processes.
+
+    Results are returned in input order. `fn` is shipped together with the
+    functions and globals it references; every worker rebuilds it once and
+    keeps it for later chunks and later calls. Functions of programs
+    translated with `--emit-py` are plain Python and travel by reference.
+    """
+    if not callable(fn):
+        raise TypeError("parallel map() expects a function")
+    items   = list(items)
+    workers = int(workers or os.cpu_count() or 1)
+    if not items:
+        return []
+    if not chunksize:
+        chunksize = max(1, -(-len(items) // (workers * 4)))
+
+    if hasattr(fn, "interpreter"):
+        payload = pickle.dumps(fn.interpreter.export_function(fn))
+    else:
+        payload = pickle.dumps((_identity, fn))
+    key     = hashlib.sha1(payload).hexdigest()
+    tasks   = [(key, payload, items[i:i + chunksize])
+               for i in range(0, len(items), chunksize)]
+
+    results = []
+    for chunk in _get_pool(workers).imap(_run_chunk, tasks):
+        results.extend(chunk)
+    return results
+
+def shutdown():
+    """Stop every worker pool started by parallel_map()."""
+    for pool in _pools.values():
+        pool.terminate()
+    _pools.clear()
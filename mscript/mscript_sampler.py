@@ -0,0 +1,128 @@
+# mscript_sampler.py - sampling profiler for Mscript programs (--sample)
+
+"""
+A timer thread wakes `rate` times a second, takes the Python stack of the
+profiled thread from sys._current_frames() and turns it into the Mscript
+call stack: every FunctionRef.call frame starts a Mscript function, and the
+innermost `visit` frame under it says which node, hence which line, that
+function is executing. Stacks are counted in Brendan Gregg's folded format
+(`<module> (app.mscript:12);work (app.mscript:5) 31`), which flamegraph.pl,
+speedscope and similar tools read.
+
+The program itself is never traced, so the cost is one stack walk per
+sample rather than a hook on every node.
+"""
+
+import collections
+import signal
+import sys
+import threading
+import time
+
+class Sampler:
+    """Samples the thread that created it; see the module docstring."""
+
+    def __init__(self, interpreter, rate=100, thread_id=None):
+        it = sys.modules[type(interpreter).__module__]
+        self._call_code = it.FunctionRef.call.__code__
+        self._interpreter_class = it.MscriptInterpreter
+        self._filename  = interpreter.filename
+        self.interval   = 1.0 / rate
+        self.thread_id  = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks     = collections.Counter()   # tuple of frame labels -> samples
+        self.samples    = 0
+        self._wake      = threading.Event()
+        self._thread    = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._wake.clear()
+            self._thread = threading.Thread(target=self._run, name="mscript-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._wake.set()
+            if thread is not threading.current_thread():
+                thread.join()
+        return self
+
+    def _run(self):
+        wake, interval = self._wake, self.interval
+        due = time.monotonic()
+        while True:
+            # keep to the rate even though each sample first waits for the GIL
+            due = max(due + interval, time.monotonic())
+            if wake.wait(due - time.monotonic()):
+                break
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:   # the profiled thread has finished
+                break
+            self.stacks[self._mscript_stack(frame)] += 1
+            self.samples += 1
+            del frame
+
+    def _mscript_stack(self, frame):
+        """Labels of the Mscript calls active in `frame`, outermost first."""
+        call_code, interpreter_class = self._call_code, self._interpreter_class
+        labels, node = [], None
+        while frame is not None:
+            code = frame.f_code
+            if code is call_code:
+                local = frame.f_locals
+                labels.append(_label(local.get("fn") or local.get("self"), node))
+                node = None
+            elif node is None and code.co_name in ("visit", "_profiled_visit"):
+                local = frame.f_locals
+                interp = local.get("self")
+                if isinstance(interp, interpreter_class):
+                    node = (interp.filename, getattr(local.get("tree"), "line", None))
+            frame = frame.f_back
+        labels.append(_label(None, node or (self._filename, None)))
+        labels.reverse()
+        return tuple(labels)
+
+    # ——— output ———
+
+    def folded(self):
+        """The samples as folded stacks, one `frame;frame;... count` per line."""
+        return "".join(f"{';'.join(stack)} {count}\n"
+                       for stack, count in sorted(self.stacks.items()))
+
+    def write(self, path):
+        with open(path, "w") as f:
+            f.write(self.folded())
+
+    def top(self, limit=10):
+        """(label, samples) of the frames most often on top of the stack."""
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack[-1]] += count
+        return leaves.most_common(limit)
+
+def _label(fn, node):
+    name = getattr(fn, "name", None) or "<module>"
+    if node is None:   # sampled before the call's first node ran
+        interp = getattr(fn, "interpreter", None)
+        return f"{name} ({interp.filename})" if interp is not None else name
+    filename, line = node
+    return f"{name} ({filename}:{line})" if line is not None else f"{name} ({filename})"
+
+def toggle_on_signal(interpreter, path, signum=None):
+    """Make `signum` (SIGUSR2 by default) start and stop `interpreter`'s
+    sampler; each stop writes the samples so far to `path`. Must be called
+    from the main thread."""
+    if signum is None:
+        signum = signal.SIGUSR2
+    def handler(signum, frame):
+        if interpreter.sampling():
+            interpreter.stop_sampling().write(path)
+        else:
+            interpreter.start_sampling()
+    signal.signal(signum, handler)
@@ -0,0 +1,355 @@
+# mscript_serve.py - pre-forking HTTP server for Mscript handlers (mscript serve)
+
+"""
+`mscript serve app.mscript` loads the script once, compiled to Python (or
+interpreted with --interpreted), binds the listening socket and then forks
+the workers, which share the loaded program copy-on-write and take turns
+accepting connections. A crashed worker is replaced.
+
+The script provides either
+  * `routes`: a dict from "/path" or "METHOD /path" to a handler taking a
+    request dict (method, path, query, headers, body), or
+  * `app`: any WSGI application, e.g. a Flask app.
+
+Latency histograms per route live in shared memory, one row per worker so
+no locking is needed on the request path, and are served as JSON from
+/__mscript/stats.
+"""
+
+import json
+import mmap
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+import urllib.parse
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+
+STATS_PATH = "/__mscript/stats"
+
+_STATUS = {200: "OK", 201: "Created", 204: "No Content", 301: "Moved Permanently",
+           302: "Found", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized",
+           403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+class Response:
+    """What std/serve's response() builds: a status, a body and headers."""
+    __slots__ = ("status", "body", "headers")
+
+    def __init__(self, status=200, body="", headers=None):
+        self.status  = int(status)
+        self.body    = body
+        self.headers = dict(headers or {})
+
+# ——— Mscript handlers as a WSGI app ———
+
+def _request(environ):
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    body = environ["wsgi.input"].read(length) if length > 0 else b""
+    headers = {key[5:].replace("_", "-").title(): value
+               for key, value in environ.items() if key.startswith("HTTP_")}
+    if environ.get("CONTENT_TYPE"):
+        headers["Content-Type"] = environ["CONTENT_TYPE"]
+    query = urllib.parse.parse_qs(environ.get("QUERY_STRING", ""))
+    return {
+        "method":  environ["REQUEST_METHOD"],
+        "path":    environ.get("PATH_INFO") or "/",
+        "query":   {k: v[0] if len(v) == 1 else v for k, v in query.items()},
+        "headers": headers,
+        "body":    body.decode("utf-8", "replace"),
+    }
+
+def _encode(result):
+    """(status, headers, body bytes) for whatever a handler returned."""
+    if isinstance(result, Response):
+        status, headers, body = result.status, result.headers, result.body
+    else:
+        status, headers, body = 200, {}, result
+    if body is None:
+        data, kind = b"", None
+        if status == 200:
+            status = 204
+    elif isinstance(body, (bytes, bytearray, memoryview)):
+        data, kind = bytes(body), "application/octet-stream"
+    elif isinstance(body, str):
+        data = body.encode()
+        kind = "text/html; charset=utf-8" if body.lstrip().startswith("<") else "text/plain; charset=utf-8"
+    else:
+        data, kind = json.dumps(body, default=str).encode(), "application/json"
+    if kind and not any(k.lower() == "content-type" for k in headers):
+        headers["Content-Type"] = kind
+    headers["Content-Length"] = str(len(data))
+    return status, headers, data
+
+def _status_line(status):
+    return f"{status} {_STATUS.get(status, 'Unknown')}"
+
+class MscriptApp:
+    """WSGI application dispatching to the handlers of a `routes` dict."""
+
+    def __init__(self, routes, describe_error=str):
+        self.routes = {str(key): handler for key, handler in routes.items()}
+        self.describe_error = describe_error
+
+    def route(self, method, path):
+        """The routes key that serves `method path`, or None."""
+        for key in (f"{method} {path}", path):
+            if key in self.routes:
+                return key
+        return None
+
+    def __call__(self, environ, start_response):
+        request = _request(environ)
+        key = environ["mscript.route"] = self.route(request["method"], request["path"])
+        if key is None:
+            status, headers, data = _encode(Response(404, "Not Found"))
+        else:
+            try:
+                status, headers, data = _encode(self.routes[key](request))
+            except Exception as e:
+                print(f"{request['method']} {request['path']}: {self.describe_error(e)}", file=sys.stderr)
+                status, headers, data = _encode(Response(500, "Internal Server Error"))
+        start_response(_status_line(status), list(headers.items()))
+        return [data]
+
+# ——— latency histograms ———
+
+# bucket upper bounds in milliseconds; the last bucket takes the rest
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+_MAX_ROUTES = 64
+_NAME_SIZE  = 120
+_ROW        = len(BUCKETS_MS) + 2   # bucket counts, overflow, total microseconds
+
+class LatencyStats:
+    """Per-route latency histograms in anonymous shared memory.
+
+    Created before forking, so every worker maps the same pages. Each
+    worker only writes its own row; route names are registered under a
+    lock the first time a route is seen.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._lock   = multiprocessing.Lock()
+        size = 8 + _MAX_ROUTES * _NAME_SIZE + workers * _MAX_ROUTES * _ROW * 8
+        self._mem    = mmap.mmap(-1, size)
+        self._count  = memoryview(self._mem)[:8].cast("q")
+        self._names  = memoryview(self._mem)[8:8 + _MAX_ROUTES * _NAME_SIZE]
+        self._cells  = memoryview(self._mem)[8 + _MAX_ROUTES * _NAME_SIZE:].cast("q")
+        self._known  = {}   # this process's cache of route name -> index
+        self.slot    = 0    # the row this process writes
+        self._index("(other)")   # where routes beyond _MAX_ROUTES are counted
+
+    def _name(self, index):
+        raw = bytes(self._names[index * _NAME_SIZE:(index + 1) * _NAME_SIZE])
+        return raw.rstrip(b"\0").decode("utf-8", "replace")
+
+    def _index(self, route):
+        index = self._known.get(route)
+        if index is not None:
+            return index
+        with self._lock:
+            count = self._count[0]
+            for i in range(count):
+                if self._name(i) == route:
+                    index = i
+                    break
+            else:
+                if count == _MAX_ROUTES:
+                    return None
+                index = count
+                raw = route.encode()[:_NAME_SIZE]
+                self._names[index * _NAME_SIZE:index * _NAME_SIZE + len(raw)] = raw
+                self._count[0] = count + 1
+        self._known[route] = index
+        return index
+
+    def record(self, route, seconds):
+        index = self._index(route)
+        if index is None:
+            index = self._known["(other)"]
+        base = (self.slot * _MAX_ROUTES + index) * _ROW
+        ms = seconds * 1000
+        bucket = len(BUCKETS_MS)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                bucket = i
+                break
+        cells = self._cells
+        cells[base + bucket] += 1
+        cells[base + _ROW - 1] += int(seconds * 1_000_000)
+
+    def summary(self):
+        """{route: {count, mean_ms, p50_ms, p90_ms, p99_ms, buckets}} over all workers."""
+        cells, result = self._cells, {}
+        for index in range(self._count[0]):
+            row = [0] * _ROW
+            for slot in range(self.workers):
+                base = (slot * _MAX_ROUTES + index) * _ROW
+                for i in range(_ROW):
+                    row[i] += cells[base + i]
+            counts = row[:-1]
+            total  = sum(counts)
+            if not total:
+                continue
+            labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+            result[self._name(index)] = {
+                "count":   total,
+                "mean_ms": round(row[-1] / total / 1000, 3),
+                "p50_ms":  _percentile(counts, total, 0.50),
+                "p90_ms":  _percentile(counts, total, 0.90),
+                "p99_ms":  _percentile(counts, total, 0.99),
+                "buckets": dict(zip(labels, counts)),
+            }
+        return result
+
+def _percentile(counts, total, q):
+    """Upper bound of the bucket holding the q-th request (None past the last bound)."""
+    seen = 0
+    for i, n in enumerate(counts):
+        seen += n
+        if seen >= q * total:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else None
+    return None
+
+class TimedApp:
+    """Wraps a WSGI app: records each request's latency under its route and
+    answers STATS_PATH itself."""
+
+    def __init__(self, app, stats):
+        self.app   = app
+        self.stats = stats
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") == STATS_PATH:
+            data = json.dumps({"workers": self.stats.workers, "routes": self.stats.summary()},
+                              indent=2).encode()
+            start_response("200 OK", [("Content-Type", "application/json"),
+                                      ("Content-Length", str(len(data)))])
+            return [data]
+        start = time.perf_counter()
+        try:
+            result = self.app(environ, start_response)
+            try:
+                return list(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        finally:
+            route = environ.get("mscript.route", environ.get("PATH_INFO") or "/")
+            self.stats.record(route if route is not None else "(no route)",
+                              time.perf_counter() - start)
+
+# ——— loading ———
+
+def load_app(path, compiled=True, max_recursion=None):
+    """The WSGI app defined by the script at `path`."""
+    if compiled:
+        import mscript_compiler
+        namespace = vars(mscript_compiler.run(path, max_recursion))
+        describe_error = mscript_compiler.format_error
+    else:
+        import it
+        interp = it.MscriptInterpreter(filename=path)
+        with open(path) as f:
+            tree = it.parse(f.read())
+        interp.visit(tree)
+        namespace, describe_error = interp.global_env, str
+    routes = namespace.get("routes")
+    if isinstance(routes, dict):
+        return MscriptApp(routes, describe_error)
+    app = namespace.get("app")
+    if callable(app):
+        return app
+    raise ValueError(f"{path} defines neither a `routes` dict nor a WSGI `app`")
+
+# ——— serving ———
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def _serve_forever(sock, app):
+    server = WSGIServer(sock.getsockname()[:2], _QuietHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.server_name, server.server_port = sock.getsockname()[:2]
+    server.setup_environ()
+    server.set_app(app)
+    server.serve_forever()
+
+def _fork_worker(sock, app, stats, slot):
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 0
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)   # the parent shuts workers down
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        stats.slot = slot
+        _serve_forever(sock, app)
+    except BaseException as e:
+        print(f"worker {slot}: {e}", file=sys.stderr)
+        code = 1
+    finally:
+        os._exit(code)
+
+def print_summary(stats, out=sys.stderr):
+    for route, s in sorted(stats.summary().items()):
+        print(f"  {route}: {s['count']} requests, mean {s['mean_ms']} ms, "
+              f"p50 <={s['p50_ms']} ms, p99 <={s['p99_ms']} ms", file=out)
+
+def serve(path, host="127.0.0.1", port=8000, workers=None, compiled=True, max_recursion=None):
+    """Load `path` and serve it with `workers` forked processes until
+    SIGINT or SIGTERM."""
+    os.environ["MSCRIPT_SERVE"] = "1"   # lets scripts skip starting their own server
+    app = load_app(path, compiled, max_recursion)
+
+    can_fork = hasattr(os, "fork")
+    workers  = max(1, workers or os.cpu_count() or 1) if can_fork else 1
+    stats    = LatencyStats(workers)
+    app      = TimedApp(app, stats)
+
+    sock = socket.create_server((host, port), backlog=128)
+    sock.setblocking(False)   # idle workers woken for a connection another one took return to select()
+    host, port = sock.getsockname()[:2]
+    print(f"serving {path} on http://{host}:{port} with {workers} worker{'s' * (workers != 1)}"
+          f" ({'compiled' if compiled else 'interpreted'})", file=sys.stderr, flush=True)
+
+    if not can_fork:
+        try:
+            _serve_forever(sock, app)
+        except KeyboardInterrupt:
+            pass
+        print_summary(stats)
+        return
+
+    children = {_fork_worker(sock, app, stats, slot): slot for slot in range(workers)}
+    stopping = False
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            print(f"worker {slot} exited ({status}); restarting", file=sys.stderr)
+            children[_fork_worker(sock, app, stats, slot)] = slot
+    sock.close()
+    print_summary(stats)
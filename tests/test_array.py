@@ -0,0 +1,25 @@
+import unittest
+
+from util import run
+
+class IntegerOverflow(unittest.TestCase):
+    """Integer results wrap to the element width on the array.array backend,
+    as they do with NumPy."""
+
+    def test_results_wrap_around(self):
+        result = run('''import "std/array"
+a = array.new("u8", [200, 10])
+print array.to_list(a + 100)
+print array.to_list(array.new("u8", [5]) - 10)
+print array.to_list(array.new("i8", [100, -100]) * 2)
+print array.to_list(array.new("i32", [2147483647]) + array.new("i32", [1]))
+b = array.new("u16", [65535])
+b += 2
+print array.to_list(b)
+''', env={"MSCRIPT_ARRAY_BACKEND": "array"})
+        self.assertEqual(result.stderr, "")
+        self.assertEqual(result.stdout.splitlines(),
+                         ["[44, 110]", "[251]", "[-56, 56]", "[-2147483648]", "[1]"])
+
+if __name__ == "__main__":
+    unittest.main()
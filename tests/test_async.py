@@ -0,0 +1,34 @@
+import unittest
+
+from util import run
+
+class AwaitInArguments(unittest.TestCase):
+    def test_awaited_positional_and_keyword_arguments(self):
+        result = run('''
+import "std/asyncio"
+
+async def inner(i) {
+    await asyncio.sleep(0)
+    return i * 10
+}
+
+def pair(a, b) {
+    return [a, b]
+}
+
+async def main() {
+    r = []
+    for i in range(0, 3) {
+        r.append(await inner(i))
+    }
+    print r
+    print pair(await inner(1), b=await inner(2))
+}
+
+asyncio.run(main())
+''')
+        self.assertEqual(result.stderr, "")
+        self.assertEqual(result.stdout.splitlines(), ["[0, 10, 20]", "[10, 20]"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from util import run
+
+PROGRAM = '''
+import python
+
+n = 10
+n += 5
+n -= 3
+n *= 2
+n /= 4
+n **= 2
+n %= 7
+print n
+
+xs = [1, 2]
+alias = xs
+xs += [3]
+print xs, alias
+
+d = {"k": 1}
+d["k"] += 41
+counts = [0, 0]
+counts[1] -= 1
+print d, counts
+
+s = "ab"
+s += "c"
+print s
+
+o = python.types.SimpleNamespace()
+set_attr(o, "total", 1)
+o.total += 9
+print o.total
+
+def bump(v) {
+    v += 1
+    return v
+}
+print bump(1)
+'''
+
+class AugmentedAssignment(unittest.TestCase):
+    def test_names_indexes_and_attributes(self):
+        for flags in ((), ("--compiled",)):
+            with self.subTest(flags=flags):
+                result = run(PROGRAM, *flags)
+                self.assertEqual(result.stderr, "")
+                # `+=` on a list extends it in place, so the alias sees it too
+                self.assertEqual(result.stdout.splitlines(),
+                                 ["1.0", "[1, 2, 3] [1, 2, 3]", "{'k': 42} [0, -1]", "abc", "10", "2"])
+
+    def test_undefined_name(self):
+        result = run("missing += 1\n")
+        self.assertEqual(result.stdout, "main.mscript:1:1: Variable 'missing' is not defined.\n")
+
+if __name__ == "__main__":
+    unittest.main()
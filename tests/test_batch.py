@@ -0,0 +1,106 @@
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from util import IT, write
+
+SCRIPT = '''import "std/sys"
+
+seen = []
+
+def main(path) {
+    seen.append(path)
+    print "processing", path
+    if path == "bad" {
+        return 1 / 0
+    }
+    return {"input": path, "count": len(seen), "argv": sys.argv()}
+}
+
+def shout(path) {
+    return path + "!"
+}
+
+if len(sys.argv()) > 2 {
+    print main(sys.argv()[2])["count"]
+}
+'''
+
+TIMING = re.compile(r"^ +\d+\.\d{3} ms  (.*)$")
+
+# interpreted errors carry a column, compiled ones the Python exception name
+MODES = (((), "t.mscript:9:16: division by zero"),
+         (("--compiled",), "t.mscript:9: ZeroDivisionError: division by zero"))
+
+class Batch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        write(self.tmp.name, "t.mscript", SCRIPT)
+
+    def mscript(self, *args, stdin=None):
+        return subprocess.run([sys.executable, IT, *args], input=stdin, capture_output=True, text=True,
+                              cwd=self.tmp.name, timeout=120)
+
+    def test_batch(self):
+        for flags, error in MODES:
+            with self.subTest(flags=flags):
+                r = self.mscript("--batch", "t.mscript", "a", "bad", "c", *flags)
+                self.assertEqual(r.returncode, 1)
+                # the script's own top-level argument check does not run
+                self.assertEqual(r.stdout, "processing a\nprocessing bad\nprocessing c\n")
+                lines = r.stderr.splitlines()
+                self.assertEqual([TIMING.match(line).group(1) for line in lines[:3]],
+                                 ["a", "bad: " + error, "c"])
+                self.assertRegex(lines[3], r"^batch: 3 inputs, 1 failed; load [\d.]+ ms, run [\d.]+ ms "
+                                           r"\([\d.]+ ms per input, 1 job\)$")
+                self.assertEqual(len(lines), 4)
+
+    def test_batch_jobs_keep_input_order(self):
+        r = self.mscript("--batch", "t.mscript", *"abcdef", "--jobs", "2")
+        self.assertEqual(r.returncode, 0)
+        lines = r.stderr.splitlines()
+        self.assertEqual([TIMING.match(line).group(1) for line in lines[:6]], list("abcdef"))
+        self.assertRegex(lines[6], r"^batch: 6 inputs, 0 failed; .*, 2 jobs\)$")
+
+    def test_worker(self):
+        for flags, error in MODES:
+            with self.subTest(flags=flags):
+                r = self.mscript("--worker", "t.mscript", *flags, stdin="a\nbad\n\nc\n")
+                self.assertEqual(r.returncode, 0)
+                self.assertEqual(r.stderr, "processing a\nprocessing bad\nprocessing c\n")
+                replies = [json.loads(line) for line in r.stdout.splitlines()]
+                for reply in replies:
+                    self.assertIsInstance(reply.pop("ms"), float)
+                # globals are kept between inputs; sys.argv() names the input
+                self.assertEqual(replies, [
+                    {"input": "a", "ok": True,
+                     "result": {"input": "a", "count": 1, "argv": [IT, "t.mscript", "a"]}},
+                    {"input": "bad", "ok": False, "error": error},
+                    {"input": "c", "ok": True,
+                     "result": {"input": "c", "count": 3, "argv": [IT, "t.mscript", "c"]}},
+                ])
+
+    def test_worker_jobs_and_entry(self):
+        r = self.mscript("--worker", "t.mscript", "--jobs", "2", "--entry", "shout", stdin="".join(f"{i}\n" for i in range(8)))
+        self.assertEqual(r.returncode, 0)
+        self.assertEqual([json.loads(line)["result"] for line in r.stdout.splitlines()], [f"{i}!" for i in range(8)])
+
+    def test_batch_beats_one_run_per_input(self):
+        # the comparison behind the README's batch mode figure
+        inputs = [f"in{i}" for i in range(10)]
+        start = time.perf_counter()
+        for name in inputs:
+            self.assertEqual(self.mscript("t.mscript", name).stdout.splitlines()[-1], "1")
+        separate = time.perf_counter() - start
+        start = time.perf_counter()
+        self.assertEqual(self.mscript("--batch", "t.mscript", *inputs).returncode, 0)
+        batch = time.perf_counter() - start
+        self.assertLess(batch * 5, separate, f"{separate:.2f} s as runs, {batch:.2f} s as one batch")
+
+if __name__ == "__main__":
+    unittest.main()
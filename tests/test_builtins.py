@@ -0,0 +1,71 @@
+import unittest
+
+from util import run
+
+PROGRAM = '''
+xs = [3, 1, 2]
+x = "outer"
+print [x * x for x in xs if x > 1], x
+print {x: x * 10 for x in xs}
+
+def sub(a, b) {
+    return a - b
+}
+print sub(b=1, a=10), sub(5, b=2)
+
+def neg(v) {
+    return 0 - v
+}
+print sorted(xs), sorted(xs, key=neg), sorted(["bb", "a"], key=len)
+print map(neg, xs), filter(neg, [0, 1]), sum(xs), min(xs), max(xs)
+print enumerate(["a", "b"]), zip(xs, ["a", "b", "c"])
+
+s = {1, 2, 3}
+print s | {4}, s & {2, 9}, 2 in s, set([1, 1, 2])
+'''
+
+EXPECTED = [
+    "[9, 4] outer",
+    "{3: 30, 1: 10, 2: 20}",
+    "9 3",
+    "[1, 2, 3] [3, 2, 1] ['a', 'bb']",
+    "[-3, -1, -2] [1] 6 1 3",
+    "[(0, 'a'), (1, 'b')] [(3, 'a'), (1, 'b'), (2, 'c')]",
+    "{1, 2, 3, 4} {2} True {1, 2}",
+]
+
+# std/parallel and std/array define functions named like the builtins above;
+# once imported they take over the bare names. fsum() on the f64 array
+# gives 1.0 where Python's sum() of the same values gives 0.9999999999999999.
+SHADOWED = '''
+import "std/parallel"
+import "std/array"
+
+def sq(v) {
+    return v * v
+}
+print map(sq, [1, 2, 3], 2, 1)
+
+a = array.new("f64", [0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1])
+print sum(a), min(array.new("i32", [4, -2])), max(array.new("i32", [4, -2]))
+'''
+
+class Builtins(unittest.TestCase):
+    """Comprehensions, keyword arguments, sets and the higher-order builtins."""
+
+    def test_program(self):
+        for flags in ((), ("--compiled",)):
+            with self.subTest(flags=flags):
+                result = run(PROGRAM, *flags)
+                self.assertEqual(result.stderr, "")
+                self.assertEqual(result.stdout.splitlines(), EXPECTED)
+
+    def test_std_modules_shadow_builtins(self):
+        for flags in ((), ("--compiled",)):
+            with self.subTest(flags=flags):
+                result = run(SHADOWED, *flags)
+                self.assertEqual(result.stderr, "")
+                self.assertEqual(result.stdout.splitlines(), ["[1, 4, 9]", "1.0 -2 4"])
+
+if __name__ == "__main__":
+    unittest.main()
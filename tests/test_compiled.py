@@ -0,0 +1,93 @@
+import glob
+import importlib.util
+import os
+import re
+import unittest
+
+from util import ROOT, run
+
+EXAMPLES = sorted(glob.glob(os.path.join(ROOT, "examples", "*.mscript")))
+
+# examples that need a library, a display or a package not installed here
+SKIP = {
+    "ffi_example.mscript": "needs libSDL2 and a display",
+    "sdl_example.mscript": "needs PySDL2 and a display",
+}
+if importlib.util.find_spec("flask") is None:
+    SKIP["flask_example.mscript"] = "needs Flask"
+
+def normalized(output):
+    """Timings differ from run to run: replace every decimal number."""
+    return re.sub(r"\d+\.\d+(e-?\d+)?", "<n>", output)
+
+class Parity(unittest.TestCase):
+    """--compiled prints what the interpreter prints."""
+
+    def check(self, source, **kwargs):
+        interpreted = run(source, **kwargs)
+        compiled    = run(source, "--compiled", **kwargs)
+        self.assertEqual(normalized(compiled.stdout), normalized(interpreted.stdout))
+        self.assertEqual(compiled.stderr, interpreted.stderr)
+        return interpreted
+
+    def test_examples(self):
+        self.assertTrue(EXAMPLES)
+        for path in EXAMPLES:
+            name = os.path.basename(path)
+            with self.subTest(example=name):
+                if name in SKIP:
+                    self.skipTest(SKIP[name])
+                with open(path) as f:
+                    result = self.check(f.read(), env={"MSCRIPT_SERVE": "1"})
+                self.assertNotIn("Error", result.stdout)
+
+    def test_membership_in_constant_lists(self):
+        result = self.check('''
+x = [1]
+print x in [1, 2], 2 in [1, 2], {"a": 1} in ["a"]
+
+def has(v) {
+    return v in [1, "two", 3]
+}
+print has("two"), has([1]), has(4)
+''')
+        self.assertEqual(result.stdout, "False True False\nTrue False False\n")
+
+    def test_python_builtins_are_not_reachable(self):
+        source = '''
+try {
+    f = isinstance
+    print "reached"
+} catch {
+    print "isinstance is not defined"
+}
+
+def uses(list) {
+    return [abs for abs in list]
+}
+print uses([1, 2])
+open("file")
+'''
+        interpreted, compiled = run(source), run(source, "--compiled")
+        for result in (interpreted, compiled):
+            self.assertEqual(result.stdout.splitlines()[:2], ["isinstance is not defined", "[1, 2]"])
+        self.assertIn("main.mscript:13:1: Function 'open' is not defined.", interpreted.stdout)
+        self.assertIn("main.mscript:13: NameError: name 'open' is not defined", compiled.stdout)
+
+    def test_top_level_return_ends_its_statement(self):
+        result = self.check('''
+i = 0
+while i < 3 {
+    i = i + 1
+    try {
+        return i
+    } catch {
+        print "not caught"
+    }
+}
+print "after", i
+''')
+        self.assertEqual(result.stdout, "after 1\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from util import run
+
+class DottedNameCache(unittest.TestCase):
+    def test_rebound_namespace_attribute_is_seen(self):
+        result = run('''import python
+a = python.types.SimpleNamespace(x=1)
+b = python.types.SimpleNamespace(x=2)
+ns = python.types.SimpleNamespace(inner=a)
+def get() {
+    return ns.inner.x
+}
+print get()
+set_attr(ns, "inner", b)
+print get()
+''')
+        self.assertEqual(result.stdout.split(), ["1", "2"], result.stderr)
+
+    def test_dotted_import(self):
+        result = run('import pkg.mod\ni = 0\nwhile i < 2 {\n    print pkg.mod.f()\n    i += 1\n}\n',
+                     files={"pkg/mod.mscript": 'def f() {\n    return "f"\n}\n'})
+        self.assertEqual(result.stdout.split(), ["f", "f"], result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import platform
+import unittest
+
+from util import run
+
+SHADOW = '''
+import "std/platform"
+import "lib"
+print system()
+print len([1, 2, 3])
+print max([1])
+
+def max(x) {
+    return "own max"
+}
+'''
+
+LIB = '''
+def len(x) {
+    return "lib len"
+}
+
+def max(x) {
+    return "lib max"
+}
+'''
+
+class ImportedNames(unittest.TestCase):
+    """Names from imported modules shadow builtins; own globals shadow both."""
+
+    def check(self, *flags):
+        result = run(SHADOW, *flags, files={"lib.mscript": LIB})
+        self.assertEqual(result.stderr, "")
+        self.assertEqual(result.stdout.splitlines(), [platform.system(), "lib len", "own max"])
+
+    def test_module_function_named_like_a_builtin(self):
+        self.check()
+
+    def test_module_function_named_like_a_builtin_compiled(self):
+        self.check("--compiled")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from util import run
+
+SIZES = '''
+@cache(2)
+def sq(x) {
+    return x * x
+}
+for v in [1, 2, 3, 1] {
+    sq(v)
+}
+print sq.stats()
+
+@cache
+def cube(x) {
+    return x * x * x
+}
+print cube(3), cube(3), cube.stats()["hits"]
+
+@cache(maxsize=None)
+def ident(x) {
+    return x
+}
+print ident(1), ident.stats()["maxsize"]
+'''
+
+ASYNC = '''
+import "std/asyncio"
+
+@%s
+async def fetch(x) {
+    return x
+}
+'''
+
+class CacheDecorator(unittest.TestCase):
+    def check_sizes(self, *flags):
+        result = run(SIZES, *flags)
+        self.assertEqual(result.stderr, "")
+        self.assertEqual(result.stdout.splitlines(), [
+            "{'hits': 0, 'misses': 4, 'size': 2, 'maxsize': 2}",
+            "27 27 1",
+            "1 None",
+        ])
+
+    def test_positional_maxsize(self):
+        self.check_sizes()
+
+    def test_positional_maxsize_compiled(self):
+        self.check_sizes("--compiled")
+
+    def test_async_functions_are_refused(self):
+        for decorator in ("memo", "cache", "cache(8)"):
+            for flags in ((), ("--compiled",)):
+                with self.subTest(decorator=decorator, flags=flags):
+                    result = run(ASYNC % decorator, *flags)
+                    self.assertNotEqual(result.returncode, 0)
+                    self.assertIn("cannot memoize async function 'fetch'",
+                                  result.stdout + result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import re
+import unittest
+
+from util import run
+
+LIB = '''def build(n) {
+    out = []
+    i = 0
+    while i < n {
+        out.append(str(i) * 20)
+        i += 1
+    }
+    return out
+}
+'''
+
+MAIN = '''import "lib"
+def keep() {
+    return lib.build(3000)
+}
+data = keep()
+'''
+
+class ImportedFunctions(unittest.TestCase):
+    def test_lines_of_a_module_function_are_credited_to_it(self):
+        result = run(MAIN, "--memprofile", files={"lib.mscript": LIB})
+        report = result.stderr
+        self.assertRegex(report, r"lib\.mscript:5  build\n", report)
+        self.assertRegex(report, r"main\.mscript:3  keep\n", report)
+        self.assertIsNone(re.search(r"lib\.mscript:[2-8]  <module>", report), report)
+        self.assertIn(" in keep > build,", report.splitlines()[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from util import IT, MSCRIPT, write
+
+LIB = '''
+value = later()
+
+def later() {
+    return 42
+}
+
+def countdown(n) {
+    if n == 0 {
+        return "done"
+    }
+    return countdown(n - 1)
+}
+'''
+
+class PrecompiledModules(unittest.TestCase):
+    """Trees cached by `mpm` (it.compile_dir) load under `python it.py`."""
+
+    def test_cached_tree_keeps_hoisting_and_tail_calls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(tmp, "lib.mscript", LIB)
+            main = write(tmp, "main.mscript", 'import "lib"\nprint lib.value, lib.countdown(50000)\n')
+            subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {MSCRIPT!r}); "
+                            f"import it; assert not it.compile_dir({tmp!r})"], check=True)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "__mscache__", "lib.mscript.ast")))
+            result = subprocess.run([sys.executable, IT, main], capture_output=True, text=True, cwd=tmp)
+        self.assertEqual(result.stdout.strip(), "42 done", result.stdout + result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+
+import util   # puts mscript/ on sys.path
+import mpm
+
+def archive(text):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("lib.mscript", text)
+    return buffer.getvalue()
+
+class _Registry(BaseHTTPRequestHandler):
+    """Serves whatever archive the test put in `archives`."""
+    archives = {}
+
+    def do_GET(self):
+        body = self.archives.get(self.path.rsplit("/", 1)[-1])
+        self.send_response(200 if body is not None else 404)
+        self.end_headers()
+        self.wfile.write(body or b"")
+
+    def log_message(self, format, *args):
+        pass
+
+class _Index(BaseHTTPRequestHandler):
+    """A registry with package metadata and archives, answering slowly
+    enough that concurrent requests overlap. Records what was asked for."""
+    protocol_version = "HTTP/1.1"   # keep-alive, so connection reuse shows
+    packages = {}       # name -> dependencies
+    broken   = set()    # names whose download fails
+    lock     = threading.Lock()
+
+    @classmethod
+    def reset(cls, packages, broken=()):
+        cls.packages, cls.broken = packages, set(broken)
+        cls.requests, cls.connections = [], set()
+        cls.active = cls.most_active = 0
+
+    def do_GET(self):
+        with self.lock:
+            self.requests.append(self.path)
+            self.connections.add(self.client_address)
+            type(self).active += 1
+            type(self).most_active = max(self.most_active, self.active)
+        time.sleep(0.1)
+        *_, kind, name = self.path.split("/")
+        status, body = 404, b""
+        if name in self.packages and kind == "download":
+            if name not in self.broken:
+                status, body = 200, archive(f"name = {name!r}\n")
+            else:
+                status = 500
+        elif name in self.packages:
+            info = {"package_name": name, "version": "1.0", "dependencies": self.packages[name]}
+            status, body = 200, json.dumps({"status": "ok", "data": info}).encode()
+        with self.lock:
+            type(self).active -= 1
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class _LocalRegistry(unittest.TestCase):
+    """mpm pointed at a local server, in a temporary directory and cache."""
+    handler = _Registry
+    server  = HTTPServer
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        server = self.server(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        for name, value in (("CACHE_DIR", os.path.join(tmp.name, "cache")),
+                            ("BASE_URL", f"http://127.0.0.1:{server.server_port}"),
+                            ("_session", None)):
+            self.addCleanup(setattr, mpm, name, getattr(mpm, name))
+            setattr(mpm, name, value)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp.name)
+
+# app depends on left and right, which both depend on base
+DIAMOND = {"app": ["left", "right"], "left": ["base"], "right": ["base"], "base": []}
+
+class Install(_LocalRegistry):
+    handler = _Index
+    server  = ThreadingHTTPServer
+
+    def install(self, package):
+        data, lock = {"packages": []}, {"packages": {}}
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            mpm.install_package(package, data, {}, lock)
+        return [p["package_name"] for p in data["packages"]], lock["packages"], out.getvalue()
+
+    def test_diamond(self):
+        _Index.reset(DIAMOND)
+        names, pins, _ = self.install("app")
+        self.assertEqual(names[0], "base")
+        self.assertEqual(names[-1], "app")
+        self.assertEqual(sorted(names), sorted(DIAMOND))
+        self.assertEqual(set(pins), set(DIAMOND))
+        for name in DIAMOND:
+            with open(os.path.join(mpm.PKG_DIR, name, "lib.mscript")) as f:
+                self.assertEqual(f.read(), f"name = {name!r}\n")
+
+        # base is asked for once; left and right, and the four downloads,
+        # overlap; the session keeps connections open between requests.
+        self.assertEqual(sorted(_Index.requests),
+                         sorted([f"/api/packages/{n}" for n in DIAMOND] +
+                                [f"/api/packages/download/{n}" for n in DIAMOND]))
+        self.assertGreaterEqual(_Index.most_active, 2)
+        self.assertLess(len(_Index.connections), len(_Index.requests))
+
+    def test_failed_dependency_keeps_its_dependents_out(self):
+        _Index.reset(DIAMOND, broken={"right"})
+        names, pins, out = self.install("app")
+        self.assertEqual(names, ["base", "left"])
+        self.assertEqual(set(pins), {"base", "left"})
+        self.assertIn("Failed to install right", out)
+        self.assertIn("Not installing app: right failed.", out)
+        self.assertFalse(os.path.exists(os.path.join(mpm.PKG_DIR, "app")))
+
+class LockfilePins(_LocalRegistry):
+    def setUp(self):
+        super().setUp()
+        self.pinned = archive("x = 1\n")
+        self.pin = {"version": "1.0", "sha256": hashlib.sha256(self.pinned).hexdigest(), "dependencies": []}
+
+    def test_download_matching_the_pin_installs(self):
+        _Registry.archives = {"pkg": self.pinned}
+        size, sha256 = mpm.download_package("pkg", {"version": "1.0"}, self.pin)
+        self.assertEqual(sha256, self.pin["sha256"])
+        self.assertTrue(os.path.exists(os.path.join(mpm.PKG_DIR, "pkg", "lib.mscript")))
+
+    def test_download_not_matching_the_pin_is_rejected(self):
+        _Registry.archives = {"pkg": archive("x = 2\n")}
+        with self.assertRaises(mpm.IntegrityError):
+            mpm.download_package("pkg", {"version": "1.0"}, self.pin)
+        self.assertFalse(os.path.exists(os.path.join(mpm.PKG_DIR, "pkg")))
+
+    def test_damaged_cached_archive_is_fetched_again(self):
+        os.makedirs(os.path.dirname(mpm.cached_archive(self.pin["sha256"])))
+        with open(mpm.cached_archive(self.pin["sha256"]), "wb") as f:
+            f.write(archive("x = 3\n"))
+        _Registry.archives = {"pkg": self.pinned}
+        size, sha256 = mpm.download_package("pkg", {"version": "1.0"}, self.pin)
+        self.assertEqual((size, sha256), (len(self.pinned), self.pin["sha256"]))
+
+    def test_frozen_install_rejects_an_archive_not_matching_its_pin(self):
+        os.makedirs(os.path.dirname(mpm.cached_archive(self.pin["sha256"])))
+        with open(mpm.cached_archive(self.pin["sha256"]), "wb") as f:
+            f.write(archive("x = 3\n"))
+        data, installed = {"packages": []}, {}
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            ok = mpm.install_frozen("pkg", data, installed, {"packages": {"pkg": self.pin}})
+        self.assertFalse(ok)
+        self.assertIn("does not match its pin", out.getvalue())
+        self.assertEqual(installed, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import unittest
+
+from util import run
+
+PROGRAM = '''
+import "std/parallel"
+import python
+
+def fib(n) {
+    if n < 2 {
+        return n
+    }
+    return fib(n - 1) + fib(n - 2)
+}
+
+def pid(x) {
+    return python.os.getpid()
+}
+
+inputs = [%(n)d for i in range(0, %(items)d)]
+start  = python.time.perf_counter()
+serial = [fib(n) for n in inputs]
+t_serial = python.time.perf_counter() - start
+
+parallel.map(fib, [1], %(workers)d, 1)   # start the pool and load the program
+start  = python.time.perf_counter()
+result = parallel.map(fib, inputs, %(workers)d, 1)
+t_parallel = python.time.perf_counter() - start
+
+pids = parallel.map(pid, range(0, 8), %(workers)d, 1) + parallel.map(pid, range(0, 8), %(workers)d, 1)
+print serial == result, len(set(pids)) <= %(workers)d, python.os.getpid() in pids
+print t_serial, t_parallel
+'''
+
+# Speedup parallel.map must reach over a serial loop, per worker: 0.6 means
+# 1.2x with 2 workers and 2.4x with 4.
+MIN_SPEEDUP_PER_WORKER = float(os.environ.get("MSCRIPT_PARALLEL_MIN_SPEEDUP", 0.6))
+
+class ParallelMap(unittest.TestCase):
+    def measure(self, workers, n, items):
+        result = run(PROGRAM % {"workers": workers, "n": n, "items": items})
+        self.assertEqual(result.stderr, "")
+        checks, timings = result.stdout.splitlines()
+        # same results in order; the pool is reused across calls; work runs
+        # in worker processes
+        self.assertEqual(checks, "True True False")
+        return [float(t) for t in timings.split()]
+
+    def test_results_in_order_and_workers_reused(self):
+        self.measure(2, 10, 12)
+
+    @unittest.skipUnless((os.cpu_count() or 1) >= 2, "scaling needs more than one core")
+    def test_scales_with_cores(self):
+        workers = min(os.cpu_count(), 4)
+        t_serial, t_parallel = self.measure(workers, 18, 4 * workers)
+        speedup = t_serial / t_parallel
+        self.assertGreaterEqual(speedup, MIN_SPEEDUP_PER_WORKER * workers,
+                                f"{speedup:.2f}x with {workers} workers")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from util import IT, run, write
+import it
+
+LOOP = '''xs = [1, 2]
+i = 0
+while i < 3 {
+    y = xs[i] + 1
+    i += 1
+}
+'''
+
+class ErrorLocations(unittest.TestCase):
+    """Specialized nodes report errors where the generic ones do."""
+
+    def test_operand_error_in_specialized_node(self):
+        for flags in ((), ("--no-quicken",)):
+            result = run(LOOP, *flags)
+            self.assertEqual(result.stdout.strip(), "main.mscript:4:9: list index out of range", flags)
+
+    def test_division_by_zero_in_specialized_node(self):
+        source = "i = 0\nwhile i < 3 {\n    y = 6 / (2 - i)\n    i += 1\n}\n"
+        for flags in ((), ("--no-quicken",)):
+            self.assertEqual(run(source, *flags).stdout.strip(), "main.mscript:3:9: division by zero", flags)
+
+    def test_exception_with_unusual_constructor_after_deopt(self):
+        class Refused(Exception):
+            def __init__(self, code, reason):
+                super().__init__(f"{code} {reason}")
+
+        class Odd:
+            def __add__(self, other):
+                raise Refused(7, "no adding")
+
+        interp = it.MscriptInterpreter(filename="odd.mscript")
+        interp.global_env["values"] = [1, 2, Odd()]
+        with self.assertRaises(Refused) as caught:
+            interp.visit(it.parse("for v in values {\n    y = v + 1\n}\n"))
+        if hasattr(caught.exception, "__notes__"):
+            self.assertIn("odd.mscript:2:9", caught.exception.__notes__)
+
+class ParsedTree(unittest.TestCase):
+    """Quickening rewrites nodes in place; printing shows what was parsed."""
+
+    SOURCE = 'def f(x) {\n    return x + 1 < 10 and x in [1, "a"]\n}\nf(2)\nf(2.5)\n'
+
+    def test_pretty_after_running(self):
+        tree = it.parse(self.SOURCE)
+        before = tree.pretty()
+        it.MscriptInterpreter(filename="t.mscript").visit(tree)
+        add = tree.children[0].children[2].children[0].children[0].children[0].children[0]
+        self.assertEqual(add.data, "add_any")   # specialized for ints, then deoptimized
+        self.assertEqual(tree.pretty(), before)
+        self.assertIn("  add\n", before)
+        self.assertIn('"a"', before)
+        self.assertEqual(repr(add), "Node('add', [Node('var', ['x']), Node('number', ['1'])])")
+
+    def test_debug_dump(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(tmp, "main.mscript", self.SOURCE)
+            output = subprocess.run([sys.executable, IT, "main.mscript", "--debug"], capture_output=True,
+                                    text=True, cwd=tmp, timeout=120).stdout.split()
+        self.assertIn("add", output)
+        self.assertIn("in_op", output)
+        self.assertFalse({"add_any", "add_int", "lt_int", "in_const", "_const"} & set(output))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from util import run
+
+TAIL = '''
+def countdown(n) {
+    if n == 0 {
+        return "done"
+    }
+    return countdown(n - 1)
+}
+
+def is_even(n) {
+    if n == 0 {
+        return true
+    }
+    return is_odd(n - 1)
+}
+
+def is_odd(n) {
+    if n == 0 {
+        return false
+    }
+    return is_even(n - 1)
+}
+
+print countdown(50000), is_even(50001)
+'''
+
+DEPTH = '''
+def depth(n) {
+    if n == 0 {
+        return 0
+    }
+    return 1 + depth(n - 1)
+}
+print depth(20000)
+'''
+
+class TailCalls(unittest.TestCase):
+    def test_tail_calls_do_not_count_against_the_limit(self):
+        result = run(TAIL, "--max-recursion", "1000")
+        self.assertEqual(result.stderr, "")
+        self.assertEqual(result.stdout, "done False\n")
+
+class MaxRecursion(unittest.TestCase):
+    def test_limit_stops_deep_non_tail_recursion(self):
+        result = run(DEPTH)
+        self.assertEqual(result.stdout, "main.mscript: maximum recursion depth (10000) exceeded in 'depth'\n")
+
+    def test_raised_limit_allows_deep_non_tail_recursion(self):
+        for flags in ((), ("--compiled",)):
+            with self.subTest(flags=flags):
+                result = run(DEPTH, "--max-recursion", "30000", *flags)
+                self.assertEqual(result.stderr, "")
+                self.assertEqual(result.stdout, "20000\n")
+
+if __name__ == "__main__":
+    unittest.main()
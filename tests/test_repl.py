@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from util import IT
+
+SESSION = '''def sq(x) {
+    return x * x
+}
+sq(4)
+if true {
+    print "in block"
+}
+%time sq(3)
+%timeit sq(2)
+x = [1,
+
+print "after"
+print 1 / 0
+'''
+
+class Repl(unittest.TestCase):
+    def test_session(self):
+        with tempfile.TemporaryDirectory() as home:
+            result = subprocess.run([sys.executable, IT], input=SESSION, capture_output=True, text=True,
+                                    env={**os.environ, "HOME": home}, timeout=120)
+        self.assertEqual(result.stderr, "")
+        # prompts are printed without a newline, so split on them
+        replies = [r.strip() for r in result.stdout.split(">>> ")[1:]]
+        self.assertEqual(replies[0], "... ...")   # the def spans three lines
+        self.assertEqual(replies[1], "16")
+        self.assertEqual(replies[2], "... ... in block")
+        self.assertRegex(replies[3], r"^9\ntime: [\d.]+ (s|ms|µs|ns)$")
+        self.assertRegex(replies[4], r"^[\d.]+ (s|ms|µs|ns) per run \(best of 3, \d+ runs each\)$")
+        # an empty line ends an unfinished statement with its syntax error
+        self.assertRegex(replies[5], r"^\.\.\. <repl>:1:7: Syntax error")
+        self.assertEqual(replies[6], "after")
+        self.assertEqual(replies[7], "<repl>:1:7: division by zero")
+
+if __name__ == "__main__":
+    unittest.main()
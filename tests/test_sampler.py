@@ -0,0 +1,100 @@
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from util import IT, write
+
+BUSY = '''
+def inner(n) {
+    total = 0
+    i = 0
+    while i < n {
+        total = total + i
+        i = i + 1
+    }
+    return total
+}
+
+def outer() {
+    return inner(200000) + 1
+}
+
+print outer()
+'''
+
+# Waits for the test to create `stop`, after saying it is ready.
+WAITING = '''
+import python
+
+def wait() {
+    while not python.os.path.exists("stop") {
+        python.time.sleep(0.01)
+    }
+}
+
+python.open("ready", "w").close()
+wait()
+'''
+
+FOLDED = re.compile(r"^<module> \(main\.mscript:\d+\)(;\w+ \(main\.mscript:\d+\))* (\d+)$")
+
+def folded(path):
+    with open(path) as f:
+        lines = f.read().splitlines()
+    stacks = {}
+    for line in lines:
+        match = FOLDED.match(line)
+        assert match, line
+        stacks[line.rsplit(" ", 1)[0]] = int(match.group(2))
+    return stacks
+
+class Sampler(unittest.TestCase):
+    def test_folded_stacks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(tmp, "main.mscript", BUSY)
+            result = subprocess.run([sys.executable, IT, "--sample", "out.folded", "--sample-rate", "200",
+                                     "main.mscript"], capture_output=True, text=True, cwd=tmp, timeout=120)
+            stacks = folded(os.path.join(tmp, "out.folded"))
+        self.assertEqual(result.stdout, "19999900001\n")
+        samples = int(re.search(r"sampling: (\d+) samples written to out.folded", result.stderr).group(1))
+        self.assertEqual(sum(stacks.values()), samples)
+        # nearly all the time goes to inner's loop (lines 5-8), called from outer
+        in_loop = sum(n for stack, n in stacks.items()
+                      if re.fullmatch(r"<module> \(main.mscript:16\);outer \(main.mscript:13\);"
+                                      r"inner \(main.mscript:[5-8]\)", stack))
+        self.assertGreater(in_loop, samples * 0.8, stacks)
+
+    @unittest.skipUnless(hasattr(signal, "SIGUSR2"), "toggling needs SIGUSR2")
+    def test_paused_sampler_toggled_by_signal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(tmp, "main.mscript", WAITING)
+            out = os.path.join(tmp, "out.folded")
+            proc = subprocess.Popen([sys.executable, IT, "--sample", "out.folded", "--sample-paused",
+                                     "main.mscript"], cwd=tmp, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, text=True)
+            self.addCleanup(lambda: proc.poll() is None and proc.kill())
+            deadline = time.monotonic() + 60
+            while not os.path.exists(os.path.join(tmp, "ready")):
+                self.assertLess(time.monotonic(), deadline, "the script never started")
+                time.sleep(0.01)
+            time.sleep(0.2)
+            self.assertFalse(os.path.exists(out))   # paused: nothing sampled yet
+            proc.send_signal(signal.SIGUSR2)        # on
+            time.sleep(0.5)
+            proc.send_signal(signal.SIGUSR2)        # off, and the file is written
+            while not os.path.exists(out):
+                self.assertLess(time.monotonic(), deadline, "no profile written")
+                time.sleep(0.01)
+            write(tmp, "stop", "")
+            _, err = proc.communicate(timeout=60)
+            stacks = folded(out)
+        self.assertIn("samples written to out.folded", err)
+        self.assertEqual(list(stacks), ["<module> (main.mscript:11);wait (main.mscript:6)"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from util import IT, write
+
+APP = '''
+import "std/serve"
+import "std/time"
+import python
+
+def hello(req) {
+    return "hello " + req["query"]["name"]
+}
+
+def create(req) {
+    return serve.response(201, {"got": req["body"]}, {"X-Created": "yes"})
+}
+
+def slow(req) {
+    time.sleep(0.3)
+    return str(python.os.getpid())
+}
+
+def boom(req) {
+    return 1 / 0
+}
+
+routes = {"/hello": hello, "POST /item": create, "/slow": slow, "/boom": boom}
+'''
+
+@unittest.skipUnless(hasattr(os, "fork"), "serve pre-forks its workers")
+class Serve(unittest.TestCase):
+    """`mscript serve` on an ephemeral port, driven by a local client."""
+
+    def start(self, tmp, *flags):
+        write(tmp, "app.mscript", APP)
+        server = subprocess.Popen([sys.executable, IT, "serve", "app.mscript", "--port", "0",
+                                   "--workers", "2", *flags],
+                                  cwd=tmp, stderr=subprocess.PIPE, text=True)
+        self.addCleanup(self.stop, server)
+        banner = server.stderr.readline()
+        match = re.search(r"on (http://\S+) with 2 workers \((\w+)\)", banner)
+        self.assertIsNotNone(match, banner)
+        return server, match.group(1), match.group(2)
+
+    def stop(self, server):
+        """SIGINT lets the parent take its workers down with it."""
+        if server.poll() is None:
+            server.send_signal(signal.SIGINT)
+            try:
+                server.communicate(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.communicate()
+
+    def get(self, url, data=None):
+        try:
+            with urllib.request.urlopen(url, data, timeout=30) as r:
+                return r.status, dict(r.headers), r.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers), e.read().decode()
+
+    def check(self, *flags, mode):
+        with tempfile.TemporaryDirectory() as tmp:
+            server, base, banner_mode = self.start(tmp, *flags)
+            self.assertEqual(banner_mode, mode)
+
+            self.assertEqual(self.get(base + "/hello?name=ms")[::2], (200, "hello ms"))
+            status, headers, body = self.get(base + "/item", b"payload")
+            self.assertEqual((status, headers["X-Created"], json.loads(body)),
+                             (201, "yes", {"got": "payload"}))
+            self.assertEqual(self.get(base + "/missing")[0], 404)
+            self.assertEqual(self.get(base + "/boom")[0], 500)
+
+            # A worker serves one request at a time, so two overlapping slow
+            # requests are answered by both workers.
+            pids = [None, None]
+            def fetch(i):
+                pids[i] = self.get(base + "/slow")[2]
+            threads = [threading.Thread(target=fetch, args=(i,)) for i in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(set(pids)), 2, pids)
+
+            stats = json.loads(self.get(base + "/__mscript/stats")[2])
+            self.assertEqual(stats["workers"], 2)
+            routes = stats["routes"]
+            self.assertEqual({route: s["count"] for route, s in routes.items()},
+                             {"/hello": 1, "POST /item": 1, "(no route)": 1, "/boom": 1, "/slow": 2})
+            self.assertGreaterEqual(routes["/slow"]["mean_ms"], 300)
+            self.assertEqual(routes["/slow"]["buckets"]["<=250ms"], 0)
+
+            server.send_signal(signal.SIGINT)
+            _, err = server.communicate(timeout=30)
+        self.assertEqual(server.returncode, 0, err)
+        self.assertIn("/boom: ", err)
+        self.assertIn("division by zero", err)
+        self.assertRegex(err, r"/slow: 2 requests, mean \d+\.\d+ ms, p50 <=\d+ ms")
+
+    def test_compiled(self):
+        self.check(mode="compiled")
+
+    def test_interpreted(self):
+        self.check("--interpreted", mode="interpreted")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from util import run
+
+PROGRAM = '''
+methods = ["GET", "HEAD"]
+
+def allowed(m) {
+    return m in ["GET", "HEAD", 2.5, None]
+}
+
+for m in ["GET", "POST", 2.5, 3, [1], {"a": 1}, None] {
+    print m, allowed(m), m in methods
+}
+print [1] in [[1], 2], 3 in [1 + 2]
+
+a = {1, 2, 3}
+b = set([3, 4])
+print sorted(a | b), sorted(a & b), sorted(a - b), set(), {}, type(a), 2 in a
+'''
+
+EXPECTED = [
+    "GET True True",
+    "POST False False",
+    "2.5 True False",
+    "3 False False",
+    # an unhashable value is in no constant list, and is not an error
+    "[1] False False",
+    "{'a': 1} False False",
+    "None True False",
+    "True True",
+    "[1, 2, 3, 4] [3] [1, 2] set() {} set True",
+]
+
+class Sets(unittest.TestCase):
+    def test_constant_lists_and_sets(self):
+        for flags in ((), ("--compiled",), ("--no-quicken",)):
+            with self.subTest(flags=flags):
+                result = run(PROGRAM, *flags)
+                self.assertEqual(result.stderr, "")
+                self.assertEqual(result.stdout.splitlines(), EXPECTED)
+
+    def test_only_literal_lists_are_hashed(self):
+        # `methods` is a variable and `[[1], 2]` / `[1 + 2]` hold non-literals
+        result = run(PROGRAM, "--quicken-stats")
+        self.assertEqual(result.stdout.splitlines(), EXPECTED)
+        self.assertIn(", 1 constant lists hashed", result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
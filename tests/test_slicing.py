@@ -0,0 +1,47 @@
+import unittest
+
+from util import run
+
+PROGRAM = '''
+import "std/ffi"
+import python
+
+xs = [0, 1, 2, 3, 4, 5]
+part = xs[1:3]
+part[0] = 99
+print part, xs, xs[::2], xs[-2:], xs[:], xs[4:1:-1]
+print "abcdef"[1:-1], "abcdef"[::-1]
+
+b = bytes("abcd")
+v = b[1:3]
+print type(v), bytes(v), len(v)
+
+ba = python.bytearray(bytes("hello"))
+w = ba[0:2]
+ba[0] = 74
+print bytes(w), bytes(w[1:])
+
+buf = ffi.buffer(4)
+ffi.write_u8(buf, 7, 2)
+bv = buf[1:4]
+print type(bv), bv[1], len(bv)
+'''
+
+class Slicing(unittest.TestCase):
+    def test_slices(self):
+        for flags in ((), ("--compiled",)):
+            with self.subTest(flags=flags):
+                result = run(PROGRAM, *flags)
+                self.assertEqual(result.stderr, "")
+                self.assertEqual(result.stdout.splitlines(), [
+                    # list slices are copies
+                    "[99, 2] [0, 1, 2, 3, 4, 5] [0, 2, 4] [4, 5] [0, 1, 2, 3, 4, 5] [4, 3, 2]",
+                    "bcde fedcba",
+                    # bytes, bytearrays and FFI buffers give views sharing their memory
+                    "memoryview b'bc' 2",
+                    "b'Je' b'e'",
+                    "memoryview 7 3",
+                ])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from util import IT, write
+
+LIB = '''print "lib loaded"
+
+def double(x) {
+    return x * 2
+}
+'''
+
+INIT = '''import "lib"
+import python
+
+table = {x: lib.double(x) for x in range(0, 5)}
+
+@memo
+def slow(n) {
+    return n * 100
+}
+slow(3)
+
+log = python.open("log.txt", "a")
+for f in [python.open("other.txt", "w")] {
+    handle = f
+}
+print "init done"
+'''
+
+MAIN = '''import "lib"
+print table[4], lib.double(21), slow(3), slow.stats()["hits"]
+log.write("written")
+log.close()
+print python.open("log.txt").read()
+'''
+
+class Snapshots(unittest.TestCase):
+    def mscript(self, tmp, *args):
+        return subprocess.run([sys.executable, IT, *args], capture_output=True, text=True, cwd=tmp, timeout=120)
+
+    def test_resume_from_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, source in (("lib.mscript", LIB), ("init.mscript", INIT), ("main.mscript", MAIN)):
+                write(tmp, name, source)
+            saved   = self.mscript(tmp, "init.mscript", "--snapshot", "app.snap")
+            resumed = self.mscript(tmp, "main.mscript", "--from-snapshot", "app.snap")
+        self.assertEqual(saved.stdout, "lib loaded\ninit done\n")
+        # the open file is re-created by running its assignment again; one
+        # bound only by a loop cannot be
+        self.assertEqual(saved.stderr.splitlines(), [
+            "snapshot: left out init.mscript: f (cannot be pickled or re-created)",
+            "snapshot: left out init.mscript: handle (cannot be pickled or re-created)",
+            "wrote app.snap",
+        ])
+        # globals, functions and memo caches come back; lib is not run again
+        self.assertEqual(resumed.stderr, "")
+        self.assertEqual(resumed.stdout, "8 42 300 1\nwritten\n")
+
+    def test_unreadable_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write(tmp, "main.mscript", 'print "hi"\n')
+            write(tmp, "bad.snap", "not a snapshot")
+            result = self.mscript(tmp, "main.mscript", "--from-snapshot", "bad.snap")
+        self.assertEqual(result.returncode, 1)
+        self.assertTrue(result.stdout.startswith("bad.snap: cannot resume from snapshot: "), result.stdout)
+
+if __name__ == "__main__":
+    unittest.main()
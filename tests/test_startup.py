@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from util import IT, MSCRIPT, write
+
+# Wall time allowed for `python it.py` on a print-only script, best of three
+# runs. Generous, to leave room for slow CI machines: it is around 150 ms on
+# a laptop, and was over 400 ms before imports were made lazy.
+BUDGET_MS = float(os.environ.get("MSCRIPT_STARTUP_BUDGET_MS", 1000))
+
+# imported on first use only (mscript_builtins._LazyModule and friends)
+LAZY = ("json", "datetime", "ctypes", "platform", "asyncio", "multiprocessing",
+        "mscript_parallel", "mscript_compiler", "tracemalloc")
+
+class StartupBudget(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.script = write(tmp.name, "hello.mscript", 'print "hello"\n')
+        subprocess.run([sys.executable, IT, self.script], capture_output=True)   # warm the caches
+
+    def test_print_only_script_loads_no_lazy_modules(self):
+        check = (f"import sys; sys.path.insert(0, {MSCRIPT!r}); sys.argv = ['it', {self.script!r}]\n"
+                 "import it\n"
+                 "try:\n    it.main()\nexcept SystemExit:\n    pass\n"
+                 f"print(sorted(m for m in {LAZY!r} if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True)
+        self.assertEqual(result.stdout.splitlines()[-1], "[]", result.stderr)
+
+    def test_print_only_script_starts_within_budget(self):
+        times = []
+        for _ in range(3):
+            started = time.perf_counter()
+            result = subprocess.run([sys.executable, IT, self.script], capture_output=True, text=True)
+            times.append((time.perf_counter() - started) * 1000)
+            self.assertEqual(result.stdout, "hello\n")
+        self.assertLess(min(times), BUDGET_MS, f"startup took {min(times):.0f} ms")
+
+if __name__ == "__main__":
+    unittest.main()
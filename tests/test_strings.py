@@ -0,0 +1,54 @@
+import unittest
+
+from util import run
+
+PROGRAM = '''
+import "std/strings"
+
+b = strings.builder()
+b.append("a").append(1).append(2.5)
+print b.build(), b.build("-"), len(b), str(b)
+b.clear()
+print len(b), b.build() == ""
+
+print strings.join(", ", ["x", 2, true]), strings.split("a,b,,c", ",")
+print strings.format("{} has {}", ["ann", 3]), strings.format("{name}!", {"name": "hi"})
+print strings.replace("aXbX", "X", "-"), strings.substring("abcdef", 1, 4)
+print strings.upper("up"), strings.lower("LOW"), "[" + strings.strip("  s  ") + "]", strings.find("hello", "l")
+
+name = "Ann"
+d = {"k": [1, 2]}
+print f"{name} is {20 + 1} and {d[\\"k\\"][1]}"
+print f"say \\"{name}\\" {{not a field}}"
+print f"|{name:>6}|{3.14159:.2f}|{42:05d}|{len(name)}"
+print f"plain"
+'''
+
+class Strings(unittest.TestCase):
+    def test_builder_helpers_and_fstrings(self):
+        for flags in ((), ("--compiled",)):
+            with self.subTest(flags=flags):
+                result = run(PROGRAM, *flags)
+                self.assertEqual(result.stderr, "")
+                self.assertEqual(result.stdout.splitlines(), [
+                    "a12.5 a-1-2.5 5 a12.5",
+                    "0 True",
+                    "x, 2, True ['a', 'b', '', 'c']",
+                    "ann has 3 hi!",
+                    "a-b- bcd",
+                    "UP low [s] 2",
+                    "Ann is 21 and 2",
+                    'say "Ann" {not a field}',
+                    "|   Ann|3.14|00042|3",
+                    "plain",
+                ])
+
+    def test_fstring_errors_point_at_the_literal(self):
+        for source, message in (('x = 1\nprint f"{x"\n', "main.mscript:2:7: unterminated '{' in f-string"),
+                                ('print f"{1 +}"\n', "main.mscript:1:7: f-string field '1 +' is not an expression")):
+            for flags in ((), ("--compiled",)):
+                with self.subTest(source=source, flags=flags):
+                    self.assertEqual(run(source, *flags).stdout, message + "\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+# tests/util.py - running Mscript programs from the tests
+
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MSCRIPT = os.path.join(ROOT, "mscript")
+IT      = os.path.join(MSCRIPT, "it.py")
+
+sys.path.insert(0, MSCRIPT)
+
+def write(directory, name, source):
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(source)
+    return path
+
+def run(source, *flags, files=None, env=None):
+    """Run `source` as main.mscript with `python it.py`, in a temporary
+    directory that also holds `files` (name -> source); returns the
+    CompletedProcess."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, text in (files or {}).items():
+            write(tmp, name, text)
+        write(tmp, "main.mscript", source)
+        return subprocess.run([sys.executable, IT, *flags, "main.mscript"], capture_output=True, text=True,
+                              cwd=tmp, env={**os.environ, **(env or {})}, timeout=120)